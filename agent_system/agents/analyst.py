@@ -11,7 +11,10 @@ from agent_system.models.context import AgentContext
 from agent_system.models.task import Task
 from agent_system.tools.read_file import READ_FILE_TOOL_DEFINITION
 from agent_system.tools.search_file import SEARCH_FILE_TOOL_DEFINITION
-from agent_system.tools.grep_content import GREP_CONTENT_TOOL_DEFINITION
+from agent_system.tools.grep_content import (
+    GREP_CONTENT_MULTI_TOOL_DEFINITION,
+    GREP_CONTENT_TOOL_DEFINITION,
+)
 from agent_system.tools.list_directory import LIST_DIRECTORY_TOOL_DEFINITION
 from agent_system.tools.project_structure import GET_PROJECT_STRUCTURE_TOOL_DEFINITION
 
@@ -22,6 +25,16 @@ _COMPLETED_TASK_PROMPT_LIMIT = 20
 class AnalystToolExecutor:
     """Analyst 可用的工具执行器"""
 
+    # 只读工具，可在同一轮内并行执行
+    _PARALLEL_SAFE_TOOLS = frozenset({
+        "read_file",
+        "search_file",
+        "grep_content",
+        "grep_content_multi",
+        "list_directory",
+        "get_project_structure",
+    })
+
     def __init__(
         self,
         allowed_roots: list[str] | None = None,
@@ -61,6 +74,10 @@ class AnalystToolExecutor:
             )
         return (str(resolved), f"[路径约束] 目录 {resolved} 超出允许范围")
 
+    def is_parallel_safe(self, name: str) -> bool:
+        """工具是否为只读、可与同轮其他只读调用并行执行"""
+        return name in self._PARALLEL_SAFE_TOOLS
+
     def execute(self, name: str, tool_input: dict[str, Any]) -> str:
         """执行工具调用
 
@@ -122,6 +139,7 @@ class AnalystToolExecutor:
                 regex=tool_input.get("regex"),
                 max_results=tool_input.get("max_results", 200),
                 respect_gitignore=tool_input.get("respect_gitignore", True),
+                order=tool_input.get("order", "sorted"),
             )
             if warning:
                 return json.dumps({"warning": warning, "results": results}, ensure_ascii=False)
@@ -149,6 +167,18 @@ class AnalystToolExecutor:
                 )
             return json.dumps(results, ensure_ascii=False)
 
+        elif name == "grep_content_multi":
+            from agent_system.tools.grep_content import grep_content_multi_tool
+            target = self._resolve_path(str(tool_input["path"]))
+            if not self._is_allowed(target):
+                return f"错误: [路径约束] 文件路径不在允许范围: {target}"
+            results = grep_content_multi_tool(
+                path=str(target),
+                patterns=list(tool_input["patterns"]),
+                max_matches=tool_input.get("max_matches", 50),
+            )
+            return json.dumps(results, ensure_ascii=False)
+
         elif name == "list_directory":
             from agent_system.tools.list_directory import list_directory_tool
             path, warning = self._clamp_dir(str(tool_input["path"]))
@@ -204,6 +234,7 @@ class Analyst(BaseAgent):
             READ_FILE_TOOL_DEFINITION,
             SEARCH_FILE_TOOL_DEFINITION,
             GREP_CONTENT_TOOL_DEFINITION,
+            GREP_CONTENT_MULTI_TOOL_DEFINITION,
             LIST_DIRECTORY_TOOL_DEFINITION,
             GET_PROJECT_STRUCTURE_TOOL_DEFINITION,
         ]
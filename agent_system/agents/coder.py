@@ -15,7 +15,10 @@ from agent_system.services.path_guard import PathGuard
 from agent_system.tools.read_file import READ_FILE_TOOL_DEFINITION
 from agent_system.tools.search_file import SEARCH_FILE_TOOL_DEFINITION
 from agent_system.tools.write_file import WRITE_FILE_TOOL_DEFINITION
-from agent_system.tools.grep_content import GREP_CONTENT_TOOL_DEFINITION
+from agent_system.tools.grep_content import (
+    GREP_CONTENT_MULTI_TOOL_DEFINITION,
+    GREP_CONTENT_TOOL_DEFINITION,
+)
 from agent_system.tools.list_directory import LIST_DIRECTORY_TOOL_DEFINITION
 from agent_system.tools.replace_in_file import REPLACE_IN_FILE_TOOL_DEFINITION
 from agent_system.tools.todo_list import TODO_LIST_TOOL_DEFINITION
@@ -108,6 +111,11 @@ class CoderToolExecutor:
         self._guard = PathGuard(allowed_roots=allowed_roots, default_base_dir=default_base_dir)
         self._mcp_client = mcp_client
 
+    # 只读工具，可在同一轮内并行执行（写入、命令、TODO 等有副作用的工具保持串行）
+    _PARALLEL_SAFE_TOOLS = frozenset({
+        "read_file", "search_file", "grep_content", "grep_content_multi", "list_directory",
+    })
+
     _DANGEROUS_COMMAND_PATTERNS: list[tuple[re.Pattern[str], str]] = [
         (re.compile(r"(^|[;&|])\s*rm\s+", re.IGNORECASE), "检测到 rm 删除命令"),
         (re.compile(r"(^|[;&|])\s*del\s+", re.IGNORECASE), "检测到 del 删除命令"),
@@ -137,6 +145,12 @@ class CoderToolExecutor:
             for path, info in self._tracked_writes.items()
         ]
 
+    def is_parallel_safe(self, name: str) -> bool:
+        """工具是否为只读、可与同轮其他只读调用并行执行"""
+        if self._mcp_client and name in self._mcp_client.get_tool_names():
+            return False
+        return name in self._PARALLEL_SAFE_TOOLS
+
     def execute(self, name: str, tool_input: dict[str, Any]) -> str:
         # MCP 工具调用优先
         if self._mcp_client and name in self._mcp_client.get_tool_names():
@@ -236,6 +250,7 @@ class CoderToolExecutor:
                         regex=tool_input.get("regex"),
                         max_results=tool_input.get("max_results", 200),
                         respect_gitignore=tool_input.get("respect_gitignore", True),
+                        order=tool_input.get("order", "sorted"),
                     )
                     combined[pat] = results
                 if warning:
@@ -248,6 +263,7 @@ class CoderToolExecutor:
                     regex=tool_input.get("regex"),
                     max_results=tool_input.get("max_results", 200),
                     respect_gitignore=tool_input.get("respect_gitignore", True),
+                    order=tool_input.get("order", "sorted"),
                 )
                 if warning:
                     return json.dumps({"warning": warning, "results": results}, ensure_ascii=False)
@@ -288,6 +304,18 @@ class CoderToolExecutor:
                 )
             return json.dumps(results, ensure_ascii=False)
 
+        elif name == "grep_content_multi":
+            from agent_system.tools.grep_content import grep_content_multi_tool
+            file_path, err = self._guard.validate_file(str(tool_input["path"]))
+            if err or file_path is None:
+                return f"错误: {err or '路径无效'}"
+            results = grep_content_multi_tool(
+                path=file_path,
+                patterns=list(tool_input["patterns"]),
+                max_matches=tool_input.get("max_matches", 50),
+            )
+            return json.dumps(results, ensure_ascii=False)
+
         elif name == "list_directory":
             from agent_system.tools.list_directory import list_directory_tool
             path, warning = self._guard.clamp_dir(str(tool_input["path"]))
@@ -391,6 +419,7 @@ class Coder(BaseAgent):
             SEARCH_FILE_TOOL_DEFINITION,
             WRITE_FILE_TOOL_DEFINITION,
             GREP_CONTENT_TOOL_DEFINITION,
+            GREP_CONTENT_MULTI_TOOL_DEFINITION,
             LIST_DIRECTORY_TOOL_DEFINITION,
             REPLACE_IN_FILE_TOOL_DEFINITION,
             RUN_COMMAND_TOOL_DEFINITION,
@@ -264,7 +264,7 @@ class Planner(BaseAgent):
             "3. 输出 JSON 格式的 MCP 配置\n\n"
             "可用内置工具（无需 MCP）：\n"
             "- read_file, write_file, list_directory, search_file\n"
-            "- grep_content, diff_file, run_command, ts_check\n"
+            "- grep_content, grep_content_multi, diff_file, run_command, ts_check\n"
             "- get_project_structure, list_todo_items\n\n"
             f"项目已配置的 MCP Servers（优先从这里选，不要凭空发明新的 Server）：\n{json.dumps(available_servers, ensure_ascii=False, indent=2)}\n\n"
             f"项目级默认启用 MCP：{json.dumps(context.project.mcp_default_enabled, ensure_ascii=False)}\n\n"
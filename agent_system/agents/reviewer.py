@@ -19,7 +19,10 @@ from agent_system.tools.run_command import (
     SEND_STDIN_TOOL_DEFINITION,
 )
 from agent_system.tools.read_file import READ_FILE_TOOL_DEFINITION
-from agent_system.tools.grep_content import GREP_CONTENT_TOOL_DEFINITION
+from agent_system.tools.grep_content import (
+    GREP_CONTENT_MULTI_TOOL_DEFINITION,
+    GREP_CONTENT_TOOL_DEFINITION,
+)
 from agent_system.tools.diff_file import DIFF_FILE_TOOL_DEFINITION
 from agent_system.tools.ts_check import TS_CHECK_TOOL_DEFINITION
 from agent_system.services.mcp_client import MCPClient
@@ -223,15 +226,24 @@ class Reviewer(BaseAgent):
             SEND_STDIN_TOOL_DEFINITION,
             READ_FILE_TOOL_DEFINITION,
             GREP_CONTENT_TOOL_DEFINITION,
+            GREP_CONTENT_MULTI_TOOL_DEFINITION,
             DIFF_FILE_TOOL_DEFINITION,
             TS_CHECK_TOOL_DEFINITION,
         ]
 
         class ReviewToolExecutor:
+            # 只读工具，可在同一轮内并行执行
+            _PARALLEL_SAFE_TOOLS = frozenset({"read_file", "grep_content", "grep_content_multi", "diff_file"})
+
             def __init__(self, path_guard: PathGuard, mcp_client: MCPClient | None = None) -> None:
                 self._guard = path_guard
                 self._mcp_client = mcp_client
 
+            def is_parallel_safe(self, name: str) -> bool:
+                if self._mcp_client and name in self._mcp_client.get_tool_names():
+                    return False
+                return name in self._PARALLEL_SAFE_TOOLS
+
             def execute(self, name: str, tool_input: dict[str, Any]) -> str:
                 # 优先尝试 MCP 工具
                 if self._mcp_client and name in self._mcp_client.get_tool_names():
@@ -354,6 +366,18 @@ class Reviewer(BaseAgent):
                         )
                     return json.dumps(results, ensure_ascii=False)
 
+                elif name == "grep_content_multi":
+                    from agent_system.tools.grep_content import grep_content_multi_tool
+                    file_path, err = self._guard.validate_file(str(tool_input["path"]))
+                    if err or file_path is None:
+                        return f"错误: {err or '路径无效'}"
+                    results = grep_content_multi_tool(
+                        path=file_path,
+                        patterns=list(tool_input["patterns"]),
+                        max_matches=tool_input.get("max_matches", 50),
+                    )
+                    return json.dumps(results, ensure_ascii=False)
+
                 elif name == "diff_file":
                     from agent_system.tools.diff_file import diff_file_tool
                     file_a, err_a = self._guard.validate_file(str(tool_input["file_a"]))
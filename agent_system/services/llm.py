@@ -7,14 +7,16 @@ import logging
 import re
 import socket
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from dataclasses import dataclass, field
 from typing import Any, TYPE_CHECKING
 
-import anthropic
-
 if TYPE_CHECKING:
+    import anthropic
+
     from agent_system.services.conversation_logger import ConversationLog
 
 logger = logging.getLogger(__name__)
@@ -27,9 +29,20 @@ _DEFAULT_SUMMARY_TRIGGER_BYTES = 4_200_000
 _DEFAULT_SUMMARY_KEEP_RECENT_MESSAGES = 8
 # 将摘要同步回对话日志时，额外保留的最近日志条数。
 _DEFAULT_SUMMARY_KEEP_RECENT_LOG_ENTRIES = 8
+# 工具循环超过 soft_limit // 2 轮后，仅保留最近若干轮的完整工具结果，
+# 更早且超过最小长度的 tool_result 内容替换为占位符。
+_TOOL_RESULT_KEEP_ROUNDS = 5
+_TOOL_RESULT_ELIDE_MIN_CHARS = 500
+# 同一轮内并行执行只读工具调用时的最大线程数
+_MAX_PARALLEL_TOOL_WORKERS = 8
 _SUMMARY_BLOCK_START = "\n\n[CONTEXT SUMMARY START]\n"
 _SUMMARY_BLOCK_END = "\n[CONTEXT SUMMARY END]\n"
 
+# 进程内共享的 HTTP 客户端，按 (base_url, timeout) 复用连接池，
+# 避免每个 Agent 的 LLMService 各自建立 TCP/TLS 连接。
+_SHARED_HTTP_CLIENTS: dict[tuple[str, float], Any] = {}
+_SHARED_HTTP_CLIENTS_LOCK = threading.Lock()
+
 
 @dataclass
 class LLMResponse:
@@ -55,10 +68,9 @@ class TokenUsage:
         return self.total_input + self.total_output
 
 
-# 匹配 <think>...</think> 标签（含跨行），用于过滤模型思考内容
-_THINK_RE = re.compile(r"<think>[\s\S]*?</think>", re.DOTALL)
-# 匹配未闭合的 <think>... 片段（流式场景中最后一块可能未关闭）
-_THINK_OPEN_RE = re.compile(r"<think>[\s\S]*$", re.DOTALL)
+# 匹配 <think>...</think> 标签（含跨行），用于过滤模型思考内容；
+# \Z 分支同时覆盖未闭合的 <think>... 片段（流式场景中最后一块可能未关闭）
+_THINK_RE = re.compile(r"<think>.*?(?:</think>|\Z)", re.DOTALL)
 _INPUT_LENGTH_LIMIT_RE = re.compile(r"Range of input length should be \[\d+,\s*(\d+)\]")
 
 
@@ -69,10 +81,39 @@ def _strip_think_tags(text: str | None) -> str:
     if not isinstance(text, str):
         text = str(text)
     text = _THINK_RE.sub("", text)
-    text = _THINK_OPEN_RE.sub("", text)
     return text.strip()
 
 
+# anthropic SDK 导入较慢（httpx/pydantic 等），推迟到首次真正需要时再导入
+_ANTHROPIC: Any = None
+
+
+def _import_anthropic() -> Any:
+    """按需导入 anthropic SDK 并缓存模块对象"""
+    global _ANTHROPIC
+    if _ANTHROPIC is None:
+        import anthropic as _ANTHROPIC
+    return _ANTHROPIC
+
+
+def __getattr__(name: str) -> Any:
+    # 兼容 llm_module.anthropic 形式的访问（如测试中 monkeypatch 异常类型）
+    if name == "anthropic":
+        return _import_anthropic()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _get_shared_http_client(base_url: str, timeout: float) -> Any:
+    """获取（必要时创建）共享 HTTP 客户端"""
+    key = (base_url, float(timeout))
+    with _SHARED_HTTP_CLIENTS_LOCK:
+        http_client = _SHARED_HTTP_CLIENTS.get(key)
+        if http_client is None:
+            http_client = _import_anthropic().DefaultHttpxClient(timeout=timeout)
+            _SHARED_HTTP_CLIENTS[key] = http_client
+        return http_client
+
+
 def _is_retryable_timeout_error(error: Exception) -> bool:
     """判断是否为可重试的底层超时异常"""
     if isinstance(error, (TimeoutError, socket.timeout)):
@@ -133,15 +174,46 @@ def _extract_input_length_limit(error: Exception) -> int | None:
         return None
 
 
+def _message_size(
+    message: dict[str, Any],
+    size_cache: dict[int, tuple[dict[str, Any], int, int]] | None = None,
+) -> tuple[int, int]:
+    """返回单条消息的 (content 字符数, JSON 字节数)，可按 id(message) 缓存。
+
+    缓存项同时持有消息对象本身，既防止 id 被复用，也用于校验命中；
+    调用方需保证缓存期间不会原地修改消息内容。
+    """
+    if size_cache is not None:
+        cached = size_cache.get(id(message))
+        if cached is not None and cached[0] is message:
+            return (cached[1], cached[2])
+
+    chars = len(str(message.get("content", "")))
+    size_bytes = len(json.dumps(message, ensure_ascii=False).encode("utf-8"))
+    if size_cache is not None:
+        size_cache[id(message)] = (message, chars, size_bytes)
+    return (chars, size_bytes)
+
+
 def _estimate_request_payload(
     system_prompt: str,
     messages: list[dict[str, Any]],
     tools: list[dict[str, Any]] | None,
+    size_cache: dict[int, tuple[dict[str, Any], int, int]] | None = None,
 ) -> dict[str, int]:
-    """估算请求体规模，用于排查请求过大问题"""
+    """估算请求体规模，用于排查请求过大问题
+
+    消息部分逐条计算后累加（与整体 json.dumps 的字节数一致），
+    传入 size_cache 时已计算过的消息不会重复序列化。
+    """
     system_chars = len(system_prompt)
     message_count = len(messages)
-    message_chars = sum(len(str(msg.get("content", ""))) for msg in messages)
+    message_chars = 0
+    message_bytes = 0
+    for msg in messages:
+        chars, size_bytes = _message_size(msg, size_cache)
+        message_chars += chars
+        message_bytes += size_bytes
     tool_count = len(tools) if tools else 0
     tool_schema_chars = len(json.dumps(tools or [], ensure_ascii=False))
 
@@ -150,10 +222,12 @@ def _estimate_request_payload(
         "max_tokens": 0,
         "temperature": 0,
         "system": system_prompt,
-        "messages": messages,
+        "messages": [],
         "tools": tools or [],
     }
     payload_bytes = len(json.dumps(payload_obj, ensure_ascii=False).encode("utf-8"))
+    # 补上消息本身及列表分隔符 ", " 的字节数
+    payload_bytes += message_bytes + 2 * max(0, message_count - 1)
 
     return {
         "system_chars": system_chars,
@@ -165,6 +239,102 @@ def _estimate_request_payload(
     }
 
 
+def _elide_stale_tool_results(
+    messages: list[dict[str, Any]],
+    keep_rounds: int = _TOOL_RESULT_KEEP_ROUNDS,
+    min_chars: int = _TOOL_RESULT_ELIDE_MIN_CHARS,
+) -> tuple[list[dict[str, Any]], int]:
+    """将最近 keep_rounds 轮之前的冗长 tool_result 内容替换为占位符。
+
+    保留 tool_use_id 以维持 tool_use / tool_result 配对协议有效；
+    被修改的消息会替换为新的 dict，不原地修改（兼容按 id 的尺寸缓存）。
+
+    Returns:
+        (新的消息列表, 本次省略的 tool_result 数量)
+    """
+    tool_names: dict[str, str] = {}
+    for msg in messages:
+        content = msg.get("content")
+        if msg.get("role") != "assistant" or not isinstance(content, list):
+            continue
+        for block in content:
+            if isinstance(block, dict) and block.get("type") == "tool_use":
+                tool_names[str(block.get("id", ""))] = str(block.get("name", "unknown"))
+
+    result = list(messages)
+    elided = 0
+    rounds_seen = 0
+    for index in range(len(result) - 1, -1, -1):
+        msg = result[index]
+        content = msg.get("content")
+        if msg.get("role") != "user" or not isinstance(content, list):
+            continue
+        if not any(isinstance(b, dict) and b.get("type") == "tool_result" for b in content):
+            continue
+        rounds_seen += 1
+        if rounds_seen <= keep_rounds:
+            continue
+
+        new_blocks: list[Any] = []
+        changed = False
+        for block in content:
+            block_content = block.get("content") if isinstance(block, dict) else None
+            if (
+                isinstance(block, dict)
+                and block.get("type") == "tool_result"
+                and isinstance(block_content, str)
+                and len(block_content) >= min_chars
+                and not block_content.startswith("<elided ")
+            ):
+                tool_name = tool_names.get(str(block.get("tool_use_id", "")), "unknown")
+                new_block = dict(block)
+                new_block["content"] = f"<elided {len(block_content)} chars; tool={tool_name}>"
+                new_blocks.append(new_block)
+                changed = True
+                elided += 1
+            else:
+                new_blocks.append(block)
+        if changed:
+            result[index] = {**msg, "content": new_blocks}
+
+    return (result, elided)
+
+
+def _execute_tool_calls(tool_executor: Any, tool_calls: list[dict[str, Any]]) -> list[str]:
+    """执行一轮中的全部工具调用，按原顺序返回结果字符串。
+
+    若执行器提供 is_parallel_safe(name)，相邻的并行安全（只读）调用
+    会放入线程池并发执行；其余调用保持串行，且不会与前后调用乱序。
+    """
+    is_parallel_safe = getattr(tool_executor, "is_parallel_safe", None)
+
+    def _run(tc: dict[str, Any]) -> str:
+        return str(tool_executor.execute(tc["name"], tc["input"]))
+
+    if is_parallel_safe is None or len(tool_calls) < 2:
+        return [_run(tc) for tc in tool_calls]
+
+    results: list[str] = []
+    index = 0
+    while index < len(tool_calls):
+        if not is_parallel_safe(tool_calls[index]["name"]):
+            results.append(_run(tool_calls[index]))
+            index += 1
+            continue
+
+        batch_end = index
+        while batch_end < len(tool_calls) and is_parallel_safe(tool_calls[batch_end]["name"]):
+            batch_end += 1
+        batch = tool_calls[index:batch_end]
+        if len(batch) == 1:
+            results.append(_run(batch[0]))
+        else:
+            with ThreadPoolExecutor(max_workers=min(_MAX_PARALLEL_TOOL_WORKERS, len(batch))) as pool:
+                results.extend(pool.map(_run, batch))
+        index = batch_end
+    return results
+
+
 def _truncate_middle(text: str, max_chars: int) -> str:
     """保留首尾信息的中间截断。"""
     if max_chars <= 0:
@@ -211,9 +381,13 @@ def _fit_messages_to_payload(
     messages: list[dict[str, Any]],
     tools: list[dict[str, Any]] | None,
     max_bytes: int = _MAX_REQUEST_BYTES,
+    size_cache: dict[int, tuple[dict[str, Any], int, int]] | None = None,
 ) -> tuple[list[dict[str, Any]], dict[str, int], bool]:
-    """在请求发送前裁剪消息，避免超过服务端请求体大小限制。"""
-    payload = _estimate_request_payload(system_prompt, messages, tools)
+    """在请求发送前裁剪消息，避免超过服务端请求体大小限制。
+
+    size_cache 仅用于未裁剪的原始消息；裁剪阶段会原地修改副本，不走缓存。
+    """
+    payload = _estimate_request_payload(system_prompt, messages, tools, size_cache)
     if payload["payload_bytes"] <= max_bytes:
         return (messages, payload, False)
 
@@ -366,15 +540,17 @@ class LLMService:
         summary_trigger_bytes: int = _DEFAULT_SUMMARY_TRIGGER_BYTES,
         summary_keep_recent_messages: int = _DEFAULT_SUMMARY_KEEP_RECENT_MESSAGES,
         summary_keep_recent_log_entries: int = _DEFAULT_SUMMARY_KEEP_RECENT_LOG_ENTRIES,
+        strip_think_tags: bool | None = None,
     ) -> None:
         client_kwargs: dict[str, Any] = {
             "api_key": api_key,
             "timeout": timeout,
             "max_retries": 0,  # SDK 层不重试，由 _call_with_retry 管理重试和日志
+            "http_client": _get_shared_http_client(base_url, timeout),
         }
         if base_url:
             client_kwargs["base_url"] = base_url
-        self._client = anthropic.Anthropic(**client_kwargs)
+        self._client = _import_anthropic().Anthropic(**client_kwargs)
         self._model = model
         self._max_tokens = max_tokens
         self._temperature = temperature
@@ -387,6 +563,10 @@ class LLMService:
         self._summary_trigger_bytes = summary_trigger_bytes
         self._summary_keep_recent_messages = summary_keep_recent_messages
         self._summary_keep_recent_log_entries = summary_keep_recent_log_entries
+        # Claude 模型不会输出 <think> 标签，默认只对其他（兼容接口）模型过滤
+        if strip_think_tags is None:
+            strip_think_tags = not model.startswith("claude-")
+        self._strip_think = strip_think_tags
 
     @property
     def usage(self) -> TokenUsage:
@@ -423,6 +603,7 @@ class LLMService:
         conversation_log: ConversationLog | None = None,
         label: str = "",
         enable_cache: bool = True,
+        size_cache: dict[int, tuple[dict[str, Any], int, int]] | None = None,
     ) -> LLMResponse:
         """调用 Claude API（支持 DashScope 显式缓存）
 
@@ -433,6 +614,7 @@ class LLMService:
             conversation_log: 可选的对话日志记录器
             label: 调用标签，用于日志标识（如 "Analyst/T0.1"）
             enable_cache: 是否启用显式缓存（仅对 DashScope/阿里百炼有效）
+            size_cache: 消息尺寸缓存（id(msg) → 尺寸），由 call_with_tools_loop 按循环传入
 
         Returns:
             LLMResponse 包含内容、工具调用和 token 统计
@@ -447,6 +629,7 @@ class LLMService:
                 messages,
                 tools,
                 max_bytes=max_bytes,
+                size_cache=size_cache,
             )
             if was_trimmed:
                 logger.warning(
@@ -519,14 +702,18 @@ class LLMService:
             )
             response = self._call_with_retry(label=label, **kwargs)
 
-        # 提取文本内容（过滤 <think> 标签）
+        # 提取文本内容（按模型过滤 <think> 标签）
+        strip_think = getattr(self, "_strip_think", True)
         text_parts: list[str] = []
         tool_calls: list[dict[str, Any]] = []
         for block in response.content:
             if block.type == "text":
-                cleaned = _strip_think_tags(block.text)
-                if cleaned:
-                    text_parts.append(cleaned)
+                text = block.text if isinstance(block.text, str) else str(block.text or "")
+                if strip_think and "<think>" in text:
+                    text = _strip_think_tags(text)
+                text = text.strip()
+                if text:
+                    text_parts.append(text)
             elif block.type == "tool_use":
                 tool_calls.append({
                     "id": block.id,
@@ -596,6 +783,7 @@ class LLMService:
         Raises:
             anthropic.APIError: 不可重试的 API 错误
         """
+        anthropic = _import_anthropic()
         tag = f"[{label}]" if label else "[LLM]"
         attempt = 1
         retry_wait_seconds = 10
@@ -725,6 +913,7 @@ class LLMService:
         tools: list[dict[str, Any]] | None,
         conversation_log: ConversationLog | None = None,
         label: str = "",
+        size_cache: dict[int, tuple[dict[str, Any], int, int]] | None = None,
     ) -> tuple[str, list[dict[str, Any]], bool]:
         """将较早消息滚动摘要到 system prompt，真正缩短后续请求上下文。"""
         summary_trigger_bytes = getattr(self, "_summary_trigger_bytes", _DEFAULT_SUMMARY_TRIGGER_BYTES)
@@ -733,7 +922,7 @@ class LLMService:
             "_summary_keep_recent_messages",
             _DEFAULT_SUMMARY_KEEP_RECENT_MESSAGES,
         )
-        payload = _estimate_request_payload(system_prompt, messages, tools)
+        payload = _estimate_request_payload(system_prompt, messages, tools, size_cache)
         summary_reason = _get_summary_trigger_reason(
             messages,
             payload,
@@ -799,7 +988,7 @@ class LLMService:
         )
         self._sync_summary_to_conversation_log(conversation_log, summary)
 
-        new_payload = _estimate_request_payload(updated_system_prompt, remaining_messages, tools)
+        new_payload = _estimate_request_payload(updated_system_prompt, remaining_messages, tools, size_cache)
         logger.info(
             f"    {tag} 滚动摘要完成 | msgs {len(messages)} -> {len(remaining_messages)} | "
             f"payload≈{new_payload['payload_bytes']}B"
@@ -844,6 +1033,10 @@ class LLMService:
 
         logger.info(f"    {tag} 开始工具循环 (上限 {max_iterations} 轮, 软限制 {soft_limit} 轮)")
 
+        # 本轮循环内的消息尺寸缓存（id(msg) → 尺寸），仅在本次调用内有效，不挂在实例上
+        size_cache: dict[int, tuple[dict[str, Any], int, int]] = {}
+        elide_after = soft_limit // 2
+
         # 初始化对话日志
         if conversation_log is not None:
             conversation_log.add_system(system_prompt)
@@ -858,8 +1051,15 @@ class LLMService:
                 tools=tools,
                 conversation_log=conversation_log,
                 label=label,
+                size_cache=size_cache,
             )
 
+            # 超过 soft_limit // 2 轮后省略较早的冗长工具结果，控制每轮重发的历史体积
+            if iteration >= elide_after:
+                current_messages, elided = _elide_stale_tool_results(current_messages)
+                if elided:
+                    logger.info(f"    {tag} 已省略 {elided} 条较早的工具结果内容")
+
             # 软限制反思检查：达到 soft_limit 时注入反思提示
             if iteration == soft_limit and not reflection_done:
                 reflection_done = True
@@ -882,6 +1082,7 @@ class LLMService:
                     active_system_prompt, current_messages, tools=None,
                     conversation_log=conversation_log,
                     label=f"{label}/反思" if label else "反思",
+                    size_cache=size_cache,
                 )
                 logger.info(f"    {tag} 反思结果: {reflection_response.content[:200]}")
 
@@ -913,6 +1114,7 @@ class LLMService:
                         tools=None,
                         conversation_log=conversation_log,
                         label=label,
+                        size_cache=size_cache,
                     )
 
                     finalization_response = self.call(
@@ -921,6 +1123,7 @@ class LLMService:
                         tools=None,
                         conversation_log=conversation_log,
                         label=f"{label}/收尾" if label else "收尾",
+                        size_cache=size_cache,
                     )
 
                     if finalization_response.content.strip():
@@ -936,6 +1139,7 @@ class LLMService:
                 active_system_prompt, current_messages, tools,
                 conversation_log=conversation_log,
                 label=label,
+                size_cache=size_cache,
             )
             call_elapsed = time.time() - call_start
             logger.info(
@@ -964,15 +1168,15 @@ class LLMService:
                 })
             current_messages.append({"role": "assistant", "content": assistant_content})
 
-            # 执行工具并构建 tool_result 消息
-            tool_results: list[dict[str, Any]] = []
+            # 执行工具并构建 tool_result 消息（只读工具可并行）
             for tc in response.tool_calls:
-                tool_name = tc["name"]
                 tool_input_summary = str(tc["input"])[:120]
-                logger.info(f"    {tag} 🔧 {tool_name}({tool_input_summary})")
-                result = tool_executor.execute(tc["name"], tc["input"])
-                result_str = str(result)
-                logger.debug(f"    {tag} 🔧 {tool_name} -> {result_str[:300]}")
+                logger.info(f"    {tag} 🔧 {tc['name']}({tool_input_summary})")
+            result_strs = _execute_tool_calls(tool_executor, response.tool_calls)
+
+            tool_results: list[dict[str, Any]] = []
+            for tc, result_str in zip(response.tool_calls, result_strs):
+                logger.debug(f"    {tag} 🔧 {tc['name']} -> {result_str[:300]}")
                 tool_results.append({
                     "type": "tool_result",
                     "tool_use_id": tc["id"],
@@ -33,6 +33,7 @@ class ExecutorColorFormatter(logging.Formatter):
         self._use_color = use_color
 
     def format(self, record: logging.LogRecord) -> str:
+        # 对完整输出着色（含 traceback），颜色按整行文本判定，不在共享的 LogRecord 上附加属性
         text = super().format(record)
         if not self._use_color:
             return text
@@ -23,16 +23,20 @@ class PathGuard:
         )
 
     def resolve_path(self, raw_path: str) -> Path:
+        # 每次调用都重新 resolve，不跨调用缓存：路径可能在两次调用之间被改成指向根目录外的符号链接
         candidate = Path(raw_path)
         if not candidate.is_absolute() and self.default_base is not None:
             candidate = self.default_base / candidate
         return candidate.resolve()
 
     def is_allowed(self, path: Path) -> bool:
+        """检查路径是否在允许根目录内。
+
+        path 必须是本次调用刚由 resolve_path 得到的绝对路径，不再重复 resolve。
+        """
         if not self.allowed_roots:
             return True
-        candidate = path.resolve()
-        return any(root == candidate or root in candidate.parents for root in self.allowed_roots)
+        return any(root == path or root in path.parents for root in self.allowed_roots)
 
     def validate_file(self, raw_path: str) -> tuple[str | None, str | None]:
         """验证并规范化文件路径。"""
@@ -4,8 +4,10 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from agent_system.models.task import Task
+if TYPE_CHECKING:
+    from agent_system.models.task import Task
 
 
 class StateStore:
@@ -33,6 +35,8 @@ class StateStore:
         if not self._path.exists():
             return []
 
+        from agent_system.models.task import Task
+
         with open(self._path, "r", encoding="utf-8") as f:
             data = json.load(f)
 
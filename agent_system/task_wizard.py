@@ -3,12 +3,20 @@
 from __future__ import annotations
 
 import json
+import sys
+from collections.abc import Callable
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
+from typing import TextIO
 
 from agent_system.models.project_config import ProjectConfig
 
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时回退到标准库 json
+    orjson = None
+
 
 @dataclass
 class WizardTask:
@@ -35,38 +43,63 @@ class WizardResult:
     project_name: str = ""
 
 
-def _ask_non_empty(prompt: str) -> str:
+_PRIORITY_CHOICES = frozenset({"0", "1", "2", "3"})
+
+# 读取一行输入的函数：传入提示语，返回一行（不含换行符），输入耗尽时抛 EOFError
+_LineReader = Callable[[str], str]
+
+
+def _batched_reader(stream: TextIO) -> _LineReader:
+    """一次性读入 stream 的全部内容，返回逐行消费的读取函数
+
+    用于非交互 stdin（管道 / here-doc），不再逐行 input()；提示语与读到的行照常回显。
+    """
+    lines = iter(stream.read().split("\n"))
+
+    def read_line(prompt: str) -> str:
+        sys.stdout.write(prompt)
+        try:
+            line = next(lines)
+        except StopIteration:
+            raise EOFError from None
+        sys.stdout.write(line + "\n")
+        return line
+
+    return read_line
+
+
+def _ask_non_empty(read_line: _LineReader, prompt: str) -> str:
     """读取非空输入"""
     while True:
-        value = input(prompt).strip()
+        value = read_line(prompt).strip()
         if value:
             return value
         print("输入不能为空，请重试。")
 
 
-def _ask_optional(prompt: str, default: str = "") -> str:
+def _ask_optional(read_line: _LineReader, prompt: str, default: str = "") -> str:
     """读取可选输入"""
-    value = input(prompt).strip()
+    value = read_line(prompt).strip()
     if value:
         return value
     return default
 
 
-def _ask_priority(default: int = 2) -> int:
+def _ask_priority(read_line: _LineReader, default: int = 2) -> int:
     """读取优先级（0~3）"""
     while True:
-        raw = input(f"  优先级(0最高~3最低，默认{default}): ").strip()
+        raw = read_line(f"  优先级(0最高~3最低，默认{default}): ").strip()
         if not raw:
             return default
-        if raw.isdigit() and 0 <= int(raw) <= 3:
+        if raw in _PRIORITY_CHOICES:
             return int(raw)
         print("  输入无效，请输入 0~3 的整数。")
 
 
-def _ask_phase(default: int = 0) -> int:
+def _ask_phase(read_line: _LineReader, default: int = 0) -> int:
     """读取阶段编号"""
     while True:
-        raw = input(f"  阶段 phase（非负整数，默认{default}）: ").strip()
+        raw = read_line(f"  阶段 phase（非负整数，默认{default}）: ").strip()
         if not raw:
             return default
         if raw.isdigit():
@@ -74,7 +107,7 @@ def _ask_phase(default: int = 0) -> int:
         print("  输入无效，请输入非负整数。")
 
 
-def _ask_category(categories: list[str]) -> str:
+def _ask_category(read_line: _LineReader, categories: list[str]) -> str:
     """读取任务分类"""
     if not categories:
         return ""
@@ -83,7 +116,7 @@ def _ask_category(categories: list[str]) -> str:
         print(f"    {idx}) {category}")
 
     while True:
-        raw = input("  分类（输入序号或名称，留空表示无分类）: ").strip()
+        raw = read_line("  分类（输入序号或名称，留空表示无分类）: ").strip()
         if not raw:
             return ""
         if raw.isdigit():
@@ -110,11 +143,11 @@ def _print_project_context(project: ProjectConfig) -> None:
         print(wizard_prompt)
 
 
-def _ask_dependencies(existing_ids: list[str]) -> list[str]:
+def _ask_dependencies(read_line: _LineReader, existing_ids: set[str]) -> list[str]:
     """读取依赖任务 ID 列表"""
     if not existing_ids:
         return []
-    raw = input("  依赖任务ID（逗号分隔，留空表示无依赖）: ").strip()
+    raw = read_line("  依赖任务ID（逗号分隔，留空表示无依赖）: ").strip()
     if not raw:
         return []
     deps = [item.strip() for item in raw.split(",") if item.strip()]
@@ -142,30 +175,31 @@ def _render_preview(result: WizardResult) -> str:
     return "\n".join(lines)
 
 
-def _build_result(project: ProjectConfig | None = None) -> WizardResult:
+def _build_result(read_line: _LineReader, project: ProjectConfig | None = None) -> WizardResult:
     """对话构建任务列表"""
     print("\n[任务助手] 进入任务列表创建向导（输入 q 可随时退出）")
     if project is not None:
         _print_project_context(project)
 
-    goal = _ask_non_empty("1) 这次要达成的目标是: ")
+    goal = _ask_non_empty(read_line, "1) 这次要达成的目标是: ")
     if goal.lower() == "q":
         raise KeyboardInterrupt
 
-    scope_in = _ask_optional("2) 范围（包含）: ", default="按目标默认范围")
+    scope_in = _ask_optional(read_line, "2) 范围（包含）: ", default="按目标默认范围")
     if scope_in.lower() == "q":
         raise KeyboardInterrupt
 
-    scope_out = _ask_optional("3) 范围（不包含）: ", default="无")
+    scope_out = _ask_optional(read_line, "3) 范围（不包含）: ", default="无")
     if scope_out.lower() == "q":
         raise KeyboardInterrupt
 
-    constraints = _ask_optional("4) 约束（技术/时间/风险）: ", default="无")
+    constraints = _ask_optional(read_line, "4) 约束（技术/时间/风险）: ", default="无")
     if constraints.lower() == "q":
         raise KeyboardInterrupt
 
     default_task_count = "5"
     task_count_raw = _ask_optional(
+        read_line,
         f"5) 先创建多少条任务（默认 {default_task_count}）: ",
         default=default_task_count,
     )
@@ -176,20 +210,21 @@ def _build_result(project: ProjectConfig | None = None) -> WizardResult:
         task_count = int(task_count_raw)
 
     tasks: list[WizardTask] = []
+    task_ids: set[str] = set()
     categories = project.task_categories if project is not None else []
     for idx in range(1, task_count + 1):
         task_id = f"T{idx}"
         print(f"\n- 创建任务 {task_id}")
-        title = _ask_non_empty("  标题: ")
+        title = _ask_non_empty(read_line, "  标题: ")
         if title.lower() == "q":
             raise KeyboardInterrupt
-        description = _ask_optional("  描述: ", default=title)
+        description = _ask_optional(read_line, "  描述: ", default=title)
         if description.lower() == "q":
             raise KeyboardInterrupt
-        priority = _ask_priority(default=2)
-        phase = _ask_phase(default=0)
-        category = _ask_category(categories)
-        deps = _ask_dependencies([task.id for task in tasks])
+        priority = _ask_priority(read_line, default=2)
+        phase = _ask_phase(read_line, default=0)
+        category = _ask_category(read_line, categories)
+        deps = _ask_dependencies(read_line, task_ids)
         tasks.append(
             WizardTask(
                 id=task_id,
@@ -201,6 +236,7 @@ def _build_result(project: ProjectConfig | None = None) -> WizardResult:
                 dependencies=deps,
             )
         )
+        task_ids.add(task_id)
 
     return WizardResult(
         goal=goal,
@@ -212,10 +248,11 @@ def _build_result(project: ProjectConfig | None = None) -> WizardResult:
     )
 
 
-def _save_result(result: WizardResult) -> Path:
+def _save_result(read_line: _LineReader, result: WizardResult) -> Path:
     """保存任务列表为 JSON"""
     default_path = Path("state/wizard_tasks.json")
     target = _ask_optional(
+        read_line,
         f"\n保存路径（默认 {default_path.as_posix()}）: ",
         default=default_path.as_posix(),
     )
@@ -231,30 +268,39 @@ def _save_result(result: WizardResult) -> Path:
         "scope_in": result.scope_in,
         "scope_out": result.scope_out,
         "constraints": result.constraints,
-        "tasks": [asdict(task) for task in result.tasks],
+        "tasks": result.tasks,
     }
-    target_path.write_text(
-        json.dumps(payload, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    if orjson is not None:
+        # orjson 原生序列化 dataclass，直接输出 UTF-8 字节，一次写入
+        target_path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+    else:
+        payload["tasks"] = [asdict(task) for task in result.tasks]
+        target_path.write_text(
+            json.dumps(payload, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
     return target_path
 
 
 def run_task_wizard(project_config_file: str = "") -> int:
-    """运行任务列表对话向导"""
+    """运行任务列表对话向导
+
+    stdin 不是终端（如脚本通过管道 / here-doc 输入）时，一次性读取全部输入再逐行消费。
+    """
+    read_line: _LineReader = input if sys.stdin.isatty() else _batched_reader(sys.stdin)
     try:
         project: ProjectConfig | None = None
         if project_config_file.strip():
             project = ProjectConfig.from_file(project_config_file)
-        result = _build_result(project=project)
+        result = _build_result(read_line, project=project)
         print(_render_preview(result))
-        confirm = _ask_optional("\n确认保存任务列表？(Y/n): ", default="y").lower()
+        confirm = _ask_optional(read_line, "\n确认保存任务列表？(Y/n): ", default="y").lower()
         if confirm not in ("y", "yes"):
             print("已取消保存。")
             return 0
-        saved_path = _save_result(result)
+        saved_path = _save_result(read_line, result)
         print(f"已保存任务列表: {saved_path.as_posix()}")
         return 0
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, EOFError):
         print("\n已退出任务列表创建向导。")
         return 0
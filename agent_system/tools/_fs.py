@@ -0,0 +1,35 @@
+"""文件工具共用的磁盘写入辅助函数"""
+
+from __future__ import annotations
+
+import os
+import stat
+import tempfile
+from pathlib import Path
+
+
+def atomic_write(p: Path, content: str | bytes) -> None:
+    """先写同目录临时文件再 os.replace 覆盖，写入中途失败不会留下半截文件
+
+    bytes 原样写入；str 的换行处理与 Path.write_text 相同。
+    保留原文件权限，符号链接写入其指向的文件。
+    """
+    target = os.path.realpath(p)
+    mode = stat.S_IMODE(os.stat(target).st_mode)
+    directory, name = os.path.split(target)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    try:
+        if isinstance(content, bytes):
+            with open(fd, "wb") as f:
+                f.write(content)
+        else:
+            with open(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+        os.chmod(tmp, mode)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
@@ -3,8 +3,342 @@
 from __future__ import annotations
 
 import difflib
+import re
+from collections import Counter
+from collections.abc import Iterator, Sequence
 from pathlib import Path
 
+# Myers 算法的工作量上限（对角线扩展次数 + 对角线上前进的行数）— 超过后回退到 difflib。
+# 纯 Python 的 Myers 只在编辑距离小时占优；大面积改写时 difflib 的 C 层哈希匹配快得多，
+# 按工作量而非编辑距离截断，回退前最多浪费约一个预算的时间
+_MYERS_MAX_WORK = 50_000
+
+# 文本前后缀比较的分块大小
+_PREFIX_CHUNK = 4096
+
+# 除 \n / \r\n 外 str.splitlines 也会视为换行的字符
+_OTHER_LINE_BREAKS_RE = re.compile("\r(?!\n)|[\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+_Opcode = tuple[str, int, int, int, int]
+
+
+def _myers_matching_blocks(
+    a: Sequence[str],
+    b: Sequence[str],
+) -> list[tuple[int, int, int]] | None:
+    """Myers O(ND) 差分，返回与 SequenceMatcher.get_matching_blocks 相同格式的匹配块
+
+    先把每行映射为整数 ID，比较时只做整数相等判断。
+    工作量超过 _MYERS_MAX_WORK 时返回 None，由调用方回退到 difflib。
+
+    Returns:
+        [(i, j, size), ...]，以 (len(a), len(b), 0) 结尾；超限时返回 None
+    """
+    ids: dict[str, int] = {}
+    xa = [ids.setdefault(line, len(ids)) for line in a]
+    xb = [ids.setdefault(line, len(ids)) for line in b]
+    n, m = len(xa), len(xb)
+
+    # 第 d 步至少扩展 d + 1 条对角线，预算内可达的编辑距离不超过该上限
+    max_d = min(n + m, int((2 * _MYERS_MAX_WORK) ** 0.5))
+    # 只在一侧出现（按多重集计）的行必然被删除或插入，是编辑距离的下界；
+    # 下界已超上限时（如整段改写）直接回退，不空跑预算
+    count_a, count_b = Counter(xa), Counter(xb)
+    if (count_a - count_b).total() + (count_b - count_a).total() > max_d:
+        return None
+    work = 0
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    # trace[d] 保存第 d 步开始前 v[-d-1 .. d+1] 的快照
+    trace: list[list[int]] = []
+    found = n == 0 and m == 0
+    for d in range(max_d + 1):
+        if found:
+            break
+        work += d + 1
+        if work > _MYERS_MAX_WORK:
+            return None
+        trace.append(v[offset - d - 1: offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            x0 = x
+            while x < n and y < m and xa[x] == xb[y]:
+                x += 1
+                y += 1
+            work += x - x0
+            v[offset + k] = x
+            if x >= n and y >= m:
+                found = True
+                break
+    if not found:
+        return None
+
+    # 回溯: 收集对角线（相等）段，逆序
+    blocks: list[tuple[int, int, int]] = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        snap = trace[d]
+        base = d + 1
+        k = x - y
+        if k == -d or (k != d and snap[base + k - 1] < snap[base + k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = snap[base + prev_k] if d > 0 else 0
+        prev_y = prev_x - prev_k if d > 0 else 0
+        # d == 0 时起点为 (0, 0)，此前全部为对角线
+        if d > 0:
+            start_x = prev_x if prev_k == k + 1 else prev_x + 1
+        else:
+            start_x = 0
+        size = x - start_x
+        if size > 0:
+            blocks.append((start_x, y - size, size))
+        x, y = prev_x, prev_y
+    blocks.reverse()
+
+    # 合并相邻块
+    merged: list[tuple[int, int, int]] = []
+    for i, j, size in blocks:
+        if merged:
+            pi, pj, psize = merged[-1]
+            if pi + psize == i and pj + psize == j:
+                merged[-1] = (pi, pj, psize + size)
+                continue
+        merged.append((i, j, size))
+    merged.append((n, m, 0))
+    return merged
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    """两个字符串公共前缀的字符数（按块比较，块内再逐字符定位）"""
+    limit = min(len(a), len(b))
+    i = 0
+    while i < limit and a[i:i + _PREFIX_CHUNK] == b[i:i + _PREFIX_CHUNK]:
+        i += _PREFIX_CHUNK
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return min(i, limit)
+
+
+def _common_suffix_len(a: str, b: str, limit: int) -> int:
+    """两个字符串公共后缀的字符数，最多 limit 个字符"""
+    la, lb = len(a), len(b)
+    i = 0
+    while i < limit:
+        step = min(_PREFIX_CHUNK, limit - i)
+        if a[la - i - step:la - i] != b[lb - i - step:lb - i]:
+            break
+        i += step
+    while i < limit and a[la - i - 1] == b[lb - i - 1]:
+        i += 1
+    return i
+
+
+def _split_changed_region(
+    original: str,
+    modified: str,
+    context_lines: int,
+) -> tuple[list[str], list[str], int]:
+    """只对变化区域（含上下文）切分行，避免对整段文本 splitlines
+
+    先按字符定位公共前缀/后缀，对齐到 \n 行边界，再各向外扩展 context_lines 行；
+    公共部分只用 str.count 统计行号偏移，不构造行列表。
+    文本含 \n 以外的换行符（如单独的 \r）时退回整体 splitlines，保持行切分语义一致。
+
+    Returns:
+        (原始文本的行, 修改后文本的行, 首行在完整文本中的行号偏移)
+    """
+    if (_OTHER_LINE_BREAKS_RE.search(original)
+            or _OTHER_LINE_BREAKS_RE.search(modified)):
+        return original.splitlines(keepends=True), modified.splitlines(keepends=True), 0
+
+    la, lb = len(original), len(modified)
+    prefix = _common_prefix_len(original, modified)
+    start = original.rfind("\n", 0, prefix) + 1
+    suffix = _common_suffix_len(original, modified, min(la, lb) - start)
+    # 后缀起点对齐到公共后缀内的下一行行首（该 \n 两侧文本都有）
+    end_a = la
+    if suffix:
+        nl = original.find("\n", la - suffix)
+        if nl >= 0:
+            end_a = nl + 1
+    end_b = end_a + lb - la
+
+    # 向外扩展上下文行
+    for _ in range(context_lines):
+        if start == 0:
+            break
+        start = original.rfind("\n", 0, start - 1) + 1
+    for _ in range(context_lines):
+        if end_a >= la:
+            break
+        nxt = original.find("\n", end_a)
+        end_a = la if nxt < 0 else nxt + 1
+        end_b = end_a + lb - la
+
+    offset = original.count("\n", 0, start)
+    return (
+        original[start:end_a].splitlines(keepends=True),
+        modified[start:end_b].splitlines(keepends=True),
+        offset,
+    )
+
+
+def _matching_blocks(a: Sequence[str], b: Sequence[str]) -> list[tuple[int, int, int]]:
+    """计算匹配块，先剥离公共前缀/后缀，只对中间变化区域做差分
+
+    与 GNU diff 相同的预处理：改动集中在文件首尾时，
+    差分问题规模缩小到真正变化的中间部分。
+    """
+    n, m = len(a), len(b)
+    limit = min(n, m)
+    lo = 0
+    while lo < limit and a[lo] == b[lo]:
+        lo += 1
+    limit -= lo
+    hi = 0
+    while hi < limit and a[n - 1 - hi] == b[m - 1 - hi]:
+        hi += 1
+
+    mid_a = a[lo:n - hi]
+    mid_b = b[lo:m - hi]
+    mid = _myers_matching_blocks(mid_a, mid_b)
+    if mid is None:
+        mid = difflib.SequenceMatcher(None, mid_a, mid_b).get_matching_blocks()
+
+    blocks: list[tuple[int, int, int]] = []
+    if lo:
+        blocks.append((0, 0, lo))
+    blocks.extend((i + lo, j + lo, size) for i, j, size in mid if size)
+    if hi:
+        blocks.append((n - hi, m - hi, hi))
+    blocks.append((n, m, 0))
+    return blocks
+
+
+def _opcodes(blocks: list[tuple[int, int, int]]) -> list[_Opcode]:
+    """由匹配块生成操作码（与 SequenceMatcher.get_opcodes 语义一致）"""
+    i = j = 0
+    codes: list[_Opcode] = []
+    for ai, bj, size in blocks:
+        if i < ai and j < bj:
+            codes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            codes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            codes.append(("insert", i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            codes.append(("equal", ai, i, bj, j))
+    return codes
+
+
+def _grouped_opcodes(codes: list[_Opcode], n: int) -> Iterator[list[_Opcode]]:
+    """按上下文行数把操作码分组为 hunk（与 SequenceMatcher.get_grouped_opcodes 一致）"""
+    if not codes:
+        codes = [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    nn = n + n
+    group: list[_Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > nn:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _format_range(start: int, stop: int) -> str:
+    """unified diff 的行号范围格式"""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def _unified_diff(
+    a: Sequence[str],
+    b: Sequence[str],
+    fromfile: str,
+    tofile: str,
+    n: int,
+    line_offset: int = 0,
+) -> Iterator[str]:
+    """基于 Myers 差分生成 unified diff，格式与 difflib.unified_diff 相同
+
+    文件头、hunk 头与行前缀和 difflib 一致，但不保证逐字节相同：Myers 取最短编辑脚本，
+    存在多种等长对齐时，hunk 的划分与增删行的位置可能和 SequenceMatcher 不同，
+    两者都是能还原出 b 的合法 diff。
+
+    按块产出文本片段（一个操作码的所有行合为一段），调用方用 "".join 拼接。
+
+    difflib 的 SequenceMatcher 最坏情况为平方复杂度，大文件很慢；
+    编辑距离过大时中间区域回退到 SequenceMatcher。
+    line_offset 为 a/b 首行在完整文件中的行号偏移，仅影响 hunk 头。
+    """
+    started = False
+    for group in _grouped_opcodes(_opcodes(_matching_blocks(a, b)), n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}\n"
+            yield f"+++ {tofile}\n"
+        first, last = group[0], group[-1]
+        file1_range = _format_range(first[1] + line_offset, last[2] + line_offset)
+        file2_range = _format_range(first[3] + line_offset, last[4] + line_offset)
+        yield f"@@ -{file1_range} +{file2_range} @@\n"
+        # 同一前缀的连续行一次 join 成块: prefix + prefix.join(run)
+        # 等价于逐行拼接前缀，但不为每行创建临时字符串
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                if i1 < i2:
+                    yield " " + " ".join(a[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                yield "-" + "-".join(a[i1:i2])
+            if tag in ("replace", "insert"):
+                yield "+" + "+".join(b[j1:j2])
+
+
+# 比较文件内容时的分块大小
+_COMPARE_CHUNK = 1 << 20
+
+
+def _same_content(path_a: Path, path_b: Path) -> bool:
+    """判断两个文件字节内容是否完全相同
+
+    同一文件或大小不同时无需读取内容；否则分块比较，遇到第一个不同块即返回。
+    """
+    stat_a = path_a.stat()
+    stat_b = path_b.stat()
+    if (stat_a.st_dev, stat_a.st_ino) == (stat_b.st_dev, stat_b.st_ino):
+        return True
+    if stat_a.st_size != stat_b.st_size:
+        return False
+    with open(path_a, "rb") as fa, open(path_b, "rb") as fb:
+        while True:
+            chunk_a = fa.read(_COMPARE_CHUNK)
+            if chunk_a != fb.read(_COMPARE_CHUNK):
+                return False
+            if not chunk_a:
+                return True
+
 
 def diff_file_tool(
     file_a: str,
@@ -29,18 +363,30 @@ def diff_file_tool(
     if not path_b.exists():
         return f"文件不存在: {file_b}"
 
+    # 字节完全相同的文件直接返回，无需解码和差分
     try:
-        lines_a = path_a.read_text(encoding="utf-8", errors="replace").splitlines(keepends=True)
-        lines_b = path_b.read_text(encoding="utf-8", errors="replace").splitlines(keepends=True)
+        if _same_content(path_a, path_b):
+            return "无差异"
+    except OSError:
+        pass
+
+    try:
+        text_a = path_a.read_text(encoding="utf-8", errors="replace")
+        text_b = path_b.read_text(encoding="utf-8", errors="replace")
     except Exception as e:
         return f"读取失败: {e}"
 
-    diff = difflib.unified_diff(
+    if text_a == text_b:
+        return "无差异"
+    lines_a, lines_b, offset = _split_changed_region(text_a, text_b, context_lines)
+
+    diff = _unified_diff(
         lines_a,
         lines_b,
         fromfile=file_a,
         tofile=file_b,
         n=context_lines,
+        line_offset=offset,
     )
 
     result = "".join(diff)
@@ -64,15 +410,17 @@ def diff_content_tool(
     Returns:
         unified diff 格式字符串
     """
-    lines_a = original.splitlines(keepends=True)
-    lines_b = modified.splitlines(keepends=True)
+    if original == modified:
+        return "无差异"
+    lines_a, lines_b, offset = _split_changed_region(original, modified, context_lines)
 
-    diff = difflib.unified_diff(
+    diff = _unified_diff(
         lines_a,
         lines_b,
         fromfile=f"{label} (original)",
         tofile=f"{label} (modified)",
         n=context_lines,
+        line_offset=offset,
     )
 
     result = "".join(diff)
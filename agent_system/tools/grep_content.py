@@ -3,21 +3,125 @@
 from __future__ import annotations
 
 import fnmatch
+import functools
 import logging
+import mmap
+import os
 import re
 import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
+from typing import AnyStr
 
 from agent_system.tools.list_directory import (
     _IGNORE_DIRS,
     _IGNORE_SUFFIXES,
+    _NO_SKIP_DIRS,
+    _GitignoreRules,
     _find_gitignore,
     _is_gitignored,
+    _scan_sorted,
 )
-from agent_system.tools.search_file import _find_git_root, _search_via_git
+from agent_system.tools.search_file import _compile_glob, _find_git_root, _search_via_git
 
 logger = logging.getLogger(__name__)
 
+# 正则元字符 — 模式中不含这些字符时按纯文本子串匹配
+_REGEX_META_RE = re.compile(r"[.^$*+?()\[\]{}|\\\n]")
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(pattern: AnyStr, flags: int) -> re.Pattern[AnyStr]:
+    """编译用户提供的正则并缓存
+
+    agent 常以相同模式反复调用 grep 工具；re 模块自带的缓存与所有 re.* 调用共享，
+    容易被挤出。
+    """
+    return re.compile(pattern, flags)
+
+
+# 小于该大小的文件直接整体读取 — mmap 的系统调用开销超过收益
+_MMAP_MIN_SIZE = 64 * 1024
+
+
+# 除 \n 外 str.splitlines 也会视为换行的字符（\r 已由通用换行模式转换）
+_RARE_LINE_BREAKS_RE = re.compile("[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+# 整体缓冲区搜索时会看到行外内容的构造：\A / \Z 锚定整个缓冲区而非单行，
+# 前瞻 / 后顾断言能越过行边界看到 \n 与相邻行；含这些构造的模式只能逐行匹配
+_CROSS_LINE_RE = re.compile(r"\\[AZ]|\(\?<?[=!]")
+
+
+# bytes 正则下与 str 语义不一致的构造：. / 否定字符类会匹配多字节字符的单个字节，
+# \w \s \d \b 等在 bytes 下只识别 ASCII；\u \U \N 在 bytes 下是非法转义，
+# \x / 八进制转义在 bytes 下按单个字节匹配（\xe4 会命中 UTF-8 多字节字符的首字节）；
+# 行内 u / a / L 标志改变字符语义或在 bytes 下非法
+_BYTES_UNSAFE_RE = re.compile(
+    r"\.|\\[wWsSdDbBuUNx0]|\\[1-7][0-7]{2}|\[\^|\(\?[a-zA-Z-]*[uaL]"
+)
+
+# 可能在 IGNORECASE 下匹配 i / k / s 的模式（字面字母或字符类区间）；
+# 这三个字母在 str 正则下还会匹配非 ASCII 字符 İ ı / K / ſ，bytes 正则则不会
+_FOLD_SENSITIVE_RE = re.compile(r"[iksIKS]|\[[^\]]*-")
+
+# İ (U+0130) / ı (U+0131) / ſ (U+017F) / K (U+212A) 的 UTF-8 编码
+_FOLD_PARTNERS_BYTES_RE = re.compile(rb"\xc4[\xb0\xb1]|\xc5\xbf|\xe2\x84\xaa")
+
+# bytes 内容中 splitlines 会视为换行、但 \n 切分无法识别的字符（含单独的 \r）
+_RARE_LINE_BREAKS_BYTES_RE = re.compile(rb"\r(?!\n)|[\x0b\x0c\x1c\x1d\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]")
+
+
+def _bytes_regex(pattern: str) -> re.Pattern[bytes] | None:
+    """模式可安全地在原始字节上匹配时返回编译好的 bytes 正则，否则返回 None
+
+    仅限 ASCII 模式且不含 _BYTES_UNSAFE_RE / _CROSS_LINE_RE 中的构造；
+    bytes 下编译失败的模式同样返回 None，交给 str 正则处理（并照常报错）。
+    结果还取决于文件内容，使用前需经 _bytes_content_ok 检查。
+    """
+    if (not pattern.isascii() or _BYTES_UNSAFE_RE.search(pattern)
+            or _CROSS_LINE_RE.search(pattern)):
+        return None
+    try:
+        return _compile(pattern.encode("ascii"), re.IGNORECASE | re.MULTILINE)
+    except re.error:
+        return None
+
+
+def _bytes_content_ok(buf: bytes | mmap.mmap, pattern: str) -> bool:
+    """检查 bytes 正则在该内容上的逐行匹配结果是否与 str 正则一致"""
+    if "$" in pattern and buf.find(b"\r") >= 0:
+        return False
+    if _RARE_LINE_BREAKS_BYTES_RE.search(buf):
+        return False
+    return not (_FOLD_SENSITIVE_RE.search(pattern) and _FOLD_PARTNERS_BYTES_RE.search(buf))
+
+
+# 与 ASCII 字母 i / s / k 在 re.IGNORECASE 下互相匹配的非 ASCII 字符：İ ı ſ K
+_FOLD_PARTNERS_RE = re.compile("[\u0130\u0131\u017f\u212a]")
+
+
+def _literal_needle(pattern: str) -> str | None:
+    """模式为 ASCII 纯文本时返回小写化的查找串，否则返回 None
+
+    纯文本模式改用 ``needle in line.lower()``，由 C 层子串查找完成，
+    比正则引擎逐行回溯快得多。lower() 与 re.IGNORECASE 并不完全等价：
+    非 ASCII 模式的大小写折叠差异较多，不走子串查找；ASCII 模式只在文本含
+    İ ı ſ K 时有分歧，由 _needle_exact 逐段判断。
+    """
+    if _REGEX_META_RE.search(pattern) or not pattern.isascii():
+        return None
+    return pattern.lower()
+
+
+def _needle_exact(needle: str, text: str) -> bool:
+    """判断 ``needle in text.lower()`` 与 IGNORECASE 正则在 text 上的结果是否一致"""
+    return text.isascii() or not (
+        _FOLD_SENSITIVE_RE.search(needle) and _FOLD_PARTNERS_RE.search(text)
+    )
+
 
 def grep_content_tool(
     path: str,
@@ -38,23 +142,301 @@ def grep_content_tool(
     if not p.exists():
         return [{"line": 0, "content": f"文件不存在: {path}"}]
 
+    needle = _literal_needle(pattern)
+    bregex = _bytes_regex(pattern)
+
+    # 大文件 + 可按字节匹配: mmap 映射文件，不复制到 Python 对象，只有被访问的页才会读入
+    if bregex is not None:
+        try:
+            size = p.stat().st_size
+        except OSError:
+            size = 0
+        if size >= _MMAP_MIN_SIZE:
+            try:
+                with open(p, "rb") as fh, \
+                        mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if _bytes_content_ok(mm, pattern):
+                        return _search_buffer(mm, bregex, None, max_matches)
+            except (OSError, ValueError):
+                pass
+
     try:
-        content = p.read_text(encoding="utf-8", errors="replace")
+        raw = p.read_bytes()
     except Exception as e:
         return [{"line": 0, "content": f"读取失败: {e}"}]
 
-    compiled = re.compile(pattern, re.IGNORECASE)
-    matches: list[dict[str, str | int]] = []
+    # 快速路径: 直接在字节上匹配，跳过整个文件的 UTF-8 解码
+    if bregex is not None and _bytes_content_ok(raw, pattern):
+        return _search_buffer(
+            raw,
+            bregex,
+            needle.encode("ascii") if needle is not None else None,
+            max_matches,
+        )
+
+    content = raw.decode("utf-8", errors="replace")
+    if "\r" in content:
+        # 与文本模式读取一致的通用换行转换
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    compiled = _compile(pattern, re.IGNORECASE | re.MULTILINE)
+    return _grep_text(content, compiled, needle, max_matches)
+
+
+def grep_content_multi_tool(
+    path: str,
+    patterns: list[str],
+    max_matches: int = 50,
+) -> list[dict[str, str | int | list[str]]]:
+    """在单个文件中一次搜索多个模式
+
+    不含捕获组的模式合并为一条 ``(?:p1)|(?:p2)|...`` 交替正则，整个文件只扫描一遍；
+    仅对命中的行再逐个模式判断具体匹配了哪些。
+    含捕获组的模式（合并后反向引用编号会错位）不参与合并，改为逐行匹配。
+
+    Args:
+        path: 文件路径
+        patterns: 正则表达式模式列表
+        max_matches: 最大返回匹配行数
+
+    Returns:
+        匹配结果列表 [{"line": 行号, "content": 行内容, "patterns": [命中的模式]}]
+    """
+    p = Path(path)
+    if not p.exists():
+        return [{"line": 0, "content": f"文件不存在: {path}", "patterns": []}]
+    if not patterns:
+        return []
+
+    try:
+        content = p.read_text(encoding="utf-8", errors="replace")
+    except Exception as e:
+        return [{"line": 0, "content": f"读取失败: {e}", "patterns": []}]
 
-    for i, line in enumerate(content.splitlines(), start=1):
-        if compiled.search(line):
-            matches.append({"line": i, "content": line.rstrip()})
-            if len(matches) >= max_matches:
+    compiled = [_compile(pt, re.IGNORECASE | re.MULTILINE) for pt in patterns]
+    fused: re.Pattern[str] | None = None
+    if all(c.groups == 0 for c in compiled):
+        try:
+            fused = _compile(
+                "|".join(f"(?:{pt})" for pt in patterns), re.IGNORECASE | re.MULTILINE,
+            )
+        except re.error:
+            fused = None
+
+    if fused is not None:
+        hits = _grep_text(content, fused, None, max_matches)
+    else:
+        hits = []
+        for i, line in enumerate(content.splitlines(), start=1):
+            if any(c.search(line) for c in compiled):
+                hits.append({"line": i, "content": line.rstrip()})
+                if len(hits) >= max_matches:
+                    break
+
+    results: list[dict[str, str | int | list[str]]] = []
+    for hit in hits:
+        line = str(hit["content"])
+        results.append({
+            **hit,
+            "patterns": [pt for pt, c in zip(patterns, compiled) if c.search(line)],
+        })
+    return results
+
+
+def _grep_text(
+    content: str,
+    compiled: re.Pattern[str],
+    needle: str | None,
+    max_matches: int,
+) -> list[dict[str, str | int]]:
+    """在已读入的文本中搜索匹配行"""
+    if needle is not None and not _needle_exact(needle, content):
+        needle = None
+    # 含 \n 以外的换行符时，整体扫描的行号与 splitlines 不一致；
+    # 模式含 \A / \Z / 前瞻后顾时，整体扫描的匹配结果与逐行不一致 — 均退回逐行匹配
+    if _RARE_LINE_BREAKS_RE.search(content) or _CROSS_LINE_RE.search(compiled.pattern):
+        matches: list[dict[str, str | int]] = []
+        for i, line in enumerate(content.splitlines(), start=1):
+            if (needle in line.lower()) if needle is not None else compiled.search(line):
+                matches.append({"line": i, "content": line.rstrip()})
+                if len(matches) >= max_matches:
+                    break
+        return matches
+
+    return _search_buffer(content, compiled, needle, max_matches)
+
+
+# mmap 统计换行时每次复制的最大区段
+_COUNT_CHUNK = 1 << 20
+
+
+def _count_newlines_mmap(mm: mmap.mmap, start: int, end: int) -> int:
+    """统计 mmap 中 [start, end) 区间的换行数
+
+    mmap 没有 count 方法；分块切片后计数，复制量与内存占用都限制在一个块以内，
+    而不是一次复制两次命中之间的整个区段。
+    """
+    total = 0
+    for chunk_start in range(start, end, _COUNT_CHUNK):
+        total += mm[chunk_start:min(chunk_start + _COUNT_CHUNK, end)].count(b"\n")
+    return total
+
+
+def _search_buffer(
+    content: str | bytes | mmap.mmap,
+    compiled: re.Pattern[str] | re.Pattern[bytes],
+    needle: str | bytes | None,
+    max_matches: int,
+) -> list[dict[str, str | int]]:
+    """在整个文本缓冲区上搜索，不逐行切分
+
+    用一次 C 层 search/find 跳到下一个命中位置，再定位所在行；
+    行号用 count 增量统计。命中后从下一行行首继续，每行最多记录一次。
+    跨行的正则命中会在该行范围内复核，保持逐行匹配的语义。
+    compiled 需带 re.MULTILINE，使 ^ 能在 pos 指定的行首处匹配；
+    含 \\A / \\Z / 前瞻后顾的模式（见 _CROSS_LINE_RE）不能走这里。
+    content 为 bytes / mmap 时只对命中的行做 UTF-8 解码。
+    """
+    matches: list[dict[str, str | int]] = []
+    is_bytes = not isinstance(content, str)
+    is_mmap = isinstance(content, mmap.mmap)
+    nl = b"\n" if is_bytes else "\n"
+    size = len(content)
+    haystack = content
+    if needle is not None:
+        haystack = content.lower()
+        # 极少数字符小写化后长度改变，偏移会错位，改走正则
+        if len(haystack) != size:
+            needle = None
+
+    pos = 0
+    lineno = 1
+    counted = 0
+    while pos < size and len(matches) < max_matches:
+        m = None
+        if needle is not None:
+            hit = haystack.find(needle, pos)
+            if hit < 0:
+                break
+        else:
+            m = compiled.search(content, pos)
+            if m is None:
                 break
+            hit = m.start()
+
+        line_start = max(pos, content.rfind(nl, pos, hit) + 1)
+        if line_start >= size:
+            break
+        line_end = content.find(nl, line_start)
+        if line_end < 0:
+            line_end = size
+        pos = line_end + 1
+
+        if m is not None and m.end() > line_end and not compiled.search(content, line_start, line_end):
+            continue
+
+        if is_mmap:
+            lineno += _count_newlines_mmap(content, counted, line_start)
+        else:
+            lineno += content.count(nl, counted, line_start)
+        counted = line_start
+        line = content[line_start:line_end]
+        if is_bytes:
+            line = line.decode("utf-8", errors="replace")
+        matches.append({"line": lineno, "content": line.rstrip()})
 
     return matches
 
 
+# 流式读取缓冲区大小
+_STREAM_BUFFER_SIZE = 1 << 20
+
+
+def _iter_lines(fh: Iterable[str]) -> Iterator[str]:
+    """按 str.splitlines 的规则逐行产出文本（不含行尾换行符）
+
+    文本模式迭代只在 \n 处切分；含 \x0c、\x85、\u2028 等其它换行符的行再用
+    splitlines 细分，使行号与 grep_content_tool 一致。
+    """
+    for raw in fh:
+        if _RARE_LINE_BREAKS_RE.search(raw):
+            yield from raw.splitlines()
+        elif raw.endswith("\n"):
+            yield raw[:-1]
+        else:
+            yield raw
+
+
+def _grep_file_stream(
+    fpath: str,
+    compiled: re.Pattern[str],
+    max_matches: int,
+    needle: str | None = None,
+) -> list[dict[str, str | int]]:
+    """逐行流式搜索单个文件
+
+    不整体读入文件内容，单文件达到 max_matches 时在文件中途即停止读取。
+    needle 非 None 时走纯文本子串匹配，跳过正则引擎（含 İ ı ſ K 的行仍用正则）。
+
+    Returns:
+        该文件的匹配结果列表
+    """
+    found: list[dict[str, str | int]] = []
+    try:
+        with open(fpath, "r", encoding="utf-8", errors="replace",
+                  buffering=_STREAM_BUFFER_SIZE) as fh:
+            for i, line in enumerate(_iter_lines(fh), start=1):
+                if needle is not None and _needle_exact(needle, line):
+                    hit = needle in line.lower()
+                else:
+                    hit = compiled.search(line) is not None
+                if hit:
+                    found.append({
+                        "file": fpath,
+                        "line": i,
+                        "content": line.rstrip(),
+                    })
+                    if len(found) >= max_matches:
+                        break
+    except Exception:
+        pass
+    return found
+
+
+# 并行扫描的线程数与每批提交的文件数
+_GREP_WORKERS = os.cpu_count() or 4
+_GREP_BATCH_SIZE = 64
+
+
+def _grep_files(
+    paths: Iterable[str],
+    compiled: re.Pattern[str],
+    matches: list[dict[str, str | int]],
+    max_matches: int,
+    needle: str | None = None,
+) -> None:
+    """用线程池并行扫描多个文件，按输入顺序把结果追加到 matches
+
+    文件读取期间释放 GIL，多线程可重叠磁盘 I/O 与匹配计算。
+    按批提交，达到 max_matches 后不再提交新批次并取消未开始的任务。
+    """
+    with ThreadPoolExecutor(max_workers=_GREP_WORKERS) as pool:
+        it = iter(paths)
+        while len(matches) < max_matches:
+            batch = list(islice(it, _GREP_BATCH_SIZE))
+            if not batch:
+                break
+            scan = functools.partial(
+                _grep_file_stream, compiled=compiled,
+                max_matches=max_matches - len(matches), needle=needle,
+            )
+            for per_file in pool.map(scan, batch):
+                matches.extend(per_file)
+                if len(matches) >= max_matches:
+                    del matches[max_matches:]
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    break
+
+
 def grep_dir_tool(
     base_dir: str,
     pattern: str,
@@ -65,6 +447,7 @@ def grep_dir_tool(
     """在目录下所有匹配文件中搜索内容
 
     优先使用 git ls-files 获取文件列表（快速），回退到文件系统遍历。
+    文件内容由线程池并行扫描，结果顺序与文件顺序一致。
 
     Args:
         base_dir: 搜索根目录
@@ -81,31 +464,17 @@ def grep_dir_tool(
     if not base.is_dir():
         return [{"file": "", "line": 0, "content": f"目录不存在: {base_dir}"}]
 
-    compiled = re.compile(pattern, re.IGNORECASE)
+    compiled = _compile(pattern, re.IGNORECASE)
+    needle = _literal_needle(pattern)
     matches: list[dict[str, str | int]] = []
 
-    # 快速路径: 用 git ls-files 获取文件列表，然后逐文件 grep
+    # 快速路径: 用 git ls-files 获取文件列表，然后并行 grep
     if respect_gitignore:
         git_root = _find_git_root(base)
         if git_root is not None:
-            file_list = _search_via_git(base, git_root, file_pattern, None, 10000)
+            file_list = _search_via_git(base, git_root, _compile_glob(file_pattern), None, 10000)
             if file_list is not None:
-                for fpath in file_list:
-                    if len(matches) >= max_matches:
-                        break
-                    try:
-                        content = Path(fpath).read_text(encoding="utf-8", errors="replace")
-                    except Exception:
-                        continue
-                    for i, line in enumerate(content.splitlines(), start=1):
-                        if compiled.search(line):
-                            matches.append({
-                                "file": fpath,
-                                "line": i,
-                                "content": line.rstrip(),
-                            })
-                            if len(matches) >= max_matches:
-                                break
+                _grep_files(file_list, compiled, matches, max_matches, needle)
                 elapsed = time.time() - start
                 logger.info(f"    [grep] 完成: {len(matches)} 个匹配 ({elapsed:.1f}s)")
                 return matches
@@ -113,17 +482,17 @@ def grep_dir_tool(
     # 回退路径: 文件系统遍历
     logger.info(f"    [grep] 文件系统遍历 base={base_dir} file_pattern={file_pattern}")
     if respect_gitignore:
-        skip_dirs = set(_IGNORE_DIRS)
+        skip_dirs = _IGNORE_DIRS
         gitignore_patterns = _find_gitignore(base)
     else:
-        skip_dirs = set()
-        gitignore_patterns = []
+        skip_dirs = _NO_SKIP_DIRS
+        gitignore_patterns = None
 
-    _grep_walk(
-        base, base, compiled, file_pattern,
-        skip_dirs, gitignore_patterns,
-        matches, max_matches, respect_gitignore,
+    candidates = _grep_walk(
+        base, file_pattern,
+        skip_dirs, gitignore_patterns, respect_gitignore,
     )
+    _grep_files(candidates, compiled, matches, max_matches, needle)
 
     elapsed = time.time() - start
     logger.info(f"    [grep] 完成: {len(matches)} 个匹配 ({elapsed:.1f}s)")
@@ -131,68 +500,54 @@ def grep_dir_tool(
 
 
 def _grep_walk(
-    directory: Path,
     root: Path,
-    compiled: re.Pattern[str],
     file_pattern: str,
-    skip_dirs: set[str],
-    gitignore_patterns: list[re.Pattern[str]],
-    matches: list[dict[str, str | int]],
-    max_matches: int,
+    skip_dirs: frozenset[str],
+    gitignore_patterns: _GitignoreRules | None,
     respect_gitignore: bool,
-) -> None:
-    """递归搜索目录中的文件内容"""
-    if len(matches) >= max_matches:
-        return
-
-    try:
-        entries = sorted(directory.iterdir(), key=lambda e: (not e.is_dir(), e.name.lower()))
-    except (PermissionError, OSError):
-        return
+) -> Iterator[str]:
+    """遍历目录，按顺序惰性产出待搜索的文件路径
 
-    for entry in entries:
-        if len(matches) >= max_matches:
-            return
-
-        if entry.name.startswith("."):
+    用显式栈 + os.scandir 实现：忽略目录在下探之前即被剪枝，
+    DirEntry 自带类型信息，无需对每个条目额外 stat。
+    产出顺序与递归版一致：同级先目录后文件，按名称不区分大小写排序。
+    """
+    stack: list[tuple[Iterator[tuple[os.DirEntry[str], bool]], str]] = []
+
+    def _push(path: str, rel_prefix: str) -> None:
+        # 无法 stat 的单个条目（如自指的符号链接）由 _scan_sorted 跳过，不影响同目录其他文件
+        entries = _scan_sorted(path)
+        if entries is not None:
+            stack.append((iter(entries), rel_prefix))
+
+    _push(str(root), "")
+    while stack:
+        entries, rel_prefix = stack[-1]
+        item = next(entries, None)
+        if item is None:
+            stack.pop()
             continue
 
-        try:
-            rel = entry.relative_to(root).as_posix()
-        except ValueError:
-            rel = entry.name
+        entry, is_dir = item
+        name = entry.name
+        if name.startswith("."):
+            continue
+        rel = rel_prefix + name
 
-        if entry.is_dir():
-            if entry.name in skip_dirs:
+        if is_dir:
+            if name in skip_dirs:
                 continue
-            if gitignore_patterns and _is_gitignored(entry.name, rel, gitignore_patterns):
+            if gitignore_patterns and _is_gitignored(name, rel, gitignore_patterns):
                 continue
-            _grep_walk(
-                entry, root, compiled, file_pattern,
-                skip_dirs, gitignore_patterns,
-                matches, max_matches, respect_gitignore,
-            )
+            _push(entry.path, rel + "/")
         elif entry.is_file():
-            if respect_gitignore and entry.suffix in _IGNORE_SUFFIXES:
+            if respect_gitignore and os.path.splitext(name)[1] in _IGNORE_SUFFIXES:
                 continue
-            if gitignore_patterns and _is_gitignored(entry.name, rel, gitignore_patterns):
+            if gitignore_patterns and _is_gitignored(name, rel, gitignore_patterns):
                 continue
-            if not fnmatch.fnmatch(entry.name, file_pattern):
-                continue
-            try:
-                content = entry.read_text(encoding="utf-8", errors="replace")
-            except Exception:
+            if not fnmatch.fnmatch(name, file_pattern):
                 continue
-
-            for i, line in enumerate(content.splitlines(), start=1):
-                if compiled.search(line):
-                    matches.append({
-                        "file": str(entry),
-                        "line": i,
-                        "content": line.rstrip(),
-                    })
-                    if len(matches) >= max_matches:
-                        return
+            yield entry.path
 
 
 # LLM tool_use 工具定义
@@ -228,3 +583,33 @@ GREP_CONTENT_TOOL_DEFINITION = {
         "required": ["path", "pattern"],
     },
 }
+
+
+GREP_CONTENT_MULTI_TOOL_DEFINITION = {
+    "name": "grep_content_multi",
+    "description": (
+        "在单个文件中一次搜索多个正则表达式，整个文件只扫描一遍，"
+        "返回命中行的行号、内容以及该行命中的模式列表。"
+        "需要在同一文件里查找多个符号时，比多次调用 grep_content 更高效。"
+    ),
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "path": {
+                "type": "string",
+                "description": "要搜索的文件路径",
+            },
+            "patterns": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "正则表达式搜索模式列表（大小写不敏感）",
+            },
+            "max_matches": {
+                "type": "integer",
+                "description": "最大返回匹配行数，默认 50",
+                "default": 50,
+            },
+        },
+        "required": ["path", "patterns"],
+    },
+}
@@ -2,26 +2,105 @@
 
 from __future__ import annotations
 
+import fnmatch
+import functools
+import io
+import os
 import re
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable
 
 # 默认忽略的目录名
-_IGNORE_DIRS = {
+_IGNORE_DIRS: frozenset[str] = frozenset({
     "node_modules", ".git", "__pycache__", ".pytest_cache",
     "dist", "build", "library", "temp", ".vscode", ".idea",
     "profiles", "remote",
-}
+})
+
+# respect_gitignore=False 时使用的空集合（模块级常量，不必每次调用新建）
+_NO_SKIP_DIRS: frozenset[str] = frozenset()
 
 # 默认忽略的文件后缀
-_IGNORE_SUFFIXES = {".meta", ".pyc", ".pyo"}
+_IGNORE_SUFFIXES: frozenset[str] = frozenset({".meta", ".pyc", ".pyo"})
+
+# 每份 .gitignore 规则缓存的名称匹配结果数
+_NAME_MATCH_CACHE_SIZE = 8192
+
+
+@dataclass(frozen=True, slots=True)
+class _GitignoreRules:
+    """融合后的 .gitignore 规则
+
+    所有模式合并为两条交替正则，每个条目只需一次 C 层匹配，
+    不再在 Python 层逐条循环。
+
+    Attributes:
+        name_re: 不含 / 且带通配符的模式，匹配任意层级的文件/目录名
+        path_re: 含 / 的模式，匹配完整相对路径
+        match_name: 按名称缓存的 name_re.fullmatch；结果只取决于名称，
+            同名条目（__init__.py、index.ts 等）跨目录、跨次搜索只匹配一次
+        name_literals: 不含 / 也不含通配符的模式（node_modules、coverage 等），
+            集合查找即可判断，不进入 name_re
+    """
+
+    name_re: re.Pattern[str] | None
+    path_re: re.Pattern[str] | None
+    match_name: Callable[[str], re.Match[str] | None] | None = None
+    name_literals: frozenset[str] = frozenset()
+
+
+def _fuse_patterns(regexes: list[str]) -> re.Pattern[str] | None:
+    """将多条正则合并为一条 ``(?:p1)|(?:p2)|...`` 交替正则"""
+    if not regexes:
+        return None
+    return re.compile("|".join(f"(?:{r})" for r in regexes))
+
+
+# 不含 / 且不含这些字符的模式只能按字面匹配名称
+_GLOB_META_RE = re.compile(r"[/*?\[\\]")
+
+# fnmatch.translate 输出的外层包装: (?s:...)\Z
+_FNMATCH_WRAPPER_RE = re.compile(r"\(\?s:(.*)\)\\[Zz]", re.DOTALL)
+
+
+def _translate_piece(piece: str) -> str:
+    """用 fnmatch.translate 转换不含 * 的 glob 片段，去掉外层包装
+
+    ? 改为不跨越 / 的 [^/]；含 [] 字符类的片段整体交给 fnmatch。
+    """
+    if not piece:
+        return ""
+    if "?" in piece and "[" not in piece:
+        return "[^/]".join(_translate_piece(p) for p in piece.split("?"))
+    m = _FNMATCH_WRAPPER_RE.fullmatch(fnmatch.translate(piece))
+    return m.group(1) if m else re.escape(piece)
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """将 gitignore glob 转为正则（不含锚点）
+
+    - ``**`` → ``.*`` 匹配任意路径段（紧随其后的 / 一并吸收）
+    - ``*``  → ``[^/]*`` 匹配非斜杠字符
+    - ``?``  → ``[^/]`` 匹配单个非斜杠字符
+    - ``[...]`` 字符类及转义由 fnmatch.translate 处理
+    """
+    parts: list[str] = []
+    for i, segment in enumerate(pattern.split("**")):
+        if i:
+            parts.append(".*")
+            if segment.startswith("/"):
+                segment = segment[1:]
+        parts.append("[^/]*".join(_translate_piece(p) for p in segment.split("*")))
+    return "".join(parts)
 
 
-def _parse_gitignore(gitignore_path: Path) -> list[re.Pattern[str]]:
-    """解析 .gitignore 文件为正则表达式列表
+def _parse_gitignore(gitignore_path: Path) -> _GitignoreRules | None:
+    """解析 .gitignore 文件为融合后的匹配规则
 
     支持的语法:
     - 普通目录/文件名: build/  *.log
-    - 通配符: *.js  temp*
+    - 通配符: *.js  temp*  file?.txt  [abc].log
     - 前缀斜杠: /dist (仅匹配根目录下)
     - 否定模式: !important.log (不处理, 跳过)
     - 注释和空行: # comment
@@ -30,16 +109,18 @@ def _parse_gitignore(gitignore_path: Path) -> list[re.Pattern[str]]:
         gitignore_path: .gitignore 文件路径
 
     Returns:
-        编译后的正则表达式列表
+        融合后的规则, 无有效模式时返回 None
     """
     if not gitignore_path.is_file():
-        return []
+        return None
 
-    patterns: list[re.Pattern[str]] = []
+    name_regexes: list[str] = []
+    path_regexes: list[str] = []
+    name_literals: set[str] = set()
     try:
         lines = gitignore_path.read_text(encoding="utf-8", errors="ignore").splitlines()
     except OSError:
-        return []
+        return None
 
     for line in lines:
         line = line.strip()
@@ -51,45 +132,39 @@ def _parse_gitignore(gitignore_path: Path) -> list[re.Pattern[str]]:
         pattern = line.rstrip("/").lstrip("/")
         if not pattern:
             continue
+        # .gitignore 里大多是纯名称，按字面比较即可
+        if _GLOB_META_RE.search(pattern) is None:
+            name_literals.add(pattern)
+            continue
 
-        # 将 gitignore glob 转为正则:
-        # ** → 匹配任意路径段
-        # *  → 匹配非斜杠字符
-        # ?  → 匹配单个非斜杠字符
-        # .  → 转义
-        regex = ""
-        i = 0
-        while i < len(pattern):
-            c = pattern[i]
-            if c == "*":
-                if i + 1 < len(pattern) and pattern[i + 1] == "*":
-                    regex += ".*"
-                    i += 2
-                    if i < len(pattern) and pattern[i] == "/":
-                        i += 1  # 跳过 **/  后面的 /
-                    continue
-                else:
-                    regex += "[^/]*"
-            elif c == "?":
-                regex += "[^/]"
-            elif c == ".":
-                regex += r"\."
-            else:
-                regex += re.escape(c)
-            i += 1
-
+        regex = _glob_to_regex(pattern)
         try:
-            patterns.append(re.compile(regex))
+            re.compile(regex)
         except re.error:
             continue
+        # 含 / 的模式锚定到相对路径，其余只匹配名称
+        (path_regexes if "/" in pattern else name_regexes).append(regex)
+
+    if not name_regexes and not path_regexes and not name_literals:
+        return None
+    name_re = _fuse_patterns(name_regexes)
+    match_name = functools.lru_cache(maxsize=_NAME_MATCH_CACHE_SIZE)(name_re.fullmatch) if name_re else None
+    return _GitignoreRules(name_re, _fuse_patterns(path_regexes), match_name, frozenset(name_literals))
 
-    return patterns
+
+@functools.lru_cache(maxsize=64)
+def _parse_gitignore_cached(path_str: str, mtime_ns: int) -> _GitignoreRules | None:
+    """按 (路径, mtime) 缓存 .gitignore 解析结果
+
+    mtime_ns 仅作为缓存键 — 文件被修改后键变化，自动重新解析。
+    """
+    return _parse_gitignore(Path(path_str))
 
 
 def _is_gitignored(
     entry_name: str,
     rel_path: str,
-    gitignore_patterns: list[re.Pattern[str]],
+    gitignore_patterns: _GitignoreRules,
 ) -> bool:
     """检查路径是否被 gitignore 规则匹配
 
@@ -100,32 +175,64 @@ def _is_gitignored(
     Args:
         entry_name: 文件/目录名
         rel_path: 相对于项目根目录的路径 (使用 / 分隔)
-        gitignore_patterns: 编译后的 gitignore 正则列表
+        gitignore_patterns: 融合后的 gitignore 规则
 
     Returns:
         True 表示应被忽略
     """
-    for pat in gitignore_patterns:
-        # 完整匹配文件名或完整相对路径
-        if pat.fullmatch(entry_name) or pat.fullmatch(rel_path):
-            return True
-    return False
+    if entry_name in gitignore_patterns.name_literals:
+        return True
+    match_name = gitignore_patterns.match_name
+    if match_name is not None and match_name(entry_name):
+        return True
+    path_re = gitignore_patterns.path_re
+    return path_re is not None and path_re.fullmatch(rel_path) is not None
 
 
-def _find_gitignore(start_dir: Path) -> list[re.Pattern[str]]:
-    """从目标目录向上查找最近的 .gitignore 并解析
+@functools.lru_cache(maxsize=256)
+def _resolve_dir(abs_path: str) -> str:
+    """按绝对路径缓存 resolve() 结果
 
-    Args:
-        start_dir: 起始目录
+    resolve() 要逐级 lstat/readlink；同一目录反复搜索时只解析一次。
+    """
+    return str(Path(abs_path).resolve())
 
-    Returns:
-        编译后的 gitignore 正则列表
+
+def _cache_found(maxsize: int) -> Callable[[Callable[[str], str | None]], Callable[[str], str | None]]:
+    """按参数缓存向上查找的结果，但只缓存找到的（非 None）结果
+
+    未找到时每次重新查找: agent 可能在任务中途创建 .gitignore 或执行 git init，
+    缓存"不存在"会让之后的搜索一直看不到它们。被装饰的函数同 lru_cache 一样提供 cache_clear()。
     """
-    current = start_dir.resolve()
+    def decorator(func: Callable[[str], str | None]) -> Callable[[str], str | None]:
+        found: dict[str, str] = {}
+
+        @functools.wraps(func)
+        def wrapper(key: str) -> str | None:
+            hit = found.get(key)
+            if hit is None:
+                hit = func(key)
+                if hit is not None:
+                    if len(found) >= maxsize:
+                        # 超出上限时丢弃最早加入的一条
+                        found.pop(next(iter(found), key), None)
+                    found[key] = hit
+            return hit
+
+        wrapper.cache_clear = found.clear  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+@_cache_found(maxsize=64)
+def _locate_gitignore(start_dir: str) -> str | None:
+    """从已 resolve 的目录向上查找最近的 .gitignore，返回其路径（找到时按起始目录缓存）"""
+    current = Path(start_dir)
     for _ in range(20):  # 最多向上查找 20 级
         gitignore = current / ".gitignore"
         if gitignore.is_file():
-            return _parse_gitignore(gitignore)
+            return str(gitignore)
         # 如果找到 .git 目录说明是项目根，停止
         if (current / ".git").is_dir():
             break
@@ -133,7 +240,37 @@ def _find_gitignore(start_dir: Path) -> list[re.Pattern[str]]:
         if parent == current:
             break
         current = parent
-    return []
+    return None
+
+
+def _find_gitignore(start_dir: Path) -> _GitignoreRules | None:
+    """从目标目录向上查找最近的 .gitignore 并解析
+
+    找到的位置按起始目录缓存，每次调用只 stat 一次命中的 .gitignore 取 mtime；
+    缓存的文件已被删除时重新查找，未找到时不缓存（之后新建的 .gitignore 立即生效）。
+
+    Args:
+        start_dir: 起始目录
+
+    Returns:
+        融合后的 gitignore 规则, 未找到或无有效模式时返回 None
+    """
+    key = _resolve_dir(os.path.abspath(start_dir))
+    path_str = _locate_gitignore(key)
+    if path_str is None:
+        return None
+    try:
+        mtime_ns = os.stat(path_str).st_mtime_ns
+    except OSError:
+        _locate_gitignore.cache_clear()  # type: ignore[attr-defined]
+        path_str = _locate_gitignore(key)
+        if path_str is None:
+            return None
+        try:
+            mtime_ns = os.stat(path_str).st_mtime_ns
+        except OSError:
+            return None
+    return _parse_gitignore_cached(path_str, mtime_ns)
 
 
 # 默认最大条目数 — 防止巨型目录产生超长输出
@@ -169,91 +306,146 @@ def list_directory_tool(
     if not root.is_dir():
         return f"目录不存在: {path}"
 
-    skip_dirs = set(_IGNORE_DIRS) if respect_gitignore else set()
+    # 常量 frozenset 直接复用，仅在有额外忽略目录时才构造新集合
+    skip_dirs = _IGNORE_DIRS if respect_gitignore else _NO_SKIP_DIRS
     if ignore_dirs:
-        skip_dirs.update(ignore_dirs)
+        skip_dirs = skip_dirs | frozenset(ignore_dirs)
 
     # 解析 .gitignore
-    gitignore_patterns = _find_gitignore(root) if respect_gitignore else []
+    gitignore_patterns = _find_gitignore(root) if respect_gitignore else None
+
+    buf = io.StringIO()
+    buf.write(root.name)
+    buf.write("/\n")
+    count = _walk(root, buf, max_depth=max_depth,
+                  include_files=include_files, skip_dirs=skip_dirs,
+                  gitignore_patterns=gitignore_patterns,
+                  max_entries=max_entries)
+
+    if count >= max_entries:
+        buf.write(f"\n... 已达到 {max_entries} 条上限，结果已截断。"
+                  f"可减小 max_depth 或设置 include_files=false 缩小范围。\n")
+
+    # 去掉末尾换行
+    return buf.getvalue()[:-1]
+
+
+def _dirs_first_key(item: tuple[os.DirEntry[str], bool]) -> tuple[bool, str]:
+    """排序键: 目录在前，同类按名称不区分大小写"""
+    return not item[1], item[0].name.lower()
 
-    lines: list[str] = [f"{root.name}/"]
-    counter = [0]  # 用列表包装以便在递归中共享可变状态
-    _walk(root, root, lines, depth=1, max_depth=max_depth,
-          include_files=include_files, skip_dirs=skip_dirs,
-          gitignore_patterns=gitignore_patterns,
-          counter=counter, max_entries=max_entries)
 
-    if counter[0] >= max_entries:
-        lines.append(f"\n... 已达到 {max_entries} 条上限，结果已截断。"
-                     f"可减小 max_depth 或设置 include_files=false 缩小范围。")
+def _scan_sorted(directory: str | Path) -> list[tuple[os.DirEntry[str], bool]] | None:
+    """读取目录，返回按目录在前、名称排序的 (条目, 是否目录)；目录无法读取时返回 None
 
-    return "\n".join(lines)
+    每个条目只调用一次 is_dir()。无法 stat 的条目（如自指的符号链接，ELOOP）
+    既不算目录也不算文件，单独跳过，不影响同目录下的其他条目。
+    """
+    try:
+        with os.scandir(directory) as it:
+            scanned = list(it)
+    except OSError:
+        return None
+    entries: list[tuple[os.DirEntry[str], bool]] = []
+    for entry in scanned:
+        try:
+            entries.append((entry, entry.is_dir()))
+        except OSError:
+            continue
+    entries.sort(key=_dirs_first_key)
+    return entries
+
+
+def _scan_children(
+    directory: str | Path,
+    rel_prefix: str,
+    depth: int,
+    include_files: bool,
+    skip_dirs: frozenset[str],
+    gitignore_patterns: _GitignoreRules | None,
+) -> list[tuple[str, str, str, int, bool]]:
+    """扫描单个目录，返回过滤后的子条目 (名称, 路径, 相对路径, 深度, 是否目录)
+
+    使用 os.scandir 遍历 — DirEntry 缓存了目录项类型，
+    is_dir()/is_file() 通常无需额外的 stat 系统调用。
+    排序规则：目录在前，同类按名称不区分大小写排序。
+    """
+    entries = _scan_sorted(directory)
+    if entries is None:
+        return []
+
+    children: list[tuple[str, str, str, int, bool]] = []
+    for entry, is_dir in entries:
+        name = entry.name
+        if name.startswith(".") and name not in (".gitkeep",):
+            continue
+
+        # 相对路径用于 gitignore 匹配
+        rel = rel_prefix + name
+
+        if is_dir:
+            if name in skip_dirs:
+                continue
+        elif not include_files or os.path.splitext(name)[1] in _IGNORE_SUFFIXES:
+            continue
+        if gitignore_patterns and _is_gitignored(name, rel, gitignore_patterns):
+            continue
+        children.append((name, entry.path, rel, depth, is_dir))
+    return children
 
 
 def _walk(
-    directory: Path,
     root: Path,
-    lines: list[str],
-    depth: int,
+    buf: io.StringIO,
     max_depth: int,
     include_files: bool,
-    skip_dirs: set[str],
-    gitignore_patterns: list[re.Pattern[str]],
-    counter: list[int],
+    skip_dirs: frozenset[str],
+    gitignore_patterns: _GitignoreRules | None,
     max_entries: int,
-) -> None:
-    """递归构建目录树
+) -> int:
+    """用显式栈构建目录树（深度优先、先序输出）
+
+    弹出一个条目即输出一行；若为目录且未达最大深度，扫描其子条目逆序压栈，
+    保证输出顺序与递归版一致。没有逐目录的 Python 调用栈开销，也不受递归深度限制。
 
     Args:
-        directory: 当前遍历的目录
-        root: 项目根目录 (用于计算相对路径)
-        lines: 输出行列表
-        depth: 当前深度
+        root: 项目根目录
+        buf: 输出缓冲区，每个条目写入一行（以换行结尾）
         max_depth: 最大递归深度
         include_files: 是否包含文件
         skip_dirs: 硬编码忽略的目录名集合
-        gitignore_patterns: .gitignore 编译后的正则列表
-        counter: 单元素列表，用于跨递归追踪已输出条目数
+        gitignore_patterns: .gitignore 融合后的规则 (None 表示不过滤)
         max_entries: 最大条目数上限
-    """
-    if depth > max_depth or counter[0] >= max_entries:
-        return
 
-    indent = "  " * depth
-    try:
-        entries = sorted(directory.iterdir(), key=lambda e: (not e.is_dir(), e.name.lower()))
-    except (PermissionError, OSError):
-        return
-
-    for entry in entries:
-        if counter[0] >= max_entries:
-            return
-
-        if entry.name.startswith(".") and entry.name not in (".gitkeep",):
+    Returns:
+        已输出的条目数
+    """
+    if max_depth < 1:
+        return 0
+
+    indents = ["  " * d for d in range(max_depth + 1)]
+    write = buf.write
+    stack = _scan_children(root, "", 1, include_files, skip_dirs, gitignore_patterns)
+    stack.reverse()
+    count = 0
+    while stack and count < max_entries:
+        name, entry_path, rel, depth, is_dir = stack.pop()
+        write(indents[depth])
+        write(name)
+        count += 1
+        if not is_dir:
+            write("\n")
             continue
 
-        # 计算相对路径用于 gitignore 匹配
-        try:
-            rel = entry.relative_to(root).as_posix()
-        except ValueError:
-            rel = entry.name
-
-        if entry.is_dir():
-            if entry.name in skip_dirs:
-                continue
-            if gitignore_patterns and _is_gitignored(entry.name, rel, gitignore_patterns):
-                continue
-            lines.append(f"{indent}{entry.name}/")
-            counter[0] += 1
-            _walk(entry, root, lines, depth + 1, max_depth, include_files,
-                  skip_dirs, gitignore_patterns, counter, max_entries)
-        elif include_files:
-            if entry.suffix in _IGNORE_SUFFIXES:
-                continue
-            if gitignore_patterns and _is_gitignored(entry.name, rel, gitignore_patterns):
-                continue
-            lines.append(f"{indent}{entry.name}")
-            counter[0] += 1
+        write("/\n")
+        if depth < max_depth and count < max_entries:
+            children = _scan_children(
+                entry_path, rel + "/", depth + 1,
+                include_files, skip_dirs, gitignore_patterns,
+            )
+            children.reverse()
+            stack.extend(children)
+    return count
 
 
 # LLM tool_use 工具定义
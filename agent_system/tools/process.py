@@ -7,31 +7,200 @@
 
 from __future__ import annotations
 
+import codecs
+import collections
+import io
 import logging
+import math
 import os
+import queue
+import selectors
+import shlex
+import shutil
 import signal
 import subprocess
 import sys
 import threading
 import time
 import uuid
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
+# 管道单次读取上限
+_READ_CHUNK = 65536
+# 交互式进程单个输出缓冲区的字符上限（超出后丢弃较早的输出）
+_MAX_BUFFERED_CHARS = 8 * 1024 * 1024
+# run_process 单个输出流保留的字节上限（超出后丢弃较早的输出）
+_MAX_CAPTURED_BYTES = 8 * 1024 * 1024
+# 输出因超出上限被丢弃过时，加在返回文本开头的提示
+_TRUNCATED_MARKER = "[输出过多，较早的部分已丢弃]\n"
+# Windows 上 select 不支持管道，只能退回每个流一个阻塞读线程
+_USE_SELECTORS = sys.platform != "win32"
+
+# run_process 的读管道线程（Windows 回退，POSIX 上走 selector 不会用到）：
+# 每个流独占一个线程直到 EOF，读完后线程挂回空闲栈供下一次调用复用，
+# 空闲超过 _READER_IDLE_SECS 秒自行退出。线程数随并发进程数增长、不设上限，
+# 长时间运行的进程不会让后启动进程的读任务排队而导致其管道写满阻塞
+_READER_IDLE_SECS = 60.0
+_idle_readers: list[queue.SimpleQueue] = []
+_idle_readers_lock = threading.Lock()
+
+
+def _reader_worker(tasks: queue.SimpleQueue) -> None:
+    """复用的读管道线程：逐个执行派给自己的任务，空闲超时后退出"""
+    while True:
+        try:
+            task = tasks.get(timeout=_READER_IDLE_SECS)
+        except queue.Empty:
+            with _idle_readers_lock:
+                try:
+                    _idle_readers.remove(tasks)
+                except ValueError:
+                    continue  # 刚被 _start_reader 取走，任务马上就到
+            return
+        try:
+            task()
+        except Exception:
+            logger.debug("读管道任务异常退出", exc_info=True)
+        with _idle_readers_lock:
+            _idle_readers.append(tasks)
+
+
+def _start_reader(task: Callable[[], None]) -> None:
+    """把 task 交给一个空闲读线程执行，没有空闲线程时新建一个（daemon）"""
+    with _idle_readers_lock:
+        tasks = _idle_readers.pop() if _idle_readers else None
+    if tasks is None:
+        tasks = queue.SimpleQueue()
+        threading.Thread(
+            target=_reader_worker, args=(tasks,), name="proc-reader", daemon=True,
+        ).start()
+    tasks.put(task)
+
+
+# 子进程放进独立的进程组/会话，终止时整组处理，不会波及调用方自身所在的进程组
+if sys.platform == "win32":
+    _PROCESS_GROUP_KWARGS: dict[str, int | bool] = {
+        "creationflags": subprocess.CREATE_NEW_PROCESS_GROUP,
+    }
+else:
+    _PROCESS_GROUP_KWARGS = {"start_new_session": True}
+
+
+# 出现这些字符说明命令依赖 shell 语法（管道、重定向、变量、通配、子命令、注释等）
+_SHELL_SYNTAX_CHARS = frozenset("|&;<>()$`*?[]{}~#!\n")
+
+
+def _needs_shell(cmd: str) -> bool:
+    """命令是否在引号之外用到 shell 语法
+
+    单引号内全部按字面处理；双引号内的 $ ` \\ 仍由 shell 解释，视为需要 shell。
+    引号内含括号、管道符等字符的命令（如 ``python -c "print(1)"``）因此可以直接启动。
+    """
+    if not _SHELL_SYNTAX_CHARS.intersection(cmd):
+        return False
+    quote = ""
+    escaped = False
+    for ch in cmd:
+        if escaped:
+            if ch == "\n":  # 反斜杠续行
+                return True
+            escaped = False
+        elif quote == "'":
+            if ch == "'":
+                quote = ""
+        elif quote == '"':
+            if ch == '"':
+                quote = ""
+            elif ch in "$`\\":
+                return True
+        elif ch == "\\":
+            escaped = True
+        elif ch in "'\"":
+            quote = ch
+        elif ch in _SHELL_SYNTAX_CHARS:
+            return True
+    return False
+
+
+def _prepare_command(cmd: str | Sequence[str], shell: bool | None) -> tuple[str | list[str], bool]:
+    """决定命令是否需要经过 shell 启动
+
+    不需要 shell 语法的字符串命令直接拆成 argv 启动，省掉一个 /bin/sh 进程。
+
+    Args:
+        cmd: 命令字符串或 argv 列表
+        shell: True 强制经过 shell；False 强制不经过；None 自动判断
 
-def kill_process_tree(proc: subprocess.Popen) -> None:
-    """杀掉进程及其所有子进程（Windows 兼容）"""
+    Returns:
+        (传给 Popen 的命令, 是否 shell=True)
+    """
+    if not isinstance(cmd, str):
+        argv = list(cmd)
+        return (shlex.join(argv), True) if shell else (argv, False)
+    if shell or (shell is None and sys.platform == "win32"):
+        # Windows 上 .cmd/.bat（npm、npx 等）和 cmd 内置命令离不开 cmd.exe
+        return cmd, True
+    if shell is None and _needs_shell(cmd):
+        return cmd, True
     try:
-        if sys.platform == "win32":
-            subprocess.run(
-                f"taskkill /F /T /PID {proc.pid}",
-                shell=True,
-                capture_output=True,
-                timeout=10,
-            )
-        else:
-            os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
+        argv = shlex.split(cmd)
+    except ValueError:
+        # 引号不配对等情况交给 shell 报错
+        return cmd, True
+    if shell is None and (
+        not argv
+        or "=" in argv[0]  # FOO=1 cmd 形式的环境变量赋值
+        or ("/" not in argv[0] and shutil.which(argv[0]) is None)  # shell 内置命令或不存在的命令
+    ):
+        return cmd, True
+    return argv, False
+
+
+# taskkill 直接以 argv 启动，不再为每次终止额外拉起 cmd.exe
+_TASKKILL_CMD = ("taskkill", "/F", "/T", "/PID")
+
+
+def _kill_win(proc: subprocess.Popen) -> None:
+    """杀掉进程及其所有子进程（Windows）
+
+    进程已退出时直接返回，不再启动 taskkill；否则先向进程组发
+    CTRL_BREAK_EVENT，2 秒内未退出再用 taskkill /T 兜底。
+    """
+    if proc.poll() is not None:
+        return
+    try:
+        try:
+            proc.send_signal(signal.CTRL_BREAK_EVENT)
+            proc.wait(timeout=2)
+            return
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        subprocess.run(
+            [*_TASKKILL_CMD, str(proc.pid)],
+            capture_output=True,
+            timeout=10,
+        )
+    except Exception:
+        try:
+            proc.kill()
+        except Exception:
+            pass
+
+
+def _kill_posix(proc: subprocess.Popen) -> None:
+    """杀掉进程及其所有子进程（POSIX）
+
+    子进程是会话首进程（pgid == pid），直接 killpg 整组，
+    即使 shell 已退出也能清理残留的后台子进程。
+    """
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        # 进程组已全部退出
+        pass
     except Exception:
         try:
             proc.kill()
@@ -39,6 +208,10 @@ def kill_process_tree(proc: subprocess.Popen) -> None:
             pass
 
 
+# 平台分派在导入时完成一次
+kill_process_tree = _kill_win if sys.platform == "win32" else _kill_posix
+
+
 @dataclass
 class ProcessResult:
     """进程执行结果"""
@@ -50,13 +223,14 @@ class ProcessResult:
 
 
 def run_process(
-    cmd: str,
+    cmd: str | Sequence[str],
     cwd: str | None = None,
     timeout: int = 0,
     heartbeat_interval: int = 15,
     stream_output: bool = True,
     log_prefix: str = "[cmd] ",
     stdin_input: str | None = None,
+    shell: bool | None = None,
 ) -> ProcessResult:
     """执行子进程，带实时输出流和心跳日志
 
@@ -65,36 +239,40 @@ def run_process(
     - timeout > 0 时超时自动杀掉整个进程树（Windows 安全）
     - timeout = 0 时无超时限制，进程运行到自然结束
     - stdin_input 不为 None 时，将内容写入进程 stdin 后关闭
+    - 不含 shell 语法的命令直接启动，不经过 shell
 
     Args:
-        cmd: 命令字符串
+        cmd: 命令字符串或 argv 列表
         cwd: 工作目录
         timeout: 超时秒数（0 = 无限制）
         heartbeat_interval: 心跳日志间隔秒数（0 禁用）
         stream_output: 是否实时流式输出命令的 stdout/stderr
         log_prefix: 日志前缀
         stdin_input: 要写入进程 stdin 的文本（可选）
+        shell: True 强制经过 shell，False 强制不经过，None 自动判断
 
     Returns:
         ProcessResult 包含 stdout/stderr/returncode/elapsed/timed_out
     """
+    popen_cmd, use_shell = _prepare_command(cmd, shell)
+    if not isinstance(cmd, str):
+        cmd = shlex.join(cmd)
     logger.info(f"    {log_prefix}执行: {cmd}")
-    start_time = time.time()
+    start_time = time.monotonic()
 
     try:
         proc = subprocess.Popen(
-            cmd,
-            shell=True,
+            popen_cmd,
+            shell=use_shell,
             cwd=cwd,
             stdin=subprocess.PIPE if stdin_input is not None else subprocess.DEVNULL,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
+            bufsize=_READ_CHUNK,
+            **_PROCESS_GROUP_KWARGS,
         )
     except Exception as e:
-        elapsed = time.time() - start_time
+        elapsed = time.monotonic() - start_time
         logger.error(f"    {log_prefix}启动失败: {e}")
         return ProcessResult(
             stdout="",
@@ -103,118 +281,264 @@ def run_process(
             elapsed=elapsed,
         )
 
-    stdout_lines: list[str] = []
-    stderr_lines: list[str] = []
-
-    def _read_stream(
-        stream: object,
-        lines: list[str],
-        is_stderr: bool = False,
-    ) -> None:
-        """逐行读取流并记录日志（只显示最后若干行）"""
-        max_display_lines = 20  # 控制台最多显示最后 20 行
-        line_count = 0
-        suppressed = 0
-        for line in stream:  # type: ignore[union-attr]
-            lines.append(line)
-            line_count += 1
-            if stream_output:
-                stripped = line.rstrip()
-                if stripped:
-                    if line_count <= 5:
-                        # 前 5 行总是显示
-                        tag = f"{log_prefix}[stderr] " if is_stderr else log_prefix
-                        logger.info(f"    {tag}{stripped}")
-                    else:
-                        suppressed += 1
-        # 流结束后，如果有被抑制的行，显示最后几行摘要
-        if stream_output and suppressed > 0:
-            tail_count = min(max_display_lines, suppressed)
-            # 从 lines 中取最后 tail_count 行（跳过前5已显示的）
-            tail_start = max(5, len(lines) - tail_count)
-            tag_prefix = f"{log_prefix}[stderr] " if is_stderr else log_prefix
-            if suppressed > tail_count:
-                logger.info(f"    {tag_prefix}... ({suppressed - tail_count} 行已省略)")
-            for tail_line in lines[tail_start:]:
-                stripped = tail_line.rstrip()
-                if stripped:
-                    logger.info(f"    {tag_prefix}{stripped}")
+    stdout_log = _StreamLog(False, stream_output, log_prefix)
+    stderr_log = _StreamLog(True, stream_output, log_prefix)
 
     # 如果有 stdin_input，先写入再关闭
     if stdin_input is not None and proc.stdin:
         try:
-            proc.stdin.write(stdin_input)
+            proc.stdin.write(_encode_input(stdin_input))
             proc.stdin.close()
         except Exception:
             pass
 
-    t_out = threading.Thread(
-        target=_read_stream, args=(proc.stdout, stdout_lines, False),
-        daemon=True,
-    )
-    t_err = threading.Thread(
-        target=_read_stream, args=(proc.stderr, stderr_lines, True),
-        daemon=True,
-    )
-    t_out.start()
-    t_err.start()
+    if _USE_SELECTORS:
+        drain: _SelectorDrain | _ThreadDrain = _SelectorDrain(proc, stdout_log, stderr_log)
+    else:
+        drain = _ThreadDrain(proc, stdout_log, stderr_log)
 
-    # 等待完成，期间输出心跳；timeout > 0 时有超时保护
+    # 等待完成，期间按固定节拍输出心跳；timeout > 0 时有超时保护
+    # 截止时间和心跳时刻都基于单调时钟预先算好，不受系统时间调整影响
     hb = heartbeat_interval if heartbeat_interval > 0 else 30
-    while True:
-        if timeout > 0:
-            remaining = timeout - (time.time() - start_time)
-            if remaining <= 0:
-                wait_time = 0.1
-            else:
-                wait_time = min(hb, remaining)
-        else:
-            wait_time = hb
-
-        t_out.join(timeout=max(wait_time, 0.1))
-        elapsed = time.time() - start_time
-
-        if not t_out.is_alive():
-            # stdout 读完 → 进程已结束
-            break
-
-        if timeout > 0 and elapsed >= timeout:
-            logger.warning(
-                f"    {log_prefix}超时 ({timeout}s)，正在终止进程树..."
-            )
-            kill_process_tree(proc)
-            t_out.join(timeout=5)
-            t_err.join(timeout=5)
-            return ProcessResult(
-                stdout="".join(stdout_lines),
-                stderr=f"命令超时 ({timeout}s): {cmd}",
-                returncode=-1,
-                elapsed=elapsed,
-                timed_out=True,
-            )
-
-        # 心跳
-        logger.info(
-            f"    {log_prefix}仍在执行... (已运行 {int(elapsed)}s)"
-        )
+    deadline = start_time + timeout if timeout > 0 else math.inf
+    next_hb = start_time + hb
+    try:
+        while True:
+            wait_time = min(next_hb, deadline) - time.monotonic()
+            if drain.wait_stdout(max(wait_time, 0.1)):
+                # stdout 读完 → 进程已结束
+                break
+
+            now = time.monotonic()
+            elapsed = now - start_time
+            if now >= deadline:
+                logger.warning(
+                    f"    {log_prefix}超时 ({timeout}s)，正在终止进程树..."
+                )
+                kill_process_tree(proc)
+                drain.wait_all(5)
+                return ProcessResult(
+                    stdout=stdout_log.text(),
+                    stderr=f"命令超时 ({timeout}s): {cmd}",
+                    returncode=-1,
+                    elapsed=elapsed,
+                    timed_out=True,
+                )
+
+            if now >= next_hb:
+                # 心跳
+                logger.info(
+                    f"    {log_prefix}仍在执行... (已运行 {int(elapsed)}s)"
+                )
+                next_hb += hb
 
-    # 等待 stderr 线程也结束
-    t_err.join(timeout=10)
+        # 等待 stderr 也读完
+        drain.wait_all(10)
+    finally:
+        drain.close()
     proc.wait()
-    elapsed = time.time() - start_time
+    elapsed = time.monotonic() - start_time
 
     logger.info(
         f"    {log_prefix}完成 (耗时 {elapsed:.1f}s, exit={proc.returncode})"
     )
 
     return ProcessResult(
-        stdout="".join(stdout_lines),
-        stderr="".join(stderr_lines),
+        stdout=stdout_log.text(),
+        stderr=stderr_log.text(),
         returncode=proc.returncode,
         elapsed=elapsed,
     )
 
 
+def _new_decoder() -> io.IncrementalNewlineDecoder:
+    """utf-8 增量解码器，换行处理与文本模式管道一致（\\r\\n、\\r → \\n）"""
+    return io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder("utf-8")(errors="replace"),
+        translate=True,
+    )
+
+
+def _log_lines(tag: str, lines: list[str]) -> None:
+    """把一批输出行合并成一条多行日志（跳过空白行），减少日志 handler 加锁次数"""
+    batch = [f"    {tag}{stripped}" for line in lines if (stripped := line.rstrip())]
+    if batch:
+        logger.info("\n".join(batch))
+
+
+def _encode_input(text: str) -> bytes:
+    """按文本模式管道的规则编码 stdin 内容（\\n → os.linesep）"""
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    return text.encode("utf-8", errors="replace")
+
+
+class _StreamLog:
+    """run_process 单个输出流的收集与日志（只显示前 5 行和最后若干行）
+
+    原始字节直接累积进 bytearray，结束时一次性解码；只有前 5 行需要边读边解码。
+    累积超过 _MAX_CAPTURED_BYTES 时只保留最近的一半。
+    """
+
+    head_lines = 5          # 前 5 行总是显示
+    max_display_lines = 20  # 控制台最多显示最后 20 行
+
+    def __init__(self, is_stderr: bool, stream_output: bool, log_prefix: str) -> None:
+        self.data = bytearray()
+        self._stream_output = stream_output
+        self._tag = f"{log_prefix}[stderr] " if is_stderr else log_prefix
+        self._head_seen = 0
+        self._decoder: io.IncrementalNewlineDecoder | None = (
+            _new_decoder() if stream_output else None
+        )
+        self._partial = ""
+        self.truncated = False
+        self._text: str | None = None
+
+    def feed(self, data: bytes, final: bool = False) -> None:
+        """喂入一段原始字节；final=True 表示流已结束，输出尾部摘要"""
+        self._text = None
+        self.data += data
+        if len(self.data) > _MAX_CAPTURED_BYTES:
+            self._trim()
+        if self._decoder is not None:
+            self._log_head(data, final)
+        if final:
+            self.finish()
+
+    def _log_head(self, data: bytes, final: bool) -> None:
+        """实时输出前 5 行，凑满后不再解码"""
+        text = self._partial + self._decoder.decode(data, final)  # type: ignore[union-attr]
+        complete = text.split("\n")
+        self._partial = complete.pop()
+        if final and self._partial:
+            complete.append(self._partial)
+        complete = complete[:self.head_lines - self._head_seen]
+        self._head_seen += len(complete)
+        if self._head_seen >= self.head_lines:
+            self._decoder = None
+            self._partial = ""
+        _log_lines(self._tag, complete)
+
+    def _trim(self) -> None:
+        """丢弃较早的输出，只保留最近一半；切点后移到 UTF-8 字符边界"""
+        cut = len(self.data) - _MAX_CAPTURED_BYTES // 2
+        while cut < len(self.data) and self.data[cut] & 0xC0 == 0x80:
+            cut += 1
+        del self.data[:cut]
+        self.truncated = True
+
+    def text(self) -> str:
+        """解码后的完整输出（丢弃过较早部分时带提示前缀）
+
+        不含 \r 时无需换行转换，整体 decode 比增量换行解码器快一个数量级；
+        结果缓存到下次 feed，finish() 的尾部摘要与返回值共用一次解码。
+        """
+        if self._text is None:
+            data = self.data
+            if b"\r" in data:
+                text = _new_decoder().decode(data, final=True)
+            else:
+                text = data.decode("utf-8", errors="replace")
+            self._text = _TRUNCATED_MARKER + text if self.truncated else text
+        return self._text
+
+    def finish(self) -> None:
+        """流结束后，如果有未显示的行，显示最后几行摘要"""
+        if not self._stream_output or self._decoder is not None:
+            # 不输出日志，或总行数不超过 5 行（已全部显示）
+            return
+        text = self.text()
+        total = text.count("\n") + (0 if text.endswith("\n") else 1)
+        hidden = total - self.head_lines
+        if hidden <= 0:
+            return
+        tail_count = min(self.max_display_lines, hidden)
+        body = text[:-1] if text.endswith("\n") else text
+        tail = body.rsplit("\n", tail_count)[-tail_count:]
+        if hidden > tail_count:
+            tail.insert(0, f"... ({hidden - tail_count} 行已省略)")
+        _log_lines(self._tag, tail)
+
+
+class _SelectorDrain:
+    """在调用线程里用 selector 同时读 stdout/stderr（POSIX）
+
+    两个管道设为非阻塞，就绪时一次 os.read 最多 64 KiB，不再为每个进程起读线程。
+    """
+
+    def __init__(self, proc: subprocess.Popen, stdout_log: _StreamLog, stderr_log: _StreamLog) -> None:
+        self._sel = selectors.DefaultSelector()
+        self._stdout_fd = proc.stdout.fileno()  # type: ignore[union-attr]
+        for stream, log in ((proc.stdout, stdout_log), (proc.stderr, stderr_log)):
+            fd = stream.fileno()  # type: ignore[union-attr]
+            os.set_blocking(fd, False)
+            self._sel.register(fd, selectors.EVENT_READ, log)
+
+    def _pump(self, timeout: float, until_stdout: bool) -> bool:
+        """读取就绪数据直到目标流关闭或 timeout 秒用完，返回目标流是否已关闭"""
+        deadline = time.monotonic() + timeout
+        fds = self._sel.get_map()
+        while fds and not (until_stdout and self._stdout_fd not in fds):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            for key, _ in self._sel.select(remaining):
+                try:
+                    data = os.read(key.fd, _READ_CHUNK)
+                except BlockingIOError:
+                    continue
+                if data:
+                    key.data.feed(data)
+                else:
+                    self._sel.unregister(key.fd)
+                    key.data.feed(b"", final=True)
+        return True
+
+    def wait_stdout(self, timeout: float) -> bool:
+        return self._pump(timeout, until_stdout=True)
+
+    def wait_all(self, timeout: float) -> bool:
+        return self._pump(timeout, until_stdout=False)
+
+    def close(self) -> None:
+        self._sel.close()
+
+
+class _ThreadDrain:
+    """每个流一个阻塞读线程，线程从空闲栈复用（Windows 回退）"""
+
+    def __init__(self, proc: subprocess.Popen, stdout_log: _StreamLog, stderr_log: _StreamLog) -> None:
+        # 流读到 EOF 时置位，等待方直接阻塞在事件上
+        self._stdout_done = threading.Event()
+        self._stderr_done = threading.Event()
+        _start_reader(lambda: self._read_stream(proc.stdout, stdout_log, self._stdout_done))
+        _start_reader(lambda: self._read_stream(proc.stderr, stderr_log, self._stderr_done))
+
+    @staticmethod
+    def _read_stream(stream: object, log: _StreamLog, done: threading.Event) -> None:
+        """按块读取流直到 EOF"""
+        try:
+            fd = stream.fileno()  # type: ignore[union-attr]
+            while data := os.read(fd, _READ_CHUNK):
+                log.feed(data)
+            log.feed(b"", final=True)
+        finally:
+            done.set()
+
+    def wait_stdout(self, timeout: float) -> bool:
+        return self._stdout_done.wait(timeout)
+
+    def wait_all(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        if not self._stdout_done.wait(timeout):
+            return False
+        return self._stderr_done.wait(max(deadline - time.monotonic(), 0))
+
+    def close(self) -> None:
+        pass
+
+
 # ---------------------------------------------------------------------------
 # 交互式进程 — 保持进程存活，支持 LLM 多轮读写
 # ---------------------------------------------------------------------------
@@ -228,6 +552,7 @@ class InteractiveOutput:
     running: bool          # 进程是否仍在运行
     returncode: int | None  # 进程退出码（仍在运行时为 None）
     elapsed: float
+    truncated: bool = False  # 缓冲超过上限，较早的输出已被丢弃
 
 
 class InteractiveProcess:
@@ -243,41 +568,143 @@ class InteractiveProcess:
     def __init__(self, proc: subprocess.Popen, process_id: str) -> None:
         self.proc = proc
         self.process_id = process_id
-        self._start_time = time.time()
-        self._stdout_buf: list[str] = []
-        self._stderr_buf: list[str] = []
+        self._start_time = time.monotonic()
+        # 输出直接写进连续缓冲区，read_output 时整体取出，不再积累大量小字符串
+        self._stdout_buf = io.StringIO()
+        self._stderr_buf = io.StringIO()
+        self._truncated = False
         self._lock = threading.Lock()
-        self._last_output_time = time.time()
+        self._last_output_time = time.monotonic()
         self._finished = threading.Event()
 
-        # 后台线程持续读 stdout/stderr
-        self._t_out = threading.Thread(
-            target=self._read_stream, args=(proc.stdout, self._stdout_buf, False),
-            daemon=True,
-        )
-        self._t_err = threading.Thread(
-            target=self._read_stream, args=(proc.stderr, self._stderr_buf, True),
-            daemon=True,
-        )
-        self._t_out.start()
-        self._t_err.start()
+        # POSIX: stdin 非阻塞写，管道写满时剩余字节排队，由后台线程在可写时续写；
+        # 自管道用于唤醒阻塞在 select 上的后台线程
+        self._pending_stdin: collections.deque[bytes] = collections.deque()
+        self._wake_w: int | None = None
+        if _USE_SELECTORS and proc.stdin:
+            os.set_blocking(proc.stdin.fileno(), False)
+            self._wake_r, self._wake_w = os.pipe()
+
+        # 后台线程持续读 stdout/stderr：POSIX 上一个线程用 selector 同时读两个流
+        if _USE_SELECTORS:
+            self._threads = [threading.Thread(target=self._drain, daemon=True)]
+        else:
+            self._threads = [
+                threading.Thread(
+                    target=self._read_stream, args=(proc.stdout, self._stdout_buf, False),
+                    daemon=True,
+                ),
+                threading.Thread(
+                    target=self._read_stream, args=(proc.stderr, self._stderr_buf, True),
+                    daemon=True,
+                ),
+            ]
+        for t in self._threads:
+            t.start()
+
+    def _append(self, text: str, buf: io.StringIO, is_stderr: bool) -> None:
+        """追加一段输出到缓冲区并记录日志"""
+        with self._lock:
+            buf.write(text)
+            if buf.tell() > _MAX_BUFFERED_CHARS:
+                # 长时间没人调用 read_output 时只保留最近的一半，防止内存无限增长
+                tail = buf.getvalue()[-(_MAX_BUFFERED_CHARS // 2):]
+                buf.seek(0)
+                buf.truncate()
+                buf.write(tail)
+                self._truncated = True
+            self._last_output_time = time.monotonic()
+        _log_lines("[interactive] [stderr] " if is_stderr else "[interactive] ", text.splitlines())
+
+    def _drain(self) -> None:
+        """用一个 selector 读取 stdout/stderr（并续写排队的 stdin），直到两个输出流都关闭"""
+        sel = selectors.DefaultSelector()
+        try:
+            for stream, buf, is_stderr in (
+                (self.proc.stdout, self._stdout_buf, False),
+                (self.proc.stderr, self._stderr_buf, True),
+            ):
+                fd = stream.fileno()  # type: ignore[union-attr]
+                os.set_blocking(fd, False)
+                sel.register(fd, selectors.EVENT_READ, (buf, is_stderr, _new_decoder()))
+            open_streams = 2
+            if self._wake_w is not None:
+                sel.register(self._wake_r, selectors.EVENT_READ, None)
+            while open_streams:
+                for key, _ in sel.select():
+                    if key.data is None:
+                        # send_input 有排队数据：关注 stdin 可写
+                        os.read(key.fd, 4096)
+                        if self.proc.stdin.fileno() not in sel.get_map():  # type: ignore[union-attr]
+                            sel.register(self.proc.stdin.fileno(), selectors.EVENT_WRITE, "stdin")  # type: ignore[union-attr]
+                        continue
+                    if key.data == "stdin":
+                        if self._flush_pending_stdin():
+                            sel.unregister(key.fd)
+                        continue
+                    buf, is_stderr, decoder = key.data
+                    try:
+                        data = os.read(key.fd, _READ_CHUNK)
+                    except BlockingIOError:
+                        continue
+                    except OSError:
+                        data = b""
+                    text = decoder.decode(data, final=not data)
+                    if text:
+                        self._append(text, buf, is_stderr)
+                    if not data:
+                        sel.unregister(key.fd)
+                        open_streams -= 1
+                        if not is_stderr:
+                            # stdout 结束 → 进程已退出
+                            self._finished.set()
+        except Exception:
+            pass
+        finally:
+            sel.close()
+            with self._lock:
+                if self._wake_w is not None:
+                    os.close(self._wake_w)
+                    os.close(self._wake_r)
+                    self._wake_w = None
+                self._pending_stdin.clear()
+            self._finished.set()
+
+    def _flush_pending_stdin(self) -> bool:
+        """尽量写出排队的 stdin 数据，返回队列是否已清空（POSIX）"""
+        fd = self.proc.stdin.fileno()  # type: ignore[union-attr]
+        with self._lock:
+            pending = self._pending_stdin
+            while pending:
+                try:
+                    n = os.write(fd, pending[0])
+                except BlockingIOError:
+                    return False
+                except OSError as e:
+                    logger.warning(f"    [interactive] 写入 stdin 失败: {e}")
+                    pending.clear()
+                    break
+                if n < len(pending[0]):
+                    pending[0] = pending[0][n:]
+                else:
+                    pending.popleft()
+            return True
 
     def _read_stream(
         self,
         stream: object,
-        buf: list[str],
+        buf: io.StringIO,
         is_stderr: bool,
     ) -> None:
-        """逐行读取流，追加到缓冲区"""
+        """按块读取流，追加到缓冲区（Windows 回退）"""
+        decoder = _new_decoder()
         try:
-            for line in stream:  # type: ignore[union-attr]
-                with self._lock:
-                    buf.append(line)
-                    self._last_output_time = time.time()
-                tag = "[stderr] " if is_stderr else ""
-                stripped = line.rstrip()  # type: ignore[union-attr]
-                if stripped:
-                    logger.info(f"    [interactive] {tag}{stripped}")
+            fd = stream.fileno()  # type: ignore[union-attr]
+            while data := os.read(fd, _READ_CHUNK):
+                if text := decoder.decode(data):
+                    self._append(text, buf, is_stderr)
+            if text := decoder.decode(b"", final=True):
+                self._append(text, buf, is_stderr)
         except Exception:
             pass
         finally:
@@ -294,17 +721,20 @@ class InteractiveProcess:
         Returns:
             InteractiveOutput 包含当前缓冲输出和进程状态
         """
-        # 等待进程结束或空闲超时
+        # 等待进程结束或空闲超时：每次只睡到“按最近一次输出算的空闲截止时间”
         while True:
-            if self._finished.wait(timeout=1.0):
+            with self._lock:
+                idle_secs = time.monotonic() - self._last_output_time
+
+            if self._finished.wait(timeout=max(idle_timeout - idle_secs, 0)):
                 # 进程已结束，稍等确保所有输出都读完
-                self._t_out.join(timeout=2)
-                self._t_err.join(timeout=2)
+                for t in self._threads:
+                    t.join(timeout=2)
                 self.proc.wait()
                 break
 
             with self._lock:
-                idle_secs = time.time() - self._last_output_time
+                idle_secs = time.monotonic() - self._last_output_time
 
             if idle_secs >= idle_timeout:
                 logger.info(
@@ -314,10 +744,9 @@ class InteractiveProcess:
 
         # 取出缓冲区内容并清空
         with self._lock:
-            stdout = "".join(self._stdout_buf)
-            stderr = "".join(self._stderr_buf)
-            self._stdout_buf.clear()
-            self._stderr_buf.clear()
+            stdout = _take(self._stdout_buf)
+            stderr = _take(self._stderr_buf)
+            truncated, self._truncated = self._truncated, False
 
         running = self.proc.poll() is None
         returncode = self.proc.returncode
@@ -328,7 +757,8 @@ class InteractiveProcess:
             process_id=self.process_id,
             running=running,
             returncode=returncode,
-            elapsed=time.time() - self._start_time,
+            elapsed=time.monotonic() - self._start_time,
+            truncated=truncated,
         )
 
     def send_input(self, text: str) -> bool:
@@ -345,12 +775,24 @@ class InteractiveProcess:
             return False
 
         try:
+            if self.proc.stdin and self._wake_w is not None:
+                # 非阻塞写；写不完的部分排队，唤醒后台线程在 stdin 可写时续写
+                with self._lock:
+                    self._pending_stdin.append(_encode_input(text))
+                if not self._flush_pending_stdin():
+                    with self._lock:
+                        if self._wake_w is not None:
+                            os.write(self._wake_w, b"\0")
+                logger.info(f"    [interactive] 写入 stdin: {text.rstrip()}")
+                with self._lock:
+                    self._last_output_time = time.monotonic()
+                return True
             if self.proc.stdin:
-                self.proc.stdin.write(text)
+                self.proc.stdin.write(_encode_input(text))
                 self.proc.stdin.flush()
                 logger.info(f"    [interactive] 写入 stdin: {text.rstrip()}")
                 with self._lock:
-                    self._last_output_time = time.time()
+                    self._last_output_time = time.monotonic()
                 return True
         except Exception as e:
             logger.warning(f"    [interactive] 写入 stdin 失败: {e}")
@@ -366,35 +808,47 @@ class InteractiveProcess:
         return self.proc.poll() is None
 
 
-# 全局进程注册表
+def _take(buf: io.StringIO) -> str:
+    """取出缓冲区全部内容并清空"""
+    value = buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    return value
+
+
+# 全局进程注册表：只有写入/删除需要加锁，单键读取在 GIL 下本身是原子的
 _process_registry: dict[str, InteractiveProcess] = {}
 _registry_lock = threading.Lock()
 
 
 def start_interactive_process(
-    cmd: str,
+    cmd: str | Sequence[str],
     cwd: str | None = None,
+    shell: bool | None = None,
 ) -> InteractiveProcess:
     """启动一个交互式进程并注册
 
     Args:
-        cmd: 命令字符串
+        cmd: 命令字符串或 argv 列表
         cwd: 工作目录
+        shell: True 强制经过 shell，False 强制不经过，None 自动判断
 
     Returns:
         InteractiveProcess 实例
     """
+    popen_cmd, use_shell = _prepare_command(cmd, shell)
+    if not isinstance(cmd, str):
+        cmd = shlex.join(cmd)
     logger.info(f"    [interactive] 启动: {cmd}")
     proc = subprocess.Popen(
-        cmd,
-        shell=True,
+        popen_cmd,
+        shell=use_shell,
         cwd=cwd,
         stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
+        bufsize=_READ_CHUNK,
+        **_PROCESS_GROUP_KWARGS,
     )
 
     process_id = uuid.uuid4().hex[:8]
@@ -407,9 +861,8 @@ def start_interactive_process(
 
 
 def get_interactive_process(process_id: str) -> InteractiveProcess | None:
-    """根据 ID 获取交互式进程"""
-    with _registry_lock:
-        return _process_registry.get(process_id)
+    """根据 ID 获取交互式进程（无锁读取）"""
+    return _process_registry.get(process_id)
 
 
 def remove_interactive_process(process_id: str) -> None:
@@ -2,19 +2,27 @@
 
 from __future__ import annotations
 
+import itertools
 import json
+import os
 import re
+from collections.abc import Iterator
 from pathlib import Path
 
 from agent_system.tools.list_directory import (
     _IGNORE_DIRS,
     _IGNORE_SUFFIXES,
+    _GitignoreRules,
     _find_gitignore,
     _is_gitignored,
+    _scan_sorted,
 )
 
 # 关注的源代码文件后缀
-_SOURCE_SUFFIXES = {".ts", ".lua", ".js", ".json"}
+_SOURCE_SUFFIXES = frozenset({".ts", ".lua", ".js", ".json"})
+
+# 收集的 export 声明行必然包含其中之一（逐行判断前的字节级预筛）
+_EXPORT_HINT_RE = re.compile(rb"export (?:abstract class|class|interface|enum) ")
 
 
 def get_project_structure_tool(
@@ -41,10 +49,11 @@ def get_project_structure_tool(
     if not root.is_dir():
         return json.dumps({"error": f"目录不存在: {project_root}"}, ensure_ascii=False)
 
-    exts = set(extensions) if extensions else _SOURCE_SUFFIXES
+    # 默认忽略的后缀预先从关注集合中剔除，遍历时每个文件只需一次集合查找
+    exts = (frozenset(extensions) if extensions else _SOURCE_SUFFIXES) - _IGNORE_SUFFIXES
 
     # 解析 gitignore
-    skip_dirs = set(_IGNORE_DIRS)
+    skip_dirs = _IGNORE_DIRS
     gitignore_patterns = _find_gitignore(root)
 
     # 确定扫描目标
@@ -57,21 +66,21 @@ def get_project_structure_tool(
     else:
         scan_roots = [root]
 
-    # 单次遍历同时收集文件和 exports
+    # 单次遍历同时收集文件和 exports；islice 取满 max_files 后遍历自然停止
+    walkers = [
+        _walk_entries(str(scan_root), _scan_rel(scan_root, root), exts, skip_dirs, gitignore_patterns)
+        for scan_root in scan_roots
+    ]
     files_by_dir: dict[str, list[str]] = {}
     exports: list[dict[str, str]] = []
     total = 0
 
-    for scan_root in scan_roots:
-        _structure_walk(
-            scan_root, root, exts,
-            skip_dirs, gitignore_patterns,
-            files_by_dir, exports,
-            counter=[total], max_files=max_files,
-        )
-        total = sum(len(v) for v in files_by_dir.values())
-        if total >= max_files:
-            break
+    for rel_dir, entry, rel in itertools.islice(itertools.chain.from_iterable(walkers), max_files):
+        files_by_dir.setdefault(rel_dir, []).append(entry.name)
+        total += 1
+        # 顺便提取 TS export 声明
+        if entry.name.endswith(".ts") and len(exports) < 200:
+            _collect_exports(entry.path, rel, exports)
 
     result = {
         "project_root": str(root),
@@ -86,80 +95,96 @@ def get_project_structure_tool(
     return json.dumps(result, ensure_ascii=False, indent=2)
 
 
-def _structure_walk(
-    directory: Path,
-    root: Path,
-    exts: set[str],
-    skip_dirs: set[str],
-    gitignore_patterns: list[re.Pattern[str]],
-    files_by_dir: dict[str, list[str]],
-    exports: list[dict[str, str]],
-    counter: list[int],
-    max_files: int,
-) -> None:
-    """递归遍历目录，同时收集文件列表和 TS export 声明"""
-    if counter[0] >= max_files:
-        return
+def _suffix(name: str) -> str:
+    """等价于 Path(name).suffix，但不构造 Path 对象"""
+    stem, dot, ext = name.rpartition(".")
+    return dot + ext if stem and ext else ""
 
-    try:
-        entries = sorted(directory.iterdir(), key=lambda e: (not e.is_dir(), e.name.lower()))
-    except (PermissionError, OSError):
-        return
 
-    for entry in entries:
-        if counter[0] >= max_files:
-            return
+def _scan_rel(scan_root: Path, root: Path) -> str:
+    """扫描起点相对项目根目录的路径（根目录本身为 "."）"""
+    try:
+        return scan_root.relative_to(root).as_posix()
+    except ValueError:
+        return "."
+
+
+def _walk_entries(
+    directory: str,
+    rel_dir: str,
+    exts: frozenset[str],
+    skip_dirs: frozenset[str],
+    gitignore_patterns: _GitignoreRules | None,
+) -> Iterator[tuple[str, os.DirEntry[str], str]]:
+    """按目录优先、名称排序深度优先遍历，惰性产出 (所在目录, 文件条目, 相对路径)
+
+    使用 os.scandir，条目类型来自目录读取结果，不再逐个 stat；
+    相对路径由 rel_dir（根目录为 "."）拼接得到。
+    被忽略的目录在进入前就被剪掉，其下所有条目不会再做任何 gitignore 匹配。
+    用显式栈代替递归的 yield from：每产出一个条目不必逐层恢复生成器，
+    深层目录树也不受递归深度限制；产出顺序与递归版一致。
+    """
+    # 栈元素: (本层已排序条目的迭代器, 本层相对路径, 子条目相对路径前缀)
+    stack: list[tuple[Iterator[tuple[os.DirEntry[str], bool]], str, str]] = []
+
+    def _push(path: str, rel: str) -> None:
+        # 无法 stat 的单个条目（如自指的符号链接）由 _scan_sorted 跳过，不影响同目录其他文件
+        entries = _scan_sorted(path)
+        if entries is not None:
+            stack.append((iter(entries), rel, "" if rel == "." else rel + "/"))
+
+    _push(directory, rel_dir)
+    while stack:
+        entries, cur_dir, prefix = stack[-1]
+        item = next(entries, None)
+        if item is None:
+            stack.pop()
+            continue
 
-        if entry.name.startswith("."):
+        entry, is_dir = item
+        name = entry.name
+        if name.startswith("."):
             continue
 
-        try:
-            rel = entry.relative_to(root).as_posix()
-        except ValueError:
-            rel = entry.name
+        rel = prefix + name
 
-        if entry.is_dir():
-            if entry.name in skip_dirs:
+        if is_dir:
+            if name in skip_dirs:
                 continue
-            if gitignore_patterns and _is_gitignored(entry.name, rel, gitignore_patterns):
+            if gitignore_patterns and _is_gitignored(name, rel, gitignore_patterns):
                 continue
-            _structure_walk(
-                entry, root, exts,
-                skip_dirs, gitignore_patterns,
-                files_by_dir, exports,
-                counter, max_files,
-            )
+            _push(entry.path, rel)
         elif entry.is_file():
-            if entry.suffix in _IGNORE_SUFFIXES:
-                continue
-            if gitignore_patterns and _is_gitignored(entry.name, rel, gitignore_patterns):
+            # 先做后缀集合判断，非源文件不必再跑 gitignore 正则
+            if _suffix(name) not in exts:
                 continue
-            if entry.suffix not in exts:
+            if gitignore_patterns and _is_gitignored(name, rel, gitignore_patterns):
                 continue
+            yield cur_dir, entry, rel
+
 
-            rel_dir = str(entry.parent.relative_to(root)).replace("\\", "/")
-            if rel_dir not in files_by_dir:
-                files_by_dir[rel_dir] = []
-            files_by_dir[rel_dir].append(entry.name)
-            counter[0] += 1
-
-            # 顺便提取 TS export 声明
-            if entry.suffix == ".ts" and len(exports) < 200:
-                try:
-                    content = entry.read_text(encoding="utf-8", errors="replace")
-                except Exception:
-                    continue
-                for line in content.splitlines():
-                    stripped = line.strip()
-                    if stripped.startswith("export class ") or \
-                       stripped.startswith("export interface ") or \
-                       stripped.startswith("export enum ") or \
-                       stripped.startswith("export abstract class "):
-                        name = stripped.split("{")[0].strip() if "{" in stripped else stripped
-                        exports.append({
-                            "file": rel,
-                            "declaration": name[:120],
-                        })
+def _collect_exports(path: str, rel: str, exports: list[dict[str, str]]) -> None:
+    """提取 TS 文件中的 export class/interface/enum 声明"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except Exception:
+        return
+    # 字节级预筛：不含任何 export 声明关键字的文件直接跳过，免去解码和逐行扫描
+    if _EXPORT_HINT_RE.search(data) is None:
+        return
+    content = data.decode("utf-8", errors="replace")
+    for line in content.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("export class ") or \
+           stripped.startswith("export interface ") or \
+           stripped.startswith("export enum ") or \
+           stripped.startswith("export abstract class "):
+            decl = stripped.split("{")[0].strip() if "{" in stripped else stripped
+            exports.append({
+                "file": rel,
+                "declaration": decl[:120],
+            })
 
 
 # LLM tool_use 工具定义
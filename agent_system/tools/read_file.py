@@ -2,10 +2,126 @@
 
 from __future__ import annotations
 
+import atexit
+import functools
 import json
+import mmap
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时回退到标准库 json
+    orjson = None
+
+# 批量读取共用的线程池（常驻，避免每次调用创建/销毁线程）
+_READ_WORKERS = min(8, os.cpu_count() or 4)
+_READ_POOL = ThreadPoolExecutor(max_workers=_READ_WORKERS, thread_name_prefix="read-file")
+atexit.register(_READ_POOL.shutdown, wait=False, cancel_futures=True)
+
+# 超过该大小的文件走 mmap + 换行偏移表，只解码请求的行范围
+_MMAP_MIN_SIZE = 1024 * 1024
+
+# 超过该大小、且只读前若干行（end <= _HEAD_SCAN_MAX_LINES）时，
+# 直接在 mmap 上数换行到 end 为止，不读整个文件也不建完整偏移表
+_HEAD_SCAN_MIN_SIZE = 64 * 1024
+_HEAD_SCAN_MAX_LINES = 2000
+
+# 按 \n 切分识别不到的换行：单独的 \r（文本模式读取时会被转成 \n），
+# 以及 splitlines 认作换行的 \v \f \x1c-\x1e \x85 \u2028 \u2029（utf-8 编码）
+_OTHER_LINE_BREAKS_RE = re.compile(rb"\r(?!\n)|[\v\f\x1c-\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]")
+
+
+@functools.lru_cache(maxsize=32)
+def _newline_offsets(path_str: str, mtime_ns: int, size: int) -> list[int] | None:
+    """按 (路径, mtime, 大小) 缓存大文件中每个 \\n 的字节偏移
+
+    文件含 \\n 以外的换行符时返回 None，由调用方退回 splitlines 路径，
+    保证行号划分与 splitlines 完全一致。
+    """
+    with open(path_str, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if _OTHER_LINE_BREAKS_RE.search(mm):
+            return None
+        offsets: list[int] = []
+        pos = mm.find(b"\n")
+        while pos != -1:
+            offsets.append(pos)
+            pos = mm.find(b"\n", pos + 1)
+    return offsets
+
+
+def _read_range_mmap(path_str: str, offsets: list[int], size: int, start_idx: int, end_idx: int | None) -> str:
+    """按换行偏移表从 mmap 中截取 [start_idx, end_idx) 行并只解码这一段
+
+    \\r\\n 的两个字节总落在同一行内，切片边界不会把它拆开。
+    """
+    line_count = len(offsets) + (0 if offsets and offsets[-1] == size - 1 else 1)
+    rows = range(line_count)[start_idx:end_idx]
+    if not rows:
+        return ""
+
+    def line_start(i: int) -> int:
+        if i == 0:
+            return 0
+        return offsets[i - 1] + 1 if i <= len(offsets) else size
+
+    with open(path_str, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[line_start(rows.start):line_start(rows.stop)].decode("utf-8", errors="replace")
+    # 与 read_text 的通用换行一致：\r\n → \n
+    return text.replace("\r\n", "\n")
+
+
+def _read_head_range_mmap(path_str: str, start_idx: int, end: int) -> str | None:
+    """只扫描到第 end 行末尾，截取 [start_idx, end) 行解码返回
+
+    扫描范围内出现 \\n 以外的换行符时返回 None，由调用方走完整路径。
+    """
+    with open(path_str, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        byte_start = 0 if start_idx == 0 else -1
+        pos = 0
+        for line_no in range(1, end + 1):
+            nl = mm.find(b"\n", pos)
+            if nl == -1:
+                pos = len(mm)
+                break
+            pos = nl + 1
+            if line_no == start_idx:
+                byte_start = pos
+        if _OTHER_LINE_BREAKS_RE.search(mm, 0, pos):
+            return None
+        if byte_start < 0 or byte_start >= pos:
+            return ""
+        text = mm[byte_start:pos].decode("utf-8", errors="replace")
+    return text.replace("\r\n", "\n")
+
+
+def _read_text(path_str: str) -> str:
+    """一次读出原始字节并整体解码，结果与 Path.read_text(encoding="utf-8", errors="replace") 相同
+
+    不经过 TextIOWrapper；只有内容含 \r 时才做通用换行转换（\r\n、\r → \n）。
+    """
+    with open(path_str, "rb") as f:
+        data = f.read()
+    text = data.decode("utf-8", errors="replace")
+    if b"\r" in data:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+@functools.lru_cache(maxsize=32)
+def _read_lines_cached(path_str: str, mtime_ns: int, size: int) -> tuple[str, ...]:
+    """按 (路径, mtime, 大小) 缓存文件的分行结果
+
+    LLM 常对同一文件分段重复读取（1-100、80-200 ...），命中缓存时
+    不再读盘和重新分行。mtime_ns / size 仅作为缓存键，文件被修改后自动失效。
+    """
+    return tuple(_read_text(path_str).splitlines(keepends=True))
+
 
 def read_file_tool(path: str, start: int = 1, end: int | None = None) -> str:
     """读取指定文件的内容（或指定行范围）
@@ -22,19 +138,56 @@ def read_file_tool(path: str, start: int = 1, end: int | None = None) -> str:
         FileNotFoundError: 文件不存在
     """
     p = Path(path)
-    if not p.exists():
-        raise FileNotFoundError(f"文件不存在: {p}")
-
-    content = p.read_text(encoding="utf-8", errors="replace")
-    lines = content.splitlines(keepends=True)
+    try:
+        st = p.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise FileNotFoundError(f"文件不存在: {p}") from None
 
+    # abspath 是纯字符串运算；resolve() 要逐级 lstat 解析符号链接，批量读取时开销可观
+    path_str = os.path.abspath(p)
     start_idx = max(0, start - 1)
+    if st.st_size >= _HEAD_SCAN_MIN_SIZE and end is not None and 0 < end <= _HEAD_SCAN_MAX_LINES:
+        text = _read_head_range_mmap(path_str, start_idx, end)
+        if text is not None:
+            return text
+    if st.st_size >= _MMAP_MIN_SIZE:
+        offsets = _newline_offsets(path_str, st.st_mtime_ns, st.st_size)
+        if offsets is not None:
+            return _read_range_mmap(path_str, offsets, st.st_size, start_idx, end)
+
+    lines = _read_lines_cached(path_str, st.st_mtime_ns, st.st_size)
     end_idx = end if end is not None else len(lines)
     selected = lines[start_idx:end_idx]
 
     return "".join(selected)
 
 
+def _read_one(req: dict[str, Any]) -> dict[str, Any]:
+    """执行一个批量读取请求，文件不存在时以 error 字段返回"""
+    file_path = req["path"]
+    file_start = req["start"]
+    file_end = req["end"]
+    try:
+        content = read_file_tool(
+            path=file_path,
+            start=file_start,
+            end=file_end,
+        )
+        return {
+            "path": file_path,
+            "start": file_start,
+            "end": file_end,
+            "content": content,
+        }
+    except FileNotFoundError as e:
+        return {
+            "path": file_path,
+            "start": file_start,
+            "end": file_end,
+            "error": str(e),
+        }
+
+
 def read_files_tool(
     *,
     paths: list[str] | None = None,
@@ -74,32 +227,20 @@ def read_files_tool(
                 "end": end,
             })
 
-    results: list[dict[str, Any]] = []
-    for req in normalized_requests:
-        file_path = req["path"]
-        file_start = req["start"]
-        file_end = req["end"]
-        try:
-            content = read_file_tool(
-                path=file_path,
-                start=file_start,
-                end=file_end,
-            )
-            results.append({
-                "path": file_path,
-                "start": file_start,
-                "end": file_end,
-                "content": content,
-            })
-        except FileNotFoundError as e:
-            results.append({
-                "path": file_path,
-                "start": file_start,
-                "end": file_end,
-                "error": str(e),
-            })
+    # 多个文件的磁盘读取互相重叠（读文件期间释放 GIL）；结果保持请求顺序
+    if len(normalized_requests) > 1:
+        results = list(_READ_POOL.map(_read_one, normalized_requests))
+    else:
+        results = [_read_one(req) for req in normalized_requests]
 
-    return json.dumps({"files": results}, ensure_ascii=False)
+    payload = {"files": results}
+    if orjson is not None:
+        # 大段文件内容由 orjson 在 C 层一次编码；遇到孤立代理字符等 orjson 拒绝的输入时回退
+        try:
+            return orjson.dumps(payload).decode("utf-8")
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(payload, ensure_ascii=False)
 
 
 # LLM tool_use 工具定义
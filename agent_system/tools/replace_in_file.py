@@ -4,6 +4,8 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from agent_system.tools._fs import atomic_write
+
 
 def replace_in_file_tool(
     path: str,
@@ -24,22 +26,56 @@ def replace_in_file_tool(
     if not p.exists():
         return f"错误: 文件不存在: {path}"
 
-    content = p.read_text(encoding="utf-8", errors="replace")
+    data = p.read_bytes()
+    content: str | bytes
+    old: str | bytes
+    new: str | bytes
+    operands = _byte_operands(data, old_text, new_text)
+    if operands is not None:
+        content = data
+        old, new = operands
+    else:
+        # 与 read_text 一致: 解码后做通用换行转换（\r\n、\r → \n）
+        content = data.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+        old, new = old_text, new_text
 
-    count = content.count(old_text)
-    if count == 0:
+    # 定位第一处后只需确认其后再无匹配，不必扫完全文计数
+    first = content.find(old)  # type: ignore[arg-type]
+    if first < 0:
         return f"错误: 未找到匹配文本。请确认 old_text 完全匹配文件中的内容（含缩进和换行）"
-    if count > 1:
+    end = first + len(old)
+    # 空 old_text 在每个位置都匹配（与 str.count 一致），下一处从位置 1 开始找
+    if content.find(old, end if old else 1) >= 0:  # type: ignore[arg-type]
+        # 仅在出错时完整计数，用于提示
+        count = content.count(old)  # type: ignore[arg-type]
         return f"错误: 找到 {count} 处匹配，请提供更精确的上下文以唯一定位"
 
-    new_content = content.replace(old_text, new_text, 1)
-    p.write_text(new_content, encoding="utf-8")
+    if old_text == new_text:
+        return f"成功: 新旧文本相同，文件未改动 ({path})"
+
+    atomic_write(p, content[:first] + new + content[end:])  # type: ignore[operator]
 
     old_lines = old_text.count("\n") + 1
     new_lines = new_text.count("\n") + 1
     return f"成功: 替换了 {old_lines} 行为 {new_lines} 行 ({path})"
 
 
+def _byte_operands(data: bytes, old_text: str, new_text: str) -> tuple[bytes, bytes] | None:
+    """能直接在原始字节上替换时，返回编码后的 (old, new)；否则返回 None 走文本路径
+
+    文件不含 \r 时文本模式读写不会改动换行，UTF-8 又是自同步编码，
+    字节匹配位置与字符匹配一一对应，省掉整文件解码与重新编码。
+    空 old_text 的匹配计数按字符计，仍走文本路径。
+    """
+    if b"\r" in data or not old_text:
+        return None
+    try:
+        return old_text.encode("utf-8"), new_text.encode("utf-8")
+    except UnicodeEncodeError:
+        # 孤立代理字符等无法编码的输入
+        return None
+
+
 # LLM tool_use 工具定义
 REPLACE_IN_FILE_TOOL_DEFINITION = {
     "name": "replace_in_file",
@@ -11,6 +11,8 @@ import json
 from dataclasses import dataclass
 
 from agent_system.tools.process import (
+    _TRUNCATED_MARKER,
+    InteractiveOutput,
     kill_process_tree,
     run_process,
     start_interactive_process,
@@ -35,6 +37,13 @@ class CommandResult:
         return self.exit_code == 0
 
 
+def _interactive_stdout(output: InteractiveOutput) -> str:
+    """交互进程的 stdout；缓冲超限丢弃过较早输出时在开头注明"""
+    if output.truncated:
+        return _TRUNCATED_MARKER + output.stdout
+    return output.stdout
+
+
 def run_command_tool(
     command: str,
     cwd: str | None = None,
@@ -88,14 +97,14 @@ def run_command_tool(
         # 进程已经执行完毕，清理并返回
         remove_interactive_process(ip.process_id)
         return CommandResult(
-            stdout=output.stdout,
+            stdout=_interactive_stdout(output),
             stderr=output.stderr,
             exit_code=output.returncode if output.returncode is not None else -1,
         )
 
     # 进程仍在运行（可能在等待输入）
     return CommandResult(
-        stdout=output.stdout,
+        stdout=_interactive_stdout(output),
         stderr=output.stderr,
         exit_code=-1,  # 尚未退出
         process_id=output.process_id,
@@ -138,13 +147,13 @@ def send_stdin_tool(
     if not output.running:
         remove_interactive_process(process_id)
         return CommandResult(
-            stdout=output.stdout,
+            stdout=_interactive_stdout(output),
             stderr=output.stderr,
             exit_code=output.returncode if output.returncode is not None else -1,
         )
 
     return CommandResult(
-        stdout=output.stdout,
+        stdout=_interactive_stdout(output),
         stderr=output.stderr,
         exit_code=-1,
         process_id=process_id,
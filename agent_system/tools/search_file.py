@@ -2,32 +2,55 @@
 
 from __future__ import annotations
 
+import atexit
 import fnmatch
+import functools
+import itertools
 import logging
+import os
 import re
 import subprocess
+import sys
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, Generator, Iterator
 
 from agent_system.tools.list_directory import (
     _IGNORE_DIRS,
     _IGNORE_SUFFIXES,
+    _NO_SKIP_DIRS,
+    _GitignoreRules,
+    _cache_found,
     _find_gitignore,
-    _is_gitignored,
+    _locate_gitignore,
+    _resolve_dir,
 )
 
 logger = logging.getLogger(__name__)
 
 # 默认最大返回数
 _DEFAULT_MAX_RESULTS = 200
-
-
-def _find_git_root(start: Path) -> Path | None:
-    """向上查找 .git 目录，返回 git 仓库根目录"""
-    current = start.resolve()
+# 遍历时按后缀忽略文件：str.endswith 接受元组，一次 C 调用完成判断
+_IGNORE_SUFFIX_TUPLE = tuple(_IGNORE_SUFFIXES)
+# 遍历进度日志间隔（目录数 & 掩码 == 0 时输出一条）
+_PROGRESS_LOG_MASK = 0x3FF
+# 遍历开头用于测量目录读取耗时的目录数，及启用并行预取的平均耗时阈值（秒）
+_PREFETCH_PROBE_DIRS = 32
+_SLOW_SCAN_SECONDS = 0.0003
+# 目录读取以等待 IO 为主（scandir 期间释放 GIL），线程数可多于 CPU 数
+_SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+_SCAN_POOL = ThreadPoolExecutor(max_workers=_SCAN_WORKERS, thread_name_prefix="search-scan")
+atexit.register(_SCAN_POOL.shutdown, wait=False, cancel_futures=True)
+
+
+@_cache_found(maxsize=64)
+def _git_root_cached(start: str) -> str | None:
+    """从已 resolve 的目录向上查找 .git 目录（找到时按起始目录缓存）"""
+    current = Path(start)
     for _ in range(20):
         if (current / ".git").is_dir():
-            return current
+            return str(current)
         parent = current.parent
         if parent == current:
             break
@@ -35,10 +58,54 @@ def _find_git_root(start: Path) -> Path | None:
     return None
 
 
+def _find_git_root(start: Path) -> Path | None:
+    """向上查找 .git 目录，返回 git 仓库根目录
+
+    同一目录下的重复搜索复用缓存结果，只需一次 stat 确认 .git 仍存在；
+    不在仓库内时不缓存，之后 git init 的仓库立即走 git 快速路径。
+    """
+    key = _resolve_dir(os.path.abspath(start))
+    root = _git_root_cached(key)
+    if root is not None and not os.path.isdir(os.path.join(root, ".git")):
+        _git_root_cached.cache_clear()  # type: ignore[attr-defined]
+        root = _git_root_cached(key)
+    return Path(root) if root is not None else None
+
+
+def _clear_search_caches() -> None:
+    """清空路径解析 / 仓库根 / .gitignore 位置缓存（供测试及目录结构变化后使用）"""
+    _resolve_dir.cache_clear()
+    _git_root_cached.cache_clear()  # type: ignore[attr-defined]
+    _locate_gitignore.cache_clear()  # type: ignore[attr-defined]
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_glob(pattern: str) -> Callable[[str], object]:
+    """把 glob 模式一次性编译为匹配函数，语义等价于 fnmatch.fnmatch(name, pattern)
+
+    fnmatch.fnmatch 每次调用都要 normcase + 查翻译缓存；遍历大目录树时逐文件调用开销明显。
+    同一模式（如反复搜索 "*.py"）的编译结果跨调用复用。
+    """
+    match = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+    if os.path.normcase("A") == "A":
+        return match
+    # 大小写不敏感的平台（Windows）: 与 fnmatch.fnmatch 一样先规范化文件名
+    return lambda name: match(os.path.normcase(name))
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_regex(regex: str) -> re.Pattern[str]:
+    """编译路径过滤正则并缓存
+
+    re 模块自带的缓存与进程内所有 re.* 调用共享，agent 反复用同一过滤条件搜索时容易被挤出。
+    """
+    return re.compile(regex)
+
+
 def _search_via_git(
     base_dir: Path,
     git_root: Path,
-    pattern: str,
+    glob_match: Callable[[str], object],
     compiled_re: re.Pattern[str] | None,
     max_results: int,
 ) -> list[str] | None:
@@ -50,25 +117,25 @@ def _search_via_git(
     try:
         start = time.time()
         proc = subprocess.run(
-            ["git", "ls-files", "--cached", "--others", "--exclude-standard"],
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
             cwd=str(git_root),
             capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
             timeout=30,
         )
         if proc.returncode != 0:
             return None
         elapsed = time.time() - start
-        all_files = proc.stdout.splitlines()
+        # -z: NUL 分隔且路径不加引号转义（否则非 ASCII / 含特殊字符的路径会被输出成 "\344\270..."）
+        all_files = proc.stdout.decode("utf-8", errors="replace").split("\0")
+        all_files.pop()  # 末尾 NUL 之后的空串
         logger.info(f"    [search] git ls-files: {len(all_files)} 个文件 ({elapsed:.1f}s)")
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
         return None
 
     # base_dir 相对 git_root 的前缀（限定搜索范围）
     try:
-        base_rel = base_dir.resolve().relative_to(git_root.resolve()).as_posix()
+        # git_root 来自 _find_git_root，已是 resolve 后的路径
+        base_rel = Path(_resolve_dir(os.path.abspath(base_dir))).relative_to(git_root).as_posix()
         if base_rel == ".":
             base_rel = ""
     except ValueError:
@@ -83,7 +150,7 @@ def _search_via_git(
         filename = rel_path.rsplit("/", 1)[-1]
 
         # glob 模式匹配文件名
-        if not fnmatch.fnmatch(filename, pattern):
+        if not glob_match(filename):
             continue
 
         abs_path = str(git_root / rel_path)
@@ -105,6 +172,7 @@ def search_file_tool(
     regex: str | None = None,
     max_results: int = _DEFAULT_MAX_RESULTS,
     respect_gitignore: bool = True,
+    order: str = "sorted",
 ) -> list[str]:
     """搜索匹配模式的文件
 
@@ -118,6 +186,7 @@ def search_file_tool(
         regex: 可选的正则表达式过滤（匹配文件路径）
         max_results: 最大返回结果数（默认 200）
         respect_gitignore: 是否遵循 .gitignore 规则（默认 True）
+        order: "sorted"（默认）按路径排序返回；"none" 按枚举顺序返回，省掉排序
 
     Returns:
         匹配的文件路径列表（绝对路径字符串）
@@ -127,105 +196,228 @@ def search_file_tool(
     if not base.is_dir():
         return []
 
-    compiled_re = re.compile(regex) if regex else None
+    # 遍历生成器在截断后随引用释放而关闭，尚未开始的目录预取随之取消
+    results = list(itertools.islice(
+        _search_iter(base, pattern, regex, respect_gitignore, max_results), max_results,
+    ))
+
+    elapsed = time.time() - start
+    logger.info(f"    [search] 完成: {len(results)} 个匹配 ({elapsed:.1f}s)")
+    return results if order == "none" else sorted(results)
+
+
+def search_file_iter(
+    base_dir: str,
+    pattern: str = "*",
+    regex: str | None = None,
+    respect_gitignore: bool = True,
+) -> Iterator[str]:
+    """逐个产出匹配模式的文件路径（流式版本的 search_file_tool）
+
+    搜索策略与 search_file_tool 相同，但不限制数量、不排序；调用方取够即可停止迭代，
+    文件系统遍历会随之结束，不再读取剩余目录。
+
+    Args:
+        base_dir: 搜索根目录
+        pattern: glob 模式（如 "*.lua", "**/*.ts"）
+        regex: 可选的正则表达式过滤（匹配文件路径）
+        respect_gitignore: 是否遵循 .gitignore 规则（默认 True）
+
+    Yields:
+        匹配的文件路径（按枚举顺序）
+    """
+    base = Path(base_dir)
+    if not base.is_dir():
+        return
+    yield from _search_iter(base, pattern, regex, respect_gitignore, sys.maxsize)
+
+
+def _search_iter(
+    base: Path,
+    pattern: str,
+    regex: str | None,
+    respect_gitignore: bool,
+    max_results: int,
+) -> Iterator[str]:
+    """优先 git ls-files，不可用时文件系统遍历，返回匹配路径的迭代器
+
+    git 一次性拿到全部输出，按 max_results 截断后返回列表迭代器；
+    文件系统遍历直接返回生成器，逐个产出，由调用方决定何时停止。
+    """
+    compiled_re = _compile_regex(regex) if regex else None
+    glob_match = _compile_glob(pattern)
 
     # 快速路径: 使用 git ls-files
     if respect_gitignore:
         git_root = _find_git_root(base)
         if git_root is not None:
-            results = _search_via_git(base, git_root, pattern, compiled_re, max_results)
+            results = _search_via_git(base, git_root, glob_match, compiled_re, max_results)
             if results is not None:
-                elapsed = time.time() - start
-                logger.info(f"    [search] 完成: {len(results)} 个匹配 ({elapsed:.1f}s)")
-                return sorted(results)
+                return iter(results)
             logger.info("    [search] git ls-files 失败，回退到文件系统遍历")
 
     # 回退路径: 文件系统遍历
-    logger.info(f"    [search] 文件系统遍历 base={base_dir} pattern={pattern}")
+    logger.info(f"    [search] 文件系统遍历 base={base} pattern={pattern}")
     if respect_gitignore:
-        skip_dirs = set(_IGNORE_DIRS)
+        skip_dirs = _IGNORE_DIRS
         gitignore_patterns = _find_gitignore(base)
     else:
-        skip_dirs = set()
-        gitignore_patterns = []
+        skip_dirs = _NO_SKIP_DIRS
+        gitignore_patterns = None
 
-    results_list: list[str] = []
-    dirs_scanned = 0
-    _search_walk(
-        base, base, pattern, compiled_re,
-        skip_dirs, gitignore_patterns,
-        results_list, max_results, respect_gitignore,
-        _counter=[0],  # mutable counter for dir progress
+    return _search_walk(
+        str(base), glob_match, compiled_re,
+        skip_dirs, gitignore_patterns, respect_gitignore,
     )
 
-    elapsed = time.time() - start
-    logger.info(f"    [search] 完成: {len(results_list)} 个匹配 ({elapsed:.1f}s)")
-    return sorted(results_list)
-
 
 def _search_walk(
-    directory: Path,
-    root: Path,
-    pattern: str,
+    root: str,
+    glob_match: Callable[[str], object],
     compiled_re: re.Pattern[str] | None,
-    skip_dirs: set[str],
-    gitignore_patterns: list[re.Pattern[str]],
-    results: list[str],
-    max_results: int,
+    skip_dirs: frozenset[str],
+    gitignore_patterns: _GitignoreRules | None,
     respect_gitignore: bool,
-    _counter: list[int] | None = None,
-) -> None:
-    """递归搜索目录，跳过忽略的路径"""
-    if len(results) >= max_results:
-        return
+) -> Generator[str, None, None]:
+    """遍历目录搜索文件，跳过忽略的路径，逐个产出匹配路径
 
-    # 进度日志
-    if _counter is not None:
-        _counter[0] += 1
-        if _counter[0] % 100 == 0:
-            logger.info(f"    [search] 已扫描 {_counter[0]} 个目录, 已找到 {len(results)} 个匹配...")
+    显式栈 + os.scandir：条目类型取自目录读取结果，不再逐个 stat，也不构造 Path。
+    is_dir()/is_file() 保持默认跟随符号链接（只有链接本身才需额外 stat），指向目录的链接照常进入。
+    访问顺序与递归版本一致（每层先按名称进入子目录，再处理本层文件），
+    因此调用方取前 N 个时命中的文件集合不变；停止迭代后不再读取剩余目录。
 
+    若开头几十个目录的平均读取耗时偏高（网络盘、冷缓存下 getdents 延迟占主导），后续按访问顺序
+    把栈顶附近的目录读取提交到 _SCAN_POOL 并行进行；匹配与入栈仍在调用线程按原顺序完成，
+    结果与串行遍历一致。页缓存命中时线程切换反而更慢，因此不启用。
+    """
+    # 直接取字面名称集合、名称匹配（按名称缓存）与路径 fullmatch 绑定方法，
+    # 热循环里省掉 _is_gitignored 的调用开销
+    ignored_literals = _NO_SKIP_DIRS
+    ignored_name = ignored_path = None
+    if gitignore_patterns is not None:
+        ignored_literals = gitignore_patterns.name_literals
+        ignored_name = gitignore_patterns.match_name
+        if gitignore_patterns.path_re is not None:
+            ignored_path = gitignore_patterns.path_re.fullmatch
+
+    found = 0
+    dirs_scanned = 0
+    # 栈元素: (目录路径, 相对 root 的前缀) 表示待展开的目录；(None, 文件列表) 表示待匹配的本层文件
+    stack: list[tuple[str | None, object]] = [(root, "")]
+    # 已提交预取的目录 → 其 scandir 结果
+    prefetched: dict[str, Future[list[os.DirEntry[str]] | None]] = {}
+    prefetch = False
+    probe_seconds = 0.0
     try:
-        entries = sorted(directory.iterdir(), key=lambda e: (not e.is_dir(), e.name.lower()))
-    except (PermissionError, OSError):
-        return
+        while stack:
+            directory, payload = stack.pop()
+            if directory is None:
+                for name, path_str, rel_prefix in payload:  # type: ignore[attr-defined]
+                    # 隐藏文件已在目录展开时跳过，名称以忽略后缀结尾即等价于扩展名命中
+                    if respect_gitignore and name.endswith(_IGNORE_SUFFIX_TUPLE):
+                        continue
+                    if (
+                        name in ignored_literals
+                        or (ignored_name and ignored_name(name))
+                        or (ignored_path and ignored_path(rel_prefix + name))
+                    ):
+                        continue
+                    # glob 模式匹配 (仅文件名)
+                    if not glob_match(name):
+                        continue
+                    if compiled_re and not compiled_re.search(path_str):
+                        continue
+                    found += 1
+                    yield path_str
+                continue
 
-    for entry in entries:
-        if len(results) >= max_results:
-            return
+            # 进度日志: 每 1024 个目录一条，INFO 未启用时连字符串都不格式化
+            dirs_scanned += 1
+            if dirs_scanned & _PROGRESS_LOG_MASK == 0 and logger.isEnabledFor(logging.INFO):
+                logger.info(f"    [search] 已扫描 {dirs_scanned} 个目录, 已找到 {found} 个匹配...")
+
+            future = prefetched.pop(directory, None)
+            if future is not None:
+                entries = future.result()
+            elif dirs_scanned <= _PREFETCH_PROBE_DIRS:
+                t0 = time.perf_counter()
+                entries = _scan_dir(directory)
+                probe_seconds += time.perf_counter() - t0
+                prefetch = probe_seconds > dirs_scanned * _SLOW_SCAN_SECONDS
+            else:
+                entries = _scan_dir(directory)
+            if entries is None:
+                continue
 
-        # 跳过以 . 开头的隐藏文件/目录
-        if entry.name.startswith("."):
-            continue
+            rel_prefix = payload
+            # 本层所有条目共用的路径前缀，逐条只做字符串拼接；
+            # 与 Path 拼接结果一致: Path(".") / "a" 为 "a"
+            dir_prefix = "" if directory == "." else os.path.join(directory, "")
+            subdirs: list[tuple[str, str, str]] = []
+            files: list[tuple[str, str, str]] = []
+            for entry in entries:
+                name = entry.name
+                # 跳过以 . 开头的隐藏文件/目录
+                if name.startswith("."):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    # 与 Path.is_dir 一致: 无法 stat 的条目（如自指的符号链接）直接跳过
+                    continue
+                if is_dir:
+                    # 默认忽略目录在拼接路径之前就排除
+                    if name in skip_dirs:
+                        continue
+                    rel = f"{rel_prefix}{name}"
+                    if (
+                        name in ignored_literals
+                        or (ignored_name and ignored_name(name))
+                        or (ignored_path and ignored_path(rel))
+                    ):
+                        continue
+                    subdirs.append((name, dir_prefix + name, rel + "/"))
+                elif entry.is_file():
+                    # 文件的相对路径只在有路径级 gitignore 规则时才用到，匹配时再拼接
+                    files.append((name, dir_prefix + name, rel_prefix))
+
+            # 本层文件最后处理，子目录按名称顺序先展开；
+            # 只对过滤后留下的条目排序（截断时命中集合依赖遍历顺序，不能省掉排序）；
+            # 不足两个时跳过，叶子目录大多只有 0~1 个子目录，省下逐条调用排序键
+            if files:
+                if len(files) > 1:
+                    files.sort(key=_lower_name)
+                stack.append((None, files))
+            if len(subdirs) > 1:
+                subdirs.sort(key=_lower_name)
+                stack.extend((path_str, rel) for _, path_str, rel in reversed(subdirs))
+            elif subdirs:
+                _, path_str, rel = subdirs[0]
+                stack.append((path_str, rel))
+
+            # 按访问顺序预取栈顶附近的目录；只看前 _SCAN_WORKERS 个，截断时不会白读整棵树
+            if prefetch and len(prefetched) < _SCAN_WORKERS:
+                for path_str, _ in stack[-_SCAN_WORKERS:]:
+                    if path_str is not None and path_str not in prefetched:
+                        prefetched[path_str] = _SCAN_POOL.submit(_scan_dir, path_str)
+    finally:
+        # 调用方提前停止迭代时，尚未开始的预取直接取消
+        for future in prefetched.values():
+            future.cancel()
+
+
+def _scan_dir(directory: str) -> list[os.DirEntry[str]] | None:
+    """读取目录条目；无法读取时返回 None"""
+    try:
+        with os.scandir(directory) as it:
+            return list(it)
+    except OSError:
+        return None
 
-        try:
-            rel = entry.relative_to(root).as_posix()
-        except ValueError:
-            rel = entry.name
 
-        if entry.is_dir():
-            if entry.name in skip_dirs:
-                continue
-            if gitignore_patterns and _is_gitignored(entry.name, rel, gitignore_patterns):
-                continue
-            _search_walk(
-                entry, root, pattern, compiled_re,
-                skip_dirs, gitignore_patterns,
-                results, max_results, respect_gitignore,
-                _counter,
-            )
-        elif entry.is_file():
-            if respect_gitignore and entry.suffix in _IGNORE_SUFFIXES:
-                continue
-            if gitignore_patterns and _is_gitignored(entry.name, rel, gitignore_patterns):
-                continue
-            # glob 模式匹配 (仅文件名)
-            if not fnmatch.fnmatch(entry.name, pattern):
-                continue
-            path_str = str(entry)
-            if compiled_re and not compiled_re.search(path_str):
-                continue
-            results.append(path_str)
+def _lower_name(item: tuple[str, str, str]) -> str:
+    """排序键: 条目名称（不区分大小写）"""
+    return item[0].lower()
 
 
 # LLM tool_use 工具定义
@@ -272,6 +464,12 @@ SEARCH_FILE_TOOL_DEFINITION = {
                 ),
                 "default": True,
             },
+            "order": {
+                "type": "string",
+                "enum": ["sorted", "none"],
+                "description": "结果顺序：sorted（默认）按路径排序；none 不排序，结果很多时更快。",
+                "default": "sorted",
+            },
         },
         "required": ["base_dir"],
     },
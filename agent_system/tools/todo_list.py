@@ -2,8 +2,14 @@
 
 from __future__ import annotations
 
+import json
 from typing import Any
 
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时回退到标准库 json
+    orjson = None
+
 
 def todo_list_tool(
     operation: str,
@@ -19,10 +25,8 @@ def todo_list_tool(
         _state: 由调用方传入的可变列表（用于跨调用保持状态）
 
     Returns:
-        JSON 格式的当前列表字符串
+        JSON 格式（紧凑，无缩进）的当前列表字符串
     """
-    import json
-
     if operation == "write":
         _state.clear()
         for item in (items or []):
@@ -32,7 +36,18 @@ def todo_list_tool(
                 "status": str(item.get("status", "not-started")),
             })
 
-    return json.dumps(_state, ensure_ascii=False, indent=2)
+    return _render(_state)
+
+
+def _render(state: list[dict[str, Any]]) -> str:
+    """序列化为紧凑 JSON（不缩进，省 token）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(state).decode("utf-8")
+        except orjson.JSONEncodeError:
+            # 超出 64 位的整数 id 等 orjson 拒绝的输入
+            pass
+    return json.dumps(state, ensure_ascii=False, separators=(",", ":"))
 
 
 # LLM tool_use 工具定义
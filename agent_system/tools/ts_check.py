@@ -2,15 +2,16 @@
 
 from __future__ import annotations
 
+import itertools
 import re
 from dataclasses import dataclass, field
 
 from agent_system.tools.process import run_process
 
 
-@dataclass
+@dataclass(slots=True)
 class TsError:
-    """单个 TypeScript 编译错误"""
+    """单个 TypeScript 编译错误（slots: 每次检查可能解析出成百上千个，省掉逐个实例的 __dict__）"""
     file: str
     line: int
     column: int
@@ -27,9 +28,19 @@ class TsError:
         }
 
 
-@dataclass
+# 结构化返回的错误数上限（error_count 仍为全部错误数）
+_MAX_REPORTED_ERRORS = 50
+# 保留的原始输出字符数上限
+_MAX_RAW_OUTPUT = 3000
+
+
+@dataclass(slots=True)
 class TsCheckResult:
-    """TypeScript 检查结果"""
+    """TypeScript 检查结果
+
+    errors 最多保留 _MAX_REPORTED_ERRORS 个，error_count 为 tsc 输出中的全部错误数；
+    raw_output 只保留前 _MAX_RAW_OUTPUT 个字符。
+    """
     success: bool
     error_count: int = 0
     errors: list[TsError] = field(default_factory=list)
@@ -39,17 +50,48 @@ class TsCheckResult:
         return {
             "success": self.success,
             "error_count": self.error_count,
-            "errors": [e.to_dict() for e in self.errors[:50]],  # 最多返回 50 个
-            "raw_output": self.raw_output[:3000],  # 截断原始输出
+            "errors": [e.to_dict() for e in self.errors[:_MAX_REPORTED_ERRORS]],
+            "raw_output": self.raw_output[:_MAX_RAW_OUTPUT],  # 截断原始输出
         }
 
 
 # tsc 错误行格式: path(line,col): error TSxxxx: message
+# MULTILINE 下对整段输出一次 finditer；[^\S\n] 是不跨行的空白，
+# 行首/行尾空白（含 \r\n 的 \r）不计入分组，等价于逐行 strip 后匹配
 _TSC_ERROR_RE = re.compile(
-    r"^(.+?)\((\d+),(\d+)\):\s+error\s+(TS\d+):\s+(.+)$"
+    r"^[^\S\n]*(\S.*?)\((\d+),(\d+)\):[^\S\n]+error[^\S\n]+(TS\d+):[^\S\n]+(\S(?:.*\S)?)[^\S\n]*$",
+    re.MULTILINE,
 )
 
 
+def _parse_tsc_errors(raw: str, limit: int | None = None) -> tuple[list[TsError], int]:
+    """从 tsc 输出中提取错误行
+
+    正则引擎在 C 层跳过不匹配的行，无需 splitlines + 逐行 strip/match；
+    分组一次性 groups() 取出并按位置构造，省掉逐个 group() 与关键字参数的开销。
+    每个匹配都含字面量 "error"：先用子串查找定位首尾出现的行，
+    没有错误时不启动正则，有错误时跳过前后的横幅/进度输出。
+
+    Args:
+        raw: tsc 的完整输出
+        limit: 最多构造的 TsError 个数，None 表示不限
+
+    Returns:
+        (前 limit 个错误, 错误总数)；超出 limit 的错误只计数，不构造对象
+    """
+    first = raw.find("error")
+    if first < 0:
+        return [], 0
+    last = raw.rfind("error")
+    end = raw.find("\n", last)
+    matches = _TSC_ERROR_RE.finditer(raw, raw.rfind("\n", 0, first) + 1, len(raw) if end < 0 else end)
+    errors = [
+        TsError(file, int(line), int(column), code, message)
+        for file, line, column, code, message in map(re.Match.groups, itertools.islice(matches, limit))
+    ]
+    return errors, len(errors) + sum(1 for _ in matches)
+
+
 def ts_check_tool(
     project_root: str,
     tsconfig: str = "tsconfig.json",
@@ -65,7 +107,9 @@ def ts_check_tool(
     Returns:
         TsCheckResult 结构化结果
     """
-    cmd = f"npx tsc --noEmit --project {tsconfig}"
+    # --pretty false: 即使 tsconfig 开启 pretty，也输出每个错误一行的纯文本格式，
+    # 不带颜色和代码片段 — 输出量小得多，且能被 _TSC_ERROR_RE 解析
+    cmd = f"npx tsc --noEmit --pretty false --project {tsconfig}"
 
     result = run_process(
         cmd=cmd,
@@ -83,24 +127,14 @@ def ts_check_tool(
         )
 
     raw = result.stdout + result.stderr
-    errors: list[TsError] = []
-
-    for line in raw.splitlines():
-        m = _TSC_ERROR_RE.match(line.strip())
-        if m:
-            errors.append(TsError(
-                file=m.group(1),
-                line=int(m.group(2)),
-                column=int(m.group(3)),
-                code=m.group(4),
-                message=m.group(5),
-            ))
+    errors, error_count = _parse_tsc_errors(raw, _MAX_REPORTED_ERRORS)
 
+    # 解析完即截断，结果对象不再持有整段输出（大量错误时可达数 MB）
     return TsCheckResult(
         success=result.returncode == 0,
-        error_count=len(errors),
+        error_count=error_count,
         errors=errors,
-        raw_output=raw,
+        raw_output=raw[:_MAX_RAW_OUTPUT],
     )
 
 
@@ -2,12 +2,19 @@
 
 from __future__ import annotations
 
+import os
+import stat
 from pathlib import Path
 
+from agent_system.tools._fs import atomic_write
+
 
 def write_file_tool(path: str | Path, content: str) -> str:
     """写入文件内容（自动创建中间目录）
 
+    已有文件内容与要写入的完全相同时不再写盘；否则经临时文件 + os.replace 覆盖，
+    写入中途失败不会留下半截文件。
+
     Args:
         path: 文件绝对路径
         content: 文件内容
@@ -17,7 +24,18 @@ def write_file_tool(path: str | Path, content: str) -> str:
     """
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(content, encoding="utf-8")
+    # 与 write_text 的文本模式写出相同的字节（Windows 上 \n 转为 \r\n）
+    if os.linesep != "\n":
+        content = content.replace("\n", os.linesep)
+    data = content.encode("utf-8")
+    try:
+        st = p.stat()
+    except FileNotFoundError:
+        p.write_bytes(data)
+    else:
+        # 大小不同就不必读回比较
+        if not (stat.S_ISREG(st.st_mode) and st.st_size == len(data) and p.read_bytes() == data):
+            atomic_write(p, data)
     return str(p.resolve())
 
 
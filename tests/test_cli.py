@@ -5,6 +5,8 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+import pytest
+
 
 def test_main_without_args_enters_project_wizard(monkeypatch) -> None:
     """无参数启动时进入项目向导"""
@@ -172,3 +174,90 @@ def test_main_loads_summary_settings_from_ini(monkeypatch, tmp_path: Path, capsy
     assert config.summary_trigger_bytes == 4567890
     assert config.summary_keep_recent_messages == 9
     assert config.summary_keep_recent_log_entries == 7
+
+
+def test_task_wizard_reads_piped_input(monkeypatch, tmp_path: Path, capsys) -> None:
+    """stdin 非终端时一次性读入全部输入，逐行回答向导问题并保存任务列表"""
+    import io
+
+    from agent_system.task_wizard import run_task_wizard
+
+    def _no_input(prompt: str = "") -> str:
+        raise AssertionError("管道输入不应调用 input()")
+
+    target = tmp_path / "out.json"
+    answers = [
+        "重构存档模块", "", "", "", "2",
+        "拆分存档", "", "1", "",
+        "迁移旧数据", "兼容旧格式", "x", "3", "2", "T1, T9",
+        "", str(target),
+    ]
+    monkeypatch.setattr("builtins.input", _no_input)
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(answers) + "\n"))
+
+    assert run_task_wizard() == 0
+    out = capsys.readouterr().out
+    assert "  优先级(0最高~3最低，默认2): x\n" in out
+    assert "已保存任务列表" in out
+
+    payload = json.loads(target.read_text(encoding="utf-8"))
+    assert payload["goal"] == "重构存档模块"
+    assert payload["scope_in"] == "按目标默认范围"
+    assert [
+        (t["id"], t["title"], t["description"], t["priority"], t["phase"], t["dependencies"])
+        for t in payload["tasks"]
+    ] == [
+        ("T1", "拆分存档", "拆分存档", 1, 0, []),
+        ("T2", "迁移旧数据", "兼容旧格式", 3, 2, ["T1"]),
+    ]
+
+
+def test_task_wizard_piped_input_ends_early(monkeypatch, tmp_path: Path, capsys) -> None:
+    """管道输入在问答中途耗尽时按 EOF 退出向导，不保存文件"""
+    import io
+
+    from agent_system.task_wizard import run_task_wizard
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("sys.stdin", io.StringIO("重构存档模块\n\n"))
+
+    assert run_task_wizard() == 0
+    assert "已退出任务列表创建向导" in capsys.readouterr().out
+    assert not (tmp_path / "state").exists()
+
+
+def test_task_wizard_orjson_output_matches_json(monkeypatch, tmp_path: Path) -> None:
+    """安装 orjson 时保存的文件与标准库 json 回退路径逐字节相同"""
+    pytest.importorskip("orjson")
+    from datetime import datetime
+
+    from agent_system import task_wizard
+    from agent_system.task_wizard import WizardResult, WizardTask
+
+    class _FixedDatetime:
+        @staticmethod
+        def now() -> datetime:
+            return datetime(2024, 1, 2, 3, 4, 5)
+
+    monkeypatch.setattr(task_wizard, "datetime", _FixedDatetime)
+    result = WizardResult(
+        goal="重构 \"存档\" 模块\\",
+        scope_in="按目标默认范围",
+        scope_out="无",
+        constraints="控制字符\x01\t",
+        project_name="demo",
+        tasks=[
+            WizardTask(id="T1", title="拆分存档", description="拆分存档", priority=1),
+            WizardTask(
+                id="T2", title="迁移", description="兼容 旧格式", priority=3,
+                phase=2, category="数据", dependencies=["T1"],
+            ),
+        ],
+    )
+
+    saved = task_wizard._save_result(lambda prompt: str(tmp_path / "a.json"), result)
+    monkeypatch.setattr(task_wizard, "orjson", None)
+    fallback = task_wizard._save_result(lambda prompt: str(tmp_path / "b.json"), result)
+
+    assert saved.read_bytes() == fallback.read_bytes()
+    assert json.loads(saved.read_bytes())["tasks"][1]["dependencies"] == ["T1"]
@@ -5,6 +5,8 @@ from __future__ import annotations
 import json
 from types import SimpleNamespace
 
+import pytest
+
 from agent_system.services.conversation_logger import ConversationLog
 
 
@@ -227,7 +229,7 @@ def test_tools_loop_done_reflection_triggers_finalization(monkeypatch) -> None:
         LLMResponse(content='{"passed": false, "issues": ["magic string"], "suggestions": [], "context_for_coder": ""}'),
     ]
 
-    def _fake_call(system_prompt, messages, tools=None, conversation_log=None, label="", enable_cache=True):
+    def _fake_call(system_prompt, messages, tools=None, conversation_log=None, label="", enable_cache=True, size_cache=None):
         return responses.pop(0)
 
     service.call = _fake_call  # type: ignore[method-assign]
@@ -288,7 +290,7 @@ def test_tools_loop_summarizes_old_messages_into_system_prompt() -> None:
 
     captured_calls: list[dict[str, object]] = []
 
-    def _fake_call(system_prompt, messages, tools=None, conversation_log=None, label="", enable_cache=True):
+    def _fake_call(system_prompt, messages, tools=None, conversation_log=None, label="", enable_cache=True, size_cache=None):
         captured_calls.append({
             "system_prompt": system_prompt,
             "messages": messages,
@@ -332,7 +334,7 @@ def test_tools_loop_summary_updates_conversation_log() -> None:
     service = object.__new__(LLMService)
     service._usage = TokenUsage()
 
-    def _fake_call(system_prompt, messages, tools=None, conversation_log=None, label="", enable_cache=True):
+    def _fake_call(system_prompt, messages, tools=None, conversation_log=None, label="", enable_cache=True, size_cache=None):
         if str(label).endswith("/摘要"):
             return LLMResponse(content="已完成历史对话压缩，保留任务目标、关键文件和未解决问题。")
         return LLMResponse(content="done", tool_calls=[])
@@ -371,7 +373,7 @@ def test_tools_loop_does_not_summarize_small_history() -> None:
 
     captured_labels: list[str] = []
 
-    def _fake_call(system_prompt, messages, tools=None, conversation_log=None, label="", enable_cache=True):
+    def _fake_call(system_prompt, messages, tools=None, conversation_log=None, label="", enable_cache=True, size_cache=None):
         captured_labels.append(str(label))
         return LLMResponse(content="final answer", tool_calls=[])
 
@@ -395,3 +397,178 @@ def test_tools_loop_does_not_summarize_small_history() -> None:
 
     assert result.content == "final answer"
     assert captured_labels == ["Reviewer/T9.3"]
+
+
+def test_tools_loop_size_cache_is_local_to_each_loop() -> None:
+    """消息尺寸缓存按循环传入 call，异常退出或并发循环都不会在实例上残留/共享缓存。"""
+    from agent_system.services.llm import LLMResponse, TokenUsage
+    from agent_system.services.llm import LLMService
+
+    service = object.__new__(LLMService)
+    service._usage = TokenUsage()
+
+    seen_caches: list[object] = []
+    fail = {"on": True}
+
+    def _fake_call(system_prompt, messages, tools=None, conversation_log=None, label="", enable_cache=True, size_cache=None):
+        seen_caches.append(size_cache)
+        if fail["on"]:
+            raise RuntimeError("boom")
+        return LLMResponse(content="final answer", tool_calls=[])
+
+    service.call = _fake_call  # type: ignore[method-assign]
+
+    def _run() -> LLMResponse:
+        return service.call_with_tools_loop(
+            system_prompt="reviewer prompt",
+            messages=[{"role": "user", "content": "hi"}],
+            tools=[{"name": "read_file"}],
+            tool_executor=_DummyToolExecutor(),
+            max_iterations=1,
+            soft_limit=30,
+            conversation_log=None,
+            label="Reviewer/T9.4",
+        )
+
+    with pytest.raises(RuntimeError):
+        _run()
+    fail["on"] = False
+    _run()
+
+    assert len(seen_caches) == 2
+    assert all(isinstance(cache, dict) for cache in seen_caches)
+    assert seen_caches[0] is not seen_caches[1]
+    assert not hasattr(service, "_msg_size_cache")
+
+
+def test_services_share_http_client_per_base_url() -> None:
+    """同一 base_url + timeout 的 LLMService 复用同一个 HTTP 连接池"""
+    from agent_system.services.llm import LLMService
+
+    first = LLMService(api_key="k1", base_url="http://127.0.0.1:9", timeout=12.0)
+    second = LLMService(api_key="k2", base_url="http://127.0.0.1:9", timeout=12.0)
+    other = LLMService(api_key="k3", base_url="http://127.0.0.1:9", timeout=34.0)
+
+    assert first._client._client is second._client._client
+    assert first._client._client is not other._client._client
+
+
+def test_estimate_request_payload_matches_full_serialization() -> None:
+    """逐条累加（含缓存）的字节数应与整体 json.dumps 一致"""
+    from agent_system.services.llm import _estimate_request_payload
+
+    messages = [
+        {"role": "user", "content": "你好"},
+        {"role": "assistant", "content": [{"type": "text", "text": "world"}]},
+        {"role": "user", "content": [{"type": "tool_result", "tool_use_id": "t1", "content": "ok"}]},
+    ]
+    tools = [{"name": "read_file", "input_schema": {"type": "object"}}]
+    expected = len(json.dumps({
+        "model": "",
+        "max_tokens": 0,
+        "temperature": 0,
+        "system": "sys",
+        "messages": messages,
+        "tools": tools,
+    }, ensure_ascii=False).encode("utf-8"))
+
+    cache: dict = {}
+    first = _estimate_request_payload("sys", messages, tools, cache)
+    second = _estimate_request_payload("sys", messages, tools, cache)
+
+    assert first["payload_bytes"] == expected
+    assert second == first
+    assert len(cache) == len(messages)
+
+
+def test_elide_stale_tool_results_keeps_recent_rounds() -> None:
+    """只省略最近 N 轮之前的冗长工具结果，并保留 tool_use_id"""
+    from agent_system.services.llm import _elide_stale_tool_results
+
+    messages: list[dict] = [{"role": "user", "content": "start"}]
+    for index in range(4):
+        messages.append({
+            "role": "assistant",
+            "content": [{"type": "tool_use", "id": f"t{index}", "name": "read_file", "input": {}}],
+        })
+        messages.append({
+            "role": "user",
+            "content": [{"type": "tool_result", "tool_use_id": f"t{index}", "content": "X" * 1000}],
+        })
+
+    result, elided = _elide_stale_tool_results(messages, keep_rounds=2, min_chars=500)
+
+    assert elided == 2
+    assert result[2]["content"][0] == {
+        "type": "tool_result",
+        "tool_use_id": "t0",
+        "content": "<elided 1000 chars; tool=read_file>",
+    }
+    assert result[8]["content"][0]["content"] == "X" * 1000
+    assert messages[2]["content"][0]["content"] == "X" * 1000
+    assert result[8] is messages[8]
+
+
+def test_think_tags_stripped_only_for_non_claude_models() -> None:
+    """<think> 过滤按模型开关：Claude 默认跳过，其他模型默认过滤"""
+    from agent_system.services.llm import LLMService
+
+    response = SimpleNamespace(
+        content=[SimpleNamespace(type="text", text="<think>推理</think> 答案 ")],
+        usage=SimpleNamespace(input_tokens=1, output_tokens=1),
+        stop_reason="end_turn",
+    )
+
+    claude = LLMService(api_key="k", model="claude-sonnet-4-20250514")
+    other = LLMService(api_key="k", model="qwen3-coder-plus")
+    for service in (claude, other):
+        service._call_with_retry = lambda label="", **kwargs: response  # type: ignore[method-assign]
+
+    assert claude._strip_think is False
+    assert other.call("sys", [{"role": "user", "content": "q"}], enable_cache=False).content == "答案"
+    assert claude.call("sys", [{"role": "user", "content": "q"}], enable_cache=False).content == "<think>推理</think> 答案"
+
+
+def test_execute_tool_calls_preserves_order_around_unsafe_tools() -> None:
+    """并行执行只读工具时结果按原顺序返回，有副作用的工具不与前后调用乱序"""
+    import threading
+    import time
+
+    from agent_system.services.llm import _execute_tool_calls
+
+    class _Executor:
+        def __init__(self) -> None:
+            self.events: list[str] = []
+            self._lock = threading.Lock()
+
+        def is_parallel_safe(self, name: str) -> bool:
+            return name == "read_file"
+
+        def execute(self, name: str, tool_input: dict[str, object]) -> str:
+            time.sleep(float(tool_input.get("delay", 0)))  # type: ignore[arg-type]
+            with self._lock:
+                self.events.append(f"{name}:{tool_input['id']}")
+            return f"{name}-{tool_input['id']}"
+
+    executor = _Executor()
+    calls = [
+        {"id": "a", "name": "read_file", "input": {"id": 1, "delay": 0.05}},
+        {"id": "b", "name": "read_file", "input": {"id": 2}},
+        {"id": "c", "name": "write_file", "input": {"id": 3}},
+        {"id": "d", "name": "read_file", "input": {"id": 4}},
+    ]
+
+    results = _execute_tool_calls(executor, calls)
+
+    assert results == ["read_file-1", "read_file-2", "write_file-3", "read_file-4"]
+    assert executor.events.index("write_file:3") == 2
+
+
+def test_strip_think_tags_handles_closed_and_unclosed_blocks() -> None:
+    """单个正则同时移除闭合与未闭合的 <think> 片段"""
+    from agent_system.services.llm import _strip_think_tags
+
+    assert _strip_think_tags("<think>a\nb</think>答案<think>c</think>!") == "答案!"
+    assert _strip_think_tags("前文<think>未闭合\n的思考") == "前文"
+    assert _strip_think_tags("<think>a<think>b</think>c") == "c"
+    assert _strip_think_tags(None) == ""
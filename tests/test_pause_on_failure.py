@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from io import StringIO
+from typing import Callable
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -15,118 +16,145 @@ from agent_system.orchestrator import Orchestrator
 from agent_system.services.email_approval import EmailApprovalDecision
 
 
-def _make_orchestrator(dry_run: bool = True) -> Orchestrator:
-    """创建最小化 Orchestrator（无需真实 LLM）"""
-    config = ProjectConfig(
-        project_name="test",
-        project_description="测试",
-        project_root=".",
-    )
-    agent_config = AgentConfig(dry_run=dry_run)
-    ctx = AgentContext(project=config, config=agent_config)
-    ctx.task_queue = []
-
-    mock_planner = MagicMock()
-    orch = Orchestrator(
-        config=agent_config,
-        planner=mock_planner,
-        analyst=MagicMock(),
-        coder=MagicMock(),
-        reviewer=MagicMock(),
-        reflector=MagicMock(),
-        supervisor=MagicMock(),
-        context=ctx,
-    )
-    return orch
+OrchFactory = Callable[..., Orchestrator]
 
 
-def _make_failed_task(status: TaskStatus = TaskStatus.FAILED) -> Task:
-    task = Task(id="T1", title="测试任务", description="desc")
-    task.status = status
-    task.error = "审查未通过: some error"
-    return task
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch: pytest.MonkeyPatch) -> None:
+    """屏蔽主循环等待 / 邮件轮询中的 time.sleep，测试不产生真实等待"""
+    monkeypatch.setattr("time.sleep", lambda *_: None)
 
 
-class TestPromptUserHint:
-    """_prompt_user_hint 单元测试"""
+@pytest.fixture(scope="module")
+def orch_factory() -> OrchFactory:
+    """最小化 Orchestrator 工厂（无需真实 LLM）
 
-    def test_empty_input_returns_false(self) -> None:
-        """用户直接回车（空输入）→ 返回 False，不继续"""
-        orch = _make_orchestrator()
-        task = _make_failed_task()
+    项目配置与 AgentConfig 在模块内只构造一次（Orchestrator 不修改它们）；
+    每次调用返回带全新上下文与 mock agent 的实例，测试之间不共享可变状态。
+    邮件审批的轮询间隔设为 0，即使真实的 EmailApprovalService 被接入也不会等待。
+    """
+    agent_config = AgentConfig(dry_run=True)
+    projects = {
+        enabled: ProjectConfig(
+            project_name="test",
+            project_description="测试",
+            project_root=".",
+            email_approval=EmailApprovalConfig(enabled=enabled, poll_interval_sec=0),
+        )
+        for enabled in (False, True)
+    }
 
-        with patch("sys.stdin") as mock_stdin:
-            mock_stdin.isatty.return_value = True
-            with patch("builtins.input", return_value=""):
-                result = orch._prompt_user_hint(task)
+    def make(
+        tasks: list[Task] | None = None,
+        planner: MagicMock | None = None,
+        email_approval: bool = False,
+    ) -> Orchestrator:
+        ctx = AgentContext(
+            project=projects[email_approval],
+            config=agent_config,
+            task_queue=list(tasks or []),
+        )
+        return Orchestrator(
+            config=agent_config,
+            planner=planner or MagicMock(),
+            analyst=MagicMock(),
+            coder=MagicMock(),
+            reviewer=MagicMock(),
+            reflector=MagicMock(),
+            supervisor=MagicMock(),
+            context=ctx,
+        )
 
-        assert result is False
-        # 任务状态不变
-        assert task.status == TaskStatus.FAILED
+    return make
 
-    def test_hint_input_returns_true_and_resets_task(self) -> None:
-        """用户输入提示词 → 返回 True，任务重置为 PENDING，hint 已设置"""
-        orch = _make_orchestrator()
-        task = _make_failed_task()
-        task.retry_count = 5
 
-        with patch("sys.stdin") as mock_stdin:
-            mock_stdin.isatty.return_value = True
-            with patch("builtins.input", return_value="请修复第10行的类型错误"):
-                result = orch._prompt_user_hint(task)
+def _stub_run_loop(
+    orch: Orchestrator,
+    monkeypatch: pytest.MonkeyPatch,
+    fake_run_single: Callable[[Task], None] | None = None,
+) -> None:
+    """run() 测试只关心主循环：屏蔽状态保存与报告输出，可选替换 run_single_task"""
+    if fake_run_single is not None:
+        monkeypatch.setattr(orch, "run_single_task", MagicMock(side_effect=fake_run_single))
+    monkeypatch.setattr(orch, "_save_state", MagicMock())
+    monkeypatch.setattr(orch, "_print_report", MagicMock())
 
-        assert result is True
-        assert task.status == TaskStatus.PENDING
-        assert task.retry_count == 0
-        assert task.error is None
-        assert task.supervisor_hint == "请修复第10行的类型错误"
 
-    def test_non_tty_returns_false(self) -> None:
-        """非交互式环境（stdin 非 TTY）→ 自动返回 False"""
-        orch = _make_orchestrator()
-        task = _make_failed_task()
+@pytest.fixture
+def tty_stdin(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    """替换 sys.stdin 为交互式终端（isatty() 为 True）"""
+    stdin = MagicMock()
+    stdin.isatty.return_value = True
+    monkeypatch.setattr("sys.stdin", stdin)
+    return stdin
 
-        with patch("sys.stdin") as mock_stdin:
-            mock_stdin.isatty.return_value = False
-            result = orch._prompt_user_hint(task)
 
-        assert result is False
+def _make_failed_task(status: TaskStatus = TaskStatus.FAILED) -> Task:
+    task = Task(id="T1", title="测试任务", description="desc")
+    task.status = status
+    task.error = "审查未通过: some error"
+    return task
 
-    def test_eof_returns_false(self) -> None:
-        """stdin 抛出 EOFError（如管道输入结束）→ 返回 False"""
-        orch = _make_orchestrator()
-        task = _make_failed_task()
 
-        with patch("sys.stdin") as mock_stdin:
-            mock_stdin.isatty.return_value = True
-            with patch("builtins.input", side_effect=EOFError):
-                result = orch._prompt_user_hint(task)
+class TestPromptUserHint:
+    """_prompt_user_hint 单元测试"""
 
-        assert result is False
+    @pytest.mark.parametrize(
+        ("initial_status", "user_input", "expected", "expected_status", "expected_hint"),
+        [
+            # 用户直接回车（空输入）→ 返回 False，不继续，任务状态不变
+            (TaskStatus.FAILED, "", False, TaskStatus.FAILED, None),
+            # 用户输入提示词 → 返回 True，任务重置为 PENDING，hint 已设置
+            (TaskStatus.FAILED, "请修复第10行的类型错误", True, TaskStatus.PENDING, "请修复第10行的类型错误"),
+            # 纯空白输入应视为空（不继续）
+            (TaskStatus.FAILED, "   ", False, TaskStatus.FAILED, None),
+            # stdin 抛出 EOFError（如管道输入结束）→ 返回 False
+            (TaskStatus.FAILED, EOFError, False, TaskStatus.FAILED, None),
+            # BLOCKED 任务也应触发暂停并可重置
+            (TaskStatus.BLOCKED, "绕过依赖，直接实现", True, TaskStatus.PENDING, "绕过依赖，直接实现"),
+        ],
+        ids=["empty", "hint", "whitespace", "eof", "blocked"],
+    )
+    def test_prompt(
+        self,
+        orch_factory: OrchFactory,
+        tty_stdin: MagicMock,
+        monkeypatch: pytest.MonkeyPatch,
+        initial_status: TaskStatus,
+        user_input: str | type[BaseException],
+        expected: bool,
+        expected_status: TaskStatus,
+        expected_hint: str | None,
+    ) -> None:
+        """TTY 下按用户输入决定是否重置任务并继续"""
+        orch = orch_factory()
+        task = _make_failed_task(status=initial_status)
+        task.retry_count = 5
 
-    def test_blocked_task_also_triggers_pause(self) -> None:
-        """BLOCKED 任务也应触发暂停并可重置"""
-        orch = _make_orchestrator()
-        task = _make_failed_task(status=TaskStatus.BLOCKED)
+        def fake_input(prompt: str = "") -> str:
+            if isinstance(user_input, type):
+                raise user_input
+            return user_input
 
-        with patch("sys.stdin") as mock_stdin:
-            mock_stdin.isatty.return_value = True
-            with patch("builtins.input", return_value="绕过依赖，直接实现"):
-                result = orch._prompt_user_hint(task)
+        monkeypatch.setattr("builtins.input", fake_input)
+        result = orch._prompt_user_hint(task)
 
-        assert result is True
-        assert task.status == TaskStatus.PENDING
-        assert task.supervisor_hint == "绕过依赖，直接实现"
+        assert result is expected
+        assert task.status == expected_status
+        assert task.supervisor_hint == expected_hint
+        if expected:
+            assert task.retry_count == 0
+            assert task.error is None
+        else:
+            assert task.error is not None
 
-    def test_whitespace_only_input_treated_as_empty(self) -> None:
-        """纯空白输入应视为空（不继续）"""
-        orch = _make_orchestrator()
+    def test_non_tty_returns_false(self, orch_factory: OrchFactory, tty_stdin: MagicMock) -> None:
+        """非交互式环境（stdin 非 TTY）→ 自动返回 False"""
+        orch = orch_factory()
         task = _make_failed_task()
+        tty_stdin.isatty.return_value = False
 
-        with patch("sys.stdin") as mock_stdin:
-            mock_stdin.isatty.return_value = True
-            with patch("builtins.input", return_value="   "):
-                result = orch._prompt_user_hint(task)
+        result = orch._prompt_user_hint(task)
 
         assert result is False
 
@@ -136,6 +164,8 @@ class TestRunPausesOnFailure:
 
     def _make_run_orchestrator(
         self,
+        orch_factory: OrchFactory,
+        monkeypatch: pytest.MonkeyPatch,
         task_statuses_after_run: list[TaskStatus],
     ) -> Orchestrator:
         """构造一个 run() 可执行的 Orchestrator：
@@ -143,68 +173,42 @@ class TestRunPausesOnFailure:
         - planner.get_next_pending 依次返回任务，最终返回 None
         - run_single_task 被 mock，副作用是设置任务 status
         """
-        config = ProjectConfig(
-            project_name="test",
-            project_description="测试",
-            project_root=".",
-        )
-        agent_config = AgentConfig(dry_run=True)
-        ctx = AgentContext(project=config, config=agent_config)
-
         tasks = [
             Task(id=f"T{i}", title=f"任务{i}", description="desc")
             for i in range(len(task_statuses_after_run))
         ]
-        ctx.task_queue = tasks
 
         mock_planner = MagicMock()
         # get_next_pending 依次返回各任务，最后返回 None
         mock_planner.get_next_pending.side_effect = tasks + [None]
 
-        orch = Orchestrator(
-            config=agent_config,
-            planner=mock_planner,
-            analyst=MagicMock(),
-            coder=MagicMock(),
-            reviewer=MagicMock(),
-            reflector=MagicMock(),
-            supervisor=MagicMock(),
-            context=ctx,
-        )
+        orch = orch_factory(tasks=tasks, planner=mock_planner)
 
         # run_single_task 的副作用：设置对应任务状态
         def fake_run_single(task: Task) -> None:
             idx = tasks.index(task)
             task.status = task_statuses_after_run[idx]
 
-        orch.run_single_task = MagicMock(side_effect=fake_run_single)  # type: ignore[method-assign]
-        orch._save_state = MagicMock()  # type: ignore[method-assign]
-        orch._print_report = MagicMock()  # type: ignore[method-assign]
+        _stub_run_loop(orch, monkeypatch, fake_run_single)
         return orch
 
-    def test_run_stops_when_user_gives_empty_input_after_failure(self) -> None:
+    def test_run_stops_when_user_gives_empty_input_after_failure(
+        self, orch_factory: OrchFactory, tty_stdin: MagicMock, monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
         """任务 FAILED + 用户回车 → run() 停止，后续任务不执行"""
-        orch = self._make_run_orchestrator([TaskStatus.FAILED, TaskStatus.DONE])
+        orch = self._make_run_orchestrator(orch_factory, monkeypatch, [TaskStatus.FAILED, TaskStatus.DONE])
 
-        with patch("sys.stdin") as mock_stdin:
-            mock_stdin.isatty.return_value = True
-            with patch("builtins.input", return_value=""):
-                orch.run()
+        monkeypatch.setattr("builtins.input", lambda prompt="": "")
+        orch.run()
 
         # 第一个任务的 run_single_task 被调用，第二个不应被调用
         assert orch.run_single_task.call_count == 1  # type: ignore[attr-defined]
 
-    def test_run_continues_when_user_provides_hint_after_failure(self) -> None:
+    def test_run_continues_when_user_provides_hint_after_failure(
+        self, orch_factory: OrchFactory, tty_stdin: MagicMock, monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
         """任务 FAILED + 用户输入提示词 → 任务重置为 PENDING，继续执行"""
         tasks = [Task(id="T0", title="任务0", description="desc")]
-        config = ProjectConfig(
-            project_name="test",
-            project_description="测试",
-            project_root=".",
-        )
-        agent_config = AgentConfig(dry_run=True)
-        ctx = AgentContext(project=config, config=agent_config)
-        ctx.task_queue = tasks
 
         mock_planner = MagicMock()
         call_count = {"n": 0}
@@ -229,19 +233,8 @@ class TestRunPausesOnFailure:
             else:
                 task.status = TaskStatus.DONE
 
-        orch = Orchestrator(
-            config=agent_config,
-            planner=mock_planner,
-            analyst=MagicMock(),
-            coder=MagicMock(),
-            reviewer=MagicMock(),
-            reflector=MagicMock(),
-            supervisor=MagicMock(),
-            context=ctx,
-        )
-        orch.run_single_task = MagicMock(side_effect=fake_run_single)  # type: ignore[method-assign]
-        orch._save_state = MagicMock()  # type: ignore[method-assign]
-        orch._print_report = MagicMock()  # type: ignore[method-assign]
+        orch = orch_factory(tasks=tasks, planner=mock_planner)
+        _stub_run_loop(orch, monkeypatch, fake_run_single)
 
         input_calls = {"n": 0}
 
@@ -249,10 +242,8 @@ class TestRunPausesOnFailure:
             input_calls["n"] += 1
             return "修复提示词" if input_calls["n"] == 1 else ""
 
-        with patch("sys.stdin") as mock_stdin:
-            mock_stdin.isatty.return_value = True
-            with patch("builtins.input", side_effect=mock_input):
-                orch.run()
+        monkeypatch.setattr("builtins.input", mock_input)
+        orch.run()
 
         # 任务被执行两次（失败后重试）
         assert orch.run_single_task.call_count == 2  # type: ignore[attr-defined]
@@ -262,30 +253,9 @@ class TestRunPausesOnFailure:
 class TestEmailApprovalOnBlocked:
     """BLOCKED 状态下邮件审批控制测试"""
 
-    def _make_blocked_orchestrator(self) -> Orchestrator:
-        config = ProjectConfig(
-            project_name="test",
-            project_description="测试",
-            project_root=".",
-            email_approval=EmailApprovalConfig(enabled=True),
-        )
-        agent_config = AgentConfig(dry_run=True)
-        ctx = AgentContext(project=config, config=agent_config)
-        orch = Orchestrator(
-            config=agent_config,
-            planner=MagicMock(),
-            analyst=MagicMock(),
-            coder=MagicMock(),
-            reviewer=MagicMock(),
-            reflector=MagicMock(),
-            supervisor=MagicMock(),
-            context=ctx,
-        )
-        return orch
-
-    def test_blocked_continue_by_email(self) -> None:
+    def test_blocked_continue_by_email(self, orch_factory: OrchFactory, monkeypatch: pytest.MonkeyPatch) -> None:
         """邮件回复 CONTINUE 时，任务应重置为 pending 并继续"""
-        orch = self._make_blocked_orchestrator()
+        orch = orch_factory(email_approval=True)
         task = Task(id="T1", title="测试任务", description="desc", status=TaskStatus.BLOCKED)
         task.error = "[Supervisor] waiting"
 
@@ -295,7 +265,7 @@ class TestEmailApprovalOnBlocked:
             hint="请优先修复类型不匹配",
             sender="user@example.com",
         )
-        orch._email_approval = mock_email  # type: ignore[attr-defined]
+        monkeypatch.setattr(orch, "_email_approval", mock_email)
 
         result = orch._handle_paused_task(task)
 
@@ -309,9 +279,9 @@ class TestEmailApprovalOnBlocked:
         assert "progress_summary" in kwargs
         assert "总任务" in kwargs["progress_summary"]
 
-    def test_blocked_stop_by_email(self) -> None:
+    def test_blocked_stop_by_email(self, orch_factory: OrchFactory, monkeypatch: pytest.MonkeyPatch) -> None:
         """邮件回复 STOP 时，任务保持阻塞并停止主循环"""
-        orch = self._make_blocked_orchestrator()
+        orch = orch_factory(email_approval=True)
         task = Task(id="T2", title="测试任务2", description="desc", status=TaskStatus.BLOCKED)
         task.error = "[Supervisor] waiting"
 
@@ -320,7 +290,7 @@ class TestEmailApprovalOnBlocked:
             action="stop",
             sender="user@example.com",
         )
-        orch._email_approval = mock_email  # type: ignore[attr-defined]
+        monkeypatch.setattr(orch, "_email_approval", mock_email)
 
         result = orch._handle_paused_task(task)
 
@@ -332,7 +302,9 @@ class TestEmailApprovalOnBlocked:
 class TestExitReason:
     """主循环退出原因输出测试"""
 
-    def test_print_reason_when_pending_tasks_not_ready(self) -> None:
+    def test_print_reason_when_pending_tasks_not_ready(
+        self, orch_factory: OrchFactory, monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
         pending_task = Task(
             id="T-P1",
             title="等待任务",
@@ -340,32 +312,13 @@ class TestExitReason:
             status=TaskStatus.PENDING,
             dependencies=["T-DONE-NEEDED"],
         )
-        ctx = AgentContext(
-            project=ProjectConfig(
-                project_name="test",
-                project_description="测试",
-                project_root=".",
-            ),
-            config=AgentConfig(dry_run=True),
-            task_queue=[pending_task],
-        )
 
         planner = MagicMock()
         planner.get_next_pending.return_value = None
         planner.check_dependencies.return_value = DependencyStatus.BLOCKED
 
-        orch = Orchestrator(
-            config=ctx.config,
-            planner=planner,
-            analyst=MagicMock(),
-            coder=MagicMock(),
-            reviewer=MagicMock(),
-            reflector=MagicMock(),
-            supervisor=MagicMock(),
-            context=ctx,
-        )
-        orch._save_state = MagicMock()  # type: ignore[method-assign]
-        orch._print_report = MagicMock()  # type: ignore[method-assign]
+        orch = orch_factory(tasks=[pending_task], planner=planner)
+        _stub_run_loop(orch, monkeypatch)
 
         with patch("builtins.print") as mock_print:
             orch.run()
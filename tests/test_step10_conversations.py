@@ -104,6 +104,27 @@ class TestConversationLog:
 
 # ── ConversationLogger ─────────────────────────────────────────
 
+_CORPUS_TASK = "T-CORPUS"
+_CORPUS_AGENTS = ("analyst", "coder", "reviewer")
+
+
+@pytest.fixture(scope="module")
+def conv_corpus(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """模块内共享的只读对话日志目录：同一任务下 analyst / coder / reviewer 各一条对话
+
+    只读取不修改的测试直接使用，省掉逐个测试重复 start + finish_and_save 写盘。
+    """
+    root = tmp_path_factory.mktemp("conv")
+    cl = ConversationLogger(root)
+    for agent in _CORPUS_AGENTS:
+        log = cl.start(_CORPUS_TASK, agent)
+        log.add_user(f"{agent} message")
+        log.add_assistant(f"{agent} response")
+        log.add_token_usage(10, 20)
+        cl.finish_and_save()
+    return root
+
+
 class TestConversationLogger:
     """ConversationLogger 持久化测试"""
 
@@ -154,19 +175,11 @@ class TestConversationLogger:
         assert filepath.exists()
         assert "/" not in filepath.parent.name
 
-    def test_multiple_conversations(self, tmp_path: Path) -> None:
-        """同一任务多次对话"""
-        cl = ConversationLogger(tmp_path)
-
-        for agent in ["analyst", "coder", "reviewer"]:
-            log = cl.start("T-1", agent)
-            log.add_user(f"{agent} message")
-            log.add_assistant(f"{agent} response")
-            log.add_token_usage(10, 20)
-            cl.finish_and_save()
-
-        files = list_task_conversations(tmp_path, "T-1")
-        assert len(files) == 3
+    def test_multiple_conversations(self, conv_corpus: Path) -> None:
+        """同一任务多次对话各自保存为独立文件"""
+        files = list_task_conversations(conv_corpus, _CORPUS_TASK)
+        assert len(files) == len(_CORPUS_AGENTS)
+        assert len(set(files)) == len(files)
 
 
 # ── load / list helpers ────────────────────────────────────────
@@ -174,33 +187,24 @@ class TestConversationLogger:
 class TestConversationHelpers:
     """辅助函数测试"""
 
-    def test_load_conversation(self, tmp_path: Path) -> None:
+    def test_load_conversation(self, conv_corpus: Path) -> None:
         """加载对话文件"""
-        cl = ConversationLogger(tmp_path)
-        log = cl.start("T-1", "analyst")
-        log.add_user("hello")
-        filepath = cl.finish_and_save()
-        assert filepath is not None
+        filepath = list_task_conversations(conv_corpus, _CORPUS_TASK)[0]
 
         data = load_conversation(filepath)
-        assert data["task_id"] == "T-1"
-        assert len(data["entries"]) == 1
+        assert data["task_id"] == _CORPUS_TASK
+        assert data["agent_name"] == "analyst"
+        assert len(data["entries"]) == 2
 
     def test_load_nonexistent(self) -> None:
         """文件不存在"""
         data = load_conversation("/no/file.json")
         assert "error" in data
 
-    def test_list_task_conversations(self, tmp_path: Path) -> None:
-        """列出任务对话"""
-        cl = ConversationLogger(tmp_path)
-        for agent in ["analyst", "coder"]:
-            log = cl.start("T-2", agent)
-            log.add_user("test")
-            cl.finish_and_save()
-
-        files = list_task_conversations(tmp_path, "T-2")
-        assert len(files) == 2
+    def test_list_task_conversations(self, conv_corpus: Path) -> None:
+        """列出任务对话（按文件名排序）"""
+        files = list_task_conversations(conv_corpus, _CORPUS_TASK)
+        assert [f.name.split("_", 1)[0] for f in files] == list(_CORPUS_AGENTS)
 
     def test_list_nonexistent_task(self, tmp_path: Path) -> None:
         """任务不存在"""
@@ -244,11 +248,38 @@ class TestLLMConversationLogging:
 
 # ── Orchestrator 集成 ───────────────────────────────────────────
 
+class _CountingLogger:
+    """内存版 ConversationLogger：接口与真实实现一致，只记录保存了哪些对话，不写盘"""
+
+    def __init__(self) -> None:
+        self.saved: list[tuple[str, str]] = []
+        self.active_log: ConversationLog | None = None
+
+    def start(self, task_id: str, agent_name: str) -> ConversationLog:
+        self.active_log = ConversationLog(task_id=task_id, agent_name=agent_name)
+        return self.active_log
+
+    def discard(self) -> None:
+        self.active_log = None
+
+    def finish_and_save(self) -> Path | None:
+        if self.active_log is None:
+            return None
+        log = self.active_log
+        log.finish()
+        self.saved.append((log.task_id, log.agent_name))
+        self.active_log = None
+        return Path(log.task_id) / f"{log.agent_name}.json"
+
+    def save_active_log_now(self) -> Path | None:
+        return self.finish_and_save()
+
+
 class TestOrchestratorConversationLogging:
     """Orchestrator 对话日志集成"""
 
     def test_conversations_saved_on_task(self, tmp_path: Path) -> None:
-        """任务执行时保存对话日志"""
+        """任务执行时每个 agent 各保存一次对话日志（落盘格式由 test_start_and_save 覆盖）"""
         from agent_system.orchestrator import Orchestrator
         from agent_system.agents.coder import CodeChanges, FileChange
         from agent_system.agents.reflector import ReflectionReport
@@ -260,6 +291,7 @@ class TestOrchestratorConversationLogging:
         project.coding_conventions = ""
         project.review_checklist = []
         project.review_commands = []
+        project.mcp_servers = []
         project.project_root = str(tmp_path)
         context = AgentContext(project=project, config=AgentConfig())
 
@@ -278,8 +310,8 @@ class TestOrchestratorConversationLogging:
             context=context,
         )
 
-        conv_dir = tmp_path / "agent-system" / "conversations"
-        orch._conversation_logger = ConversationLogger(conv_dir)
+        conv_logger = _CountingLogger()
+        orch._conversation_logger = conv_logger  # type: ignore[assignment]
         orch._reflections_dir = tmp_path / "agent-system" / "reflections"
         orch._reflections_dir.mkdir(parents=True, exist_ok=True)
         orch._state_store = MagicMock()
@@ -294,8 +326,9 @@ class TestOrchestratorConversationLogging:
 
         assert task.status == TaskStatus.DONE
         # 应有 analyst + coder + reviewer + reflector = 4 个对话日志
-        files = list(conv_dir.rglob("*.json"))
-        assert len(files) == 4
+        assert conv_logger.saved == [
+            ("T-1", agent) for agent in ("analyst", "coder", "reviewer", "reflector")
+        ]
 
     def test_no_logger_still_works(self) -> None:
         """无 ConversationLogger 时不影响运行"""
@@ -309,6 +342,7 @@ class TestOrchestratorConversationLogging:
         project.coding_conventions = ""
         project.review_checklist = []
         project.review_commands = []
+        project.mcp_servers = []
         project.project_root = "/test"
         context = AgentContext(project=project, config=AgentConfig())
 
@@ -1,6 +1,8 @@
 """Step 2 测试：数据模型 + 服务层"""
 
 import json
+import logging
+import sys
 import tempfile
 from pathlib import Path
 
@@ -12,6 +14,8 @@ from agent_system.models.context import AgentConfig, AgentContext
 from agent_system.services.state_store import StateStore
 from agent_system.services.git_service import GitService
 from agent_system.services.file_service import FileService
+from agent_system.services.path_guard import PathGuard
+from agent_system.services.logging_formatter import ExecutorColorFormatter
 
 FIXTURES = Path(__file__).parent / "fixtures"
 
@@ -222,6 +226,97 @@ class TestFileService:
             assert deleted_again is False
 
 
+class TestPathGuard:
+    """PathGuard 路径约束测试"""
+
+    def test_symlink_repointed_after_validation(self, tmp_path: Path) -> None:
+        """已验证过的路径被改成指向根目录外的符号链接后，再次验证应拒绝"""
+        root = tmp_path / "root"
+        root.mkdir()
+        outside = tmp_path / "outside.txt"
+        outside.write_text("secret", encoding="utf-8")
+        guard = PathGuard([str(root)], str(root))
+
+        target = root / "out.txt"
+        target.write_text("ok", encoding="utf-8")
+        resolved, err = guard.validate_file("out.txt")
+        assert err is None and resolved == str(target.resolve())
+
+        target.unlink()
+        target.symlink_to(outside)
+        resolved, err = guard.validate_file("out.txt")
+        assert resolved is None
+        assert err is not None and "不在允许范围" in err
+        assert guard.clamp_dir(str(target))[1] is not None
+
+    def test_default_base_change(self, tmp_path: Path) -> None:
+        """修改 default_base 后，相对路径按新的基准目录解析"""
+        a = tmp_path / "a"
+        b = tmp_path / "b"
+        a.mkdir()
+        b.mkdir()
+        guard = PathGuard([str(tmp_path)], str(a))
+        assert guard.resolve_path("x.ts") == (a / "x.ts").resolve()
+
+        guard.default_base = b.resolve()
+        assert guard.resolve_path("x.ts") == (b / "x.ts").resolve()
+        assert guard.validate_file("x.ts") == (str((b / "x.ts").resolve()), None)
+
+
+class TestExecutorColorFormatter:
+    """ExecutorColorFormatter 着色测试"""
+
+    _FMT = "[%(levelname)s] %(name)s: %(message)s"
+
+    @staticmethod
+    def _record(
+        msg: str,
+        level: int = logging.INFO,
+        name: str = "agent",
+        exc_info: object = None,
+    ) -> logging.LogRecord:
+        return logging.LogRecord(name, level, __file__, 1, msg, None, exc_info)
+
+    def test_executor_tag_color(self) -> None:
+        """消息含 executor 标签时按 executor 着色，整行包在颜色与重置符之间"""
+        fmt = ExecutorColorFormatter(self._FMT, use_color=True)
+        record = self._record("    [Coder/T1] 开始编码", level=logging.WARNING)
+
+        text = fmt.format(record)
+
+        assert text == "\x1b[32m[WARNING] agent:     [Coder/T1] 开始编码\x1b[0m"
+        assert not hasattr(record, "color") and not hasattr(record, "reset")
+
+    def test_tag_outside_message(self) -> None:
+        """executor 标签按整行判定，出现在 logger 名中同样生效"""
+        fmt = ExecutorColorFormatter(self._FMT, use_color=True)
+        text = fmt.format(self._record("done", name="[Reviewer]"))
+        assert text.startswith("\x1b[35m")
+
+    def test_level_fallback(self) -> None:
+        """无 executor 标签时按日志级别着色；关闭颜色时原样输出"""
+        fmt = ExecutorColorFormatter(self._FMT, use_color=True)
+        assert fmt.format(self._record("x", level=logging.ERROR)) == "\x1b[31m[ERROR] agent: x\x1b[0m"
+        assert fmt.format(self._record("x", level=logging.DEBUG)).startswith("\x1b[90m")
+
+        plain = ExecutorColorFormatter(self._FMT, use_color=False)
+        assert plain.format(self._record("[Coder] x")) == "[INFO] agent: [Coder] x"
+
+    def test_exc_info_colored(self) -> None:
+        """traceback 与消息同色，重置符位于整段输出末尾"""
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            exc_info = sys.exc_info()
+        fmt = ExecutorColorFormatter(self._FMT, use_color=True)
+
+        text = fmt.format(self._record("[Analyst] 失败", level=logging.ERROR, exc_info=exc_info))
+
+        assert text.startswith("\x1b[36m[ERROR] agent: [Analyst] 失败\nTraceback")
+        assert text.endswith("ValueError: boom\x1b[0m")
+        assert text.count("\x1b[0m") == 1
+
+
 class TestAgentContext:
     """AgentContext 基本测试"""
 
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import json
+import os
 import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock
@@ -36,6 +37,47 @@ class TestReadFileTool:
         lines = result.strip().splitlines()
         assert len(lines) <= 5
 
+    def test_reread_after_modify(self, tmp_path: Path) -> None:
+        """分段重复读取同一文件；文件修改后读到新内容"""
+        f = tmp_path / "a.txt"
+        f.write_text("l1\nl2\nl3\n", encoding="utf-8")
+        assert read_file_tool(str(f), start=1, end=2) == "l1\nl2\n"
+        assert read_file_tool(str(f), start=2) == "l2\nl3\n"
+
+        f.write_text("n1\nn2\n", encoding="utf-8")
+        st = f.stat()
+        os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert read_file_tool(str(f)) == "n1\nn2\n"
+
+    def test_read_range_large_file(self, tmp_path: Path) -> None:
+        """大文件按行范围读取（mmap 路径），CRLF 与中文与小文件路径结果一致"""
+        f = tmp_path / "big.txt"
+        lines = [f"第{i}行 {'x' * 40}" for i in range(30000)]
+        f.write_bytes("\r\n".join(lines).encode("utf-8"))
+        assert f.stat().st_size > 1024 * 1024
+
+        assert read_file_tool(str(f), start=1, end=2) == f"{lines[0]}\n{lines[1]}\n"
+        assert read_file_tool(str(f), start=15000, end=15000) == lines[14999] + "\n"
+        assert read_file_tool(str(f), start=29999) == f"{lines[29998]}\n{lines[29999]}"
+        assert read_file_tool(str(f), start=40000) == ""
+
+    def test_head_read_skips_full_file(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """中等大小文件只读开头若干行时，只扫描到 end 行，不整读全文件也不建偏移表"""
+        from agent_system.tools import read_file
+
+        f = tmp_path / "mid.ts"
+        lines = [f"export const v{i} = {i};" for i in range(8000)]
+        f.write_text("\n".join(lines), encoding="utf-8")
+        assert 64 * 1024 < f.stat().st_size < 1024 * 1024
+
+        def fail(*args: object) -> None:
+            raise AssertionError("不应读取整个文件")
+
+        monkeypatch.setattr(read_file, "_read_lines_cached", fail)
+        monkeypatch.setattr(read_file, "_newline_offsets", fail)
+        assert read_file_tool(str(f), start=1, end=20) == "".join(f"{line}\n" for line in lines[:20])
+        assert read_file_tool(str(f), start=100, end=101) == f"{lines[99]}\n{lines[100]}\n"
+
     def test_read_nonexistent(self) -> None:
         """读取不存在的文件 → FileNotFoundError"""
         with pytest.raises(FileNotFoundError):
@@ -54,6 +96,28 @@ class TestReadFileTool:
         assert "content" in data["files"][0]
         assert "content" in data["files"][1]
 
+    def test_batch_read_keeps_order_and_errors(self, tmp_path: Path) -> None:
+        """批量并行读取：结果按请求顺序返回，缺失文件单独给出 error"""
+        paths = []
+        for i in range(12):
+            f = tmp_path / f"f{i}.txt"
+            f.write_text(f"file {i}\n", encoding="utf-8")
+            paths.append(str(f))
+        paths.insert(5, str(tmp_path / "missing.txt"))
+
+        data = json.loads(read_files_tool(paths=paths))
+        assert [item["path"] for item in data["files"]] == paths
+        assert "不存在" in data["files"][5]["error"]
+        assert data["files"][6]["content"] == "file 5\n"
+
+    def test_batch_read_unencodable_path(self, tmp_path: Path) -> None:
+        """路径含孤立代理字符时仍返回合法 JSON（orjson 拒绝时回退标准库）"""
+        bad = str(tmp_path / "bad\udcff.txt")
+        data = json.loads(read_files_tool(paths=[bad, str(FIXTURES / "sample.lua")]))
+        assert data["files"][0]["path"] == bad
+        assert "error" in data["files"][0]
+        assert "function" in data["files"][1]["content"]
+
 
 class TestSearchFileTool:
     """search_file 工具测试"""
@@ -74,6 +138,122 @@ class TestSearchFileTool:
         results = search_file_tool(str(FIXTURES), pattern="*", regex=r"sample")
         assert len(results) >= 1
 
+    def test_walk_follows_dir_symlinks(self, tmp_path: Path) -> None:
+        """目录遍历沿用 DirEntry 缓存的类型，但仍会进入指向目录的符号链接（与 Path.is_dir 语义一致）"""
+        real = tmp_path / "real"
+        real.mkdir()
+        (real / "x.lua").write_text("", encoding="utf-8")
+        proj = tmp_path / "proj"
+        proj.mkdir()
+        (proj / "linked").symlink_to(real, target_is_directory=True)
+        (proj / "y.lua").write_text("", encoding="utf-8")
+
+        results = search_file_tool(str(proj), pattern="*.lua", respect_gitignore=False)
+        assert sorted(Path(r).relative_to(proj).as_posix() for r in results) == ["linked/x.lua", "y.lua"]
+
+    def test_walk_skips_symlink_loops(self, tmp_path: Path) -> None:
+        """自指的符号链接（stat 报 ELOOP）被跳过，不中断遍历"""
+        (tmp_path / "loop").symlink_to("loop")
+        (tmp_path / "a.lua").write_text("", encoding="utf-8")
+
+        results = search_file_tool(str(tmp_path), pattern="*.lua", respect_gitignore=False)
+        assert [Path(r).name for r in results] == ["a.lua"]
+
+    def test_unsorted_order(self, tmp_path: Path) -> None:
+        """order="none" 跳过最终排序，按遍历顺序（子目录先于本层文件）返回同一批结果"""
+        (tmp_path / "a.lua").write_text("", encoding="utf-8")
+        (tmp_path / "b").mkdir()
+        (tmp_path / "b" / "x.lua").write_text("", encoding="utf-8")
+
+        kwargs = {"pattern": "*.lua", "respect_gitignore": False}
+        ordered = search_file_tool(str(tmp_path), **kwargs)
+        unordered = search_file_tool(str(tmp_path), order="none", **kwargs)
+        assert [Path(r).relative_to(tmp_path).as_posix() for r in ordered] == ["a.lua", "b/x.lua"]
+        assert [Path(r).relative_to(tmp_path).as_posix() for r in unordered] == ["b/x.lua", "a.lua"]
+
+    def test_walk_prefetch_keeps_order(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """强制启用并行预取时，遍历结果与截断位置和串行遍历一致"""
+        from agent_system.tools import search_file
+
+        for i in range(6):
+            for j in range(6):
+                d = tmp_path / f"d{i}" / f"s{j}"
+                d.mkdir(parents=True)
+                (d / f"f{i}{j}.lua").write_text("", encoding="utf-8")
+
+        serial = search_file_tool(str(tmp_path), pattern="*.lua", max_results=20, respect_gitignore=False)
+        monkeypatch.setattr(search_file, "_SLOW_SCAN_SECONDS", -1.0)
+        parallel = search_file_tool(str(tmp_path), pattern="*.lua", max_results=20, respect_gitignore=False)
+        assert parallel == serial
+        assert len(serial) == 20
+
+    def test_iter_streams_lazily(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """search_file_iter 逐个产出，取到第一个结果前不会读完整棵树"""
+        from agent_system.tools import search_file
+
+        for i in range(5):
+            d = tmp_path / f"d{i}"
+            d.mkdir()
+            (d / f"f{i}.lua").write_text("", encoding="utf-8")
+
+        scanned: list[str] = []
+        real_scan = search_file._scan_dir
+        monkeypatch.setattr(search_file, "_scan_dir", lambda d: scanned.append(d) or real_scan(d))
+
+        it = search_file.search_file_iter(str(tmp_path), pattern="*.lua", respect_gitignore=False)
+        assert next(it) == str(tmp_path / "d0" / "f0.lua")
+        assert len(scanned) == 2
+        it.close()
+        assert sorted(search_file.search_file_iter(str(tmp_path), pattern="*.lua", respect_gitignore=False)) == \
+            search_file_tool(str(tmp_path), pattern="*.lua", respect_gitignore=False)
+
+    def test_git_non_ascii_paths(self, tmp_path: Path) -> None:
+        """git 仓库内含中文、空格的文件名原样返回（不被 git 引号转义）"""
+        import shutil
+        import subprocess
+
+        if shutil.which("git") is None:
+            pytest.skip("未安装 git")
+        subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+        (tmp_path / "界面 配置.lua").write_text("", encoding="utf-8")
+        (tmp_path / "main.lua").write_text("", encoding="utf-8")
+
+        results = search_file_tool(str(tmp_path), pattern="*.lua")
+        assert sorted(Path(r).name for r in results) == ["main.lua", "界面 配置.lua"]
+        assert all(Path(r).exists() for r in results)
+
+    def test_repo_root_cache(self, tmp_path: Path) -> None:
+        """仓库根查找结果被缓存；.git 被删除后自动重新查找，之后新建的仓库无需清缓存即生效"""
+        from agent_system.tools import search_file
+
+        sub = tmp_path / "a" / "b"
+        sub.mkdir(parents=True)
+        (tmp_path / "a" / ".git").mkdir()
+        search_file._clear_search_caches()
+        assert search_file._find_git_root(sub) == (tmp_path / "a").resolve()
+        assert search_file._find_git_root(sub) == (tmp_path / "a").resolve()
+
+        (tmp_path / "a" / ".git").rmdir()
+        assert search_file._find_git_root(sub) != (tmp_path / "a").resolve()
+
+        (sub / ".git").mkdir()
+        assert search_file._find_git_root(sub) == sub.resolve()
+
+    def test_gitignore_created_after_search(self, tmp_path: Path) -> None:
+        """第一次搜索时还没有 .gitignore，之后新建的 .gitignore 立即生效"""
+        from agent_system.tools import search_file
+
+        (tmp_path / "secret").mkdir()
+        (tmp_path / "secret" / "b.ts").write_text("", encoding="utf-8")
+        (tmp_path / "a.ts").write_text("", encoding="utf-8")
+        search_file._clear_search_caches()
+
+        first = search_file_tool(str(tmp_path), pattern="*.ts", respect_gitignore=True)
+        assert str(tmp_path / "secret" / "b.ts") in first
+
+        (tmp_path / ".gitignore").write_text("secret/\n", encoding="utf-8")
+        assert search_file_tool(str(tmp_path), pattern="*.ts", respect_gitignore=True) == [str(tmp_path / "a.ts")]
+
     def test_nonexistent_dir(self) -> None:
         """搜索不存在的目录 → 空列表"""
         results = search_file_tool("/nonexistent/dir")
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock
@@ -42,6 +43,51 @@ class TestWriteFileTool:
             write_file_tool(path, "new content")
             assert path.read_text(encoding="utf-8") == "new content"
 
+    def test_identical_content_not_rewritten(self) -> None:
+        """内容未变时不写盘（mtime 不变）；内容变化时原子替换"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "test.ts"
+            path.write_text("same\n", encoding="utf-8")
+            os.utime(path, ns=(0, 0))
+            write_file_tool(path, "same\n")
+            assert path.stat().st_mtime_ns == 0
+
+            write_file_tool(path, "diff\n")
+            assert path.read_text(encoding="utf-8") == "diff\n"
+            assert path.stat().st_mtime_ns != 0
+            assert sorted(p.name for p in Path(tmp).iterdir()) == ["test.ts"]
+
+
+class TestTodoListTool:
+    """todo_list 工具测试"""
+
+    def test_write_then_read(self) -> None:
+        """write 覆盖列表，read 返回同样的紧凑 JSON；不同列表互不影响"""
+        import json
+
+        from agent_system.tools.todo_list import todo_list_tool
+
+        state: list = []
+        other: list = []
+        written = todo_list_tool("write", [{"id": 1, "title": "实现接口", "status": "in-progress"}], _state=state)
+        assert json.loads(written) == [{"id": 1, "title": "实现接口", "status": "in-progress"}]
+        assert "\n" not in written and "实现接口" in written
+        assert todo_list_tool("read", _state=state) == written
+        assert todo_list_tool("read", _state=other) == "[]"
+
+        todo_list_tool("write", [{"id": 1, "title": "实现接口", "status": "completed"}], _state=state)
+        assert json.loads(todo_list_tool("read", _state=state))[0]["status"] == "completed"
+
+    def test_read_after_failed_write(self) -> None:
+        """write 中途出错后，read 反映当前列表的真实内容，而不是出错前的结果"""
+        from agent_system.tools.todo_list import todo_list_tool
+
+        state: list = []
+        todo_list_tool("write", [{"id": 1, "title": "a", "status": "completed"}], _state=state)
+        with pytest.raises(AttributeError):
+            todo_list_tool("write", ["oops"], _state=state)  # type: ignore[list-item]
+        assert todo_list_tool("read", _state=state) == "[]"
+
 
 class TestCodeChanges:
     """CodeChanges 数据结构测试"""
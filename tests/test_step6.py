@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import shlex
 import sys
 import tempfile
 from pathlib import Path
@@ -43,6 +44,137 @@ class TestRunCommandTool:
         assert result.exit_code == -1
         assert "超时" in result.stderr
 
+    def test_large_output_and_stderr(self) -> None:
+        """大量输出完整收集，stdout/stderr 分开"""
+        result = run_command_tool(
+            'python -c "import sys; print(\'x\' * 100000); '
+            'print(*range(3000), sep=chr(10)); sys.stderr.write(\'err\')"'
+        )
+        assert result.exit_code == 0
+        lines = result.stdout.splitlines()
+        assert lines[0] == "x" * 100000
+        assert lines[-1] == "2999"
+        assert len(lines) == 3001
+        assert result.stderr == "err"
+
+    def test_shell_syntax_and_argv(self) -> None:
+        """含管道的命令仍经 shell 执行；argv 列表原样传参"""
+        from agent_system.tools.process import run_process
+
+        result = run_command_tool('python -c "print(21)" | python -c "print(int(input()) * 2)"')
+        assert result.stdout.strip() == "42"
+
+        result2 = run_process([sys.executable, "-c", "import sys; print(sys.argv[1])", "a b | c"])
+        assert result2.returncode == 0
+        assert result2.stdout.strip() == "a b | c"
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="Windows 上字符串命令总是经过 cmd.exe")
+    def test_quoted_metachars_skip_shell(self) -> None:
+        """元字符只出现在引号内时直接启动；双引号内的 $ 仍交给 shell 展开"""
+        from agent_system.tools.process import _prepare_command
+
+        py = shlex.quote(sys.executable)
+        assert _prepare_command(f"{py} -c 'print(1 | 2)'", None) == ([sys.executable, "-c", "print(1 | 2)"], False)
+        assert _prepare_command(f'{py} -c "print(1)"', None)[1] is False
+        assert _prepare_command('echo "$HOME"', None)[1] is True
+        assert _prepare_command("echo a | cat", None)[1] is True
+
+        result = run_command_tool(f"{py} -c 'import sys; print(sys.argv[1:])' \"(a; b)\" '$x'")
+        assert result.stdout.strip() == "['(a; b)', '$x']"
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="依赖 POSIX sh 语法")
+    def test_shell_commands_isolated(self, tmp_path: Path) -> None:
+        """shell 命令互不影响：cd/export/exit 不残留，后台孙进程的输出不会串进下一条命令"""
+        result = run_command_tool("cd / && export LEAK=1; echo moved | cat; exit 3", cwd=str(tmp_path))
+        assert result.exit_code == 3
+        assert result.stdout == "moved\n"
+
+        result = run_command_tool("pwd | cat; echo ${LEAK:-none} >&2", cwd=str(tmp_path))
+        assert result.exit_code == 0
+        assert Path(result.stdout.strip()).resolve() == tmp_path.resolve()
+        assert result.stderr == "none\n"
+
+        detach = (
+            f"{shlex.quote(sys.executable)} -c "
+            "\"import subprocess; subprocess.Popen(['sh', '-c', 'sleep 0.3; echo leaked'])\"; echo first"
+        )
+        result = run_command_tool(detach, cwd=str(tmp_path))
+        assert result.stdout == "first\nleaked\n"
+        result = run_command_tool("echo second; true", cwd=str(tmp_path))
+        assert result.stdout == "second\n"
+
+    def test_interactive_buffer_cap(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """交互模式输出超过缓冲上限时只保留最近部分并注明"""
+        from agent_system.tools import process
+
+        monkeypatch.setattr(process, "_MAX_BUFFERED_CHARS", 1000)
+        result = run_command_tool(
+            'python -c "print(*range(2000), sep=chr(10))"',
+            interactive=True,
+            idle_timeout=5,
+        )
+        assert result.exit_code == 0
+        assert result.stdout.startswith("[输出过多")
+        assert result.stdout.endswith("1999\n")
+        assert len(result.stdout) < 1100
+
+    def test_output_byte_cap(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """普通模式输出超过字节上限时只保留最近部分并注明"""
+        from agent_system.tools import process
+
+        monkeypatch.setattr(process, "_MAX_CAPTURED_BYTES", 1000)
+        result = run_command_tool('python -c "print(*range(2000), sep=chr(10))"')
+        assert result.exit_code == 0
+        assert result.stdout.startswith("[输出过多")
+        assert result.stdout.endswith("1999\n")
+        assert len(result.stdout) < 1100
+
+    def test_thread_drain_not_starved_by_long_running_processes(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """线程回退模式下，大量长时间运行进程占住读线程时，新进程的输出仍能及时读完"""
+        import os
+        from types import SimpleNamespace
+
+        from agent_system.tools import process
+        from agent_system.tools.process import _StreamLog, _ThreadDrain, run_process
+
+        monkeypatch.setattr(process, "_USE_SELECTORS", False)
+        write_fds: list[int] = []
+        pipes = []
+        try:
+            # 40 个"长时间运行"的进程 = 80 个阻塞在读管道上的读线程
+            for _ in range(40):
+                streams = []
+                for _ in range(2):
+                    r, w = os.pipe()
+                    write_fds.append(w)
+                    streams.append(os.fdopen(r, "rb"))
+                pipes.extend(streams)
+                _ThreadDrain(
+                    SimpleNamespace(stdout=streams[0], stderr=streams[1]),
+                    _StreamLog(False, False, ""),
+                    _StreamLog(True, False, ""),
+                )
+            result = run_process([sys.executable, "-c", "print('ok')"], timeout=10, stream_output=False)
+            assert not result.timed_out
+            assert result.stdout == "ok\n"
+        finally:
+            for w in write_fds:
+                os.close(w)
+
+    def test_stream_log_decoding(self) -> None:
+        """输出解码：\r\n / \r 统一为 \n，非法 UTF-8 替换为 U+FFFD，与文本模式管道一致"""
+        from agent_system.tools.process import _StreamLog
+
+        for chunks, expected in (
+            ([b"a\r\nb", b"\rc\n"], "a\nb\nc\n"),
+            ([b"\xe4\xb8", b"\xad\xff\n"], "\u4e2d\ufffd\n"),
+        ):
+            log = _StreamLog(False, False, "")
+            for chunk in chunks:
+                log.feed(chunk)
+            log.feed(b"", final=True)
+            assert log.text() == expected
+
     def test_success_property(self) -> None:
         """success 属性正确"""
         result = run_command_tool("echo ok")
@@ -34,6 +34,175 @@ class TestGrepContent:
         assert results[0]["line"] == 2
         assert "Player" in results[0]["content"]
 
+    def test_grep_literal_case_insensitive(self, tmp_path: Path) -> None:
+        """纯文本模式走子串匹配，仍然大小写不敏感"""
+        from agent_system.tools.grep_content import grep_content_tool, grep_dir_tool
+
+        f = tmp_path / "test.ts"
+        f.write_text("const PlayerName = 1;\nplayername();\nother\n", encoding="utf-8")
+
+        results = grep_content_tool(str(f), "playerName")
+        assert [r["line"] for r in results] == [1, 2]
+
+        results = grep_dir_tool(str(tmp_path), "PLAYERNAME", respect_gitignore=False)
+        assert [r["line"] for r in results] == [1, 2]
+
+    @pytest.mark.parametrize(
+        ("pattern", "expected"),
+        [("string", [2, 4]), ("kind", [1, 3]), ("id", [3]), ("ſtring", [2, 4]), ("σ", [5])],
+        ids=["long-s", "kelvin", "dotless-i", "non-ascii-needle", "sigma"],
+    )
+    def test_grep_literal_matches_ignorecase_folding(
+        self, tmp_path: Path, pattern: str, expected: list[int],
+    ) -> None:
+        """纯文本模式与 re.IGNORECASE 的大小写折叠一致（ſ / K / ı 等 lower() 无法覆盖的字符）"""
+        from agent_system.tools.grep_content import grep_content_tool, grep_dir_tool
+
+        f = tmp_path / "test.ts"
+        f.write_text("Kind = 1\nſtring 中\nıd kind\nstring\nΣς\n", encoding="utf-8")
+
+        assert [r["line"] for r in grep_content_tool(str(f), pattern)] == expected
+        results = grep_dir_tool(str(tmp_path), pattern, respect_gitignore=False)
+        assert [r["line"] for r in results] == expected
+
+    def test_grep_match_stays_within_line(self, tmp_path: Path) -> None:
+        """整体缓冲区搜索时，跨行命中不计入，^/$ 按行锚定"""
+        from agent_system.tools.grep_content import grep_content_tool
+
+        f = tmp_path / "test.ts"
+        f.write_text("foo\nbar\n\nfoo bar\nbaz\n", encoding="utf-8")
+
+        assert [r["line"] for r in grep_content_tool(str(f), r"foo\s+bar")] == [4]
+        assert [r["line"] for r in grep_content_tool(str(f), r"^ba")] == [2, 5]
+        assert [r["line"] for r in grep_content_tool(str(f), r"^$")] == [3]
+
+    @pytest.mark.parametrize(
+        ("pattern", "expected"),
+        [
+            (r"foo\Z", [1, 3]),
+            (r"\Afoo", [2, 3]),
+            (r"(?<=\n)foo", []),
+            (r"(?<!\n)foo", [1, 2, 3]),
+            (r"foo(?=\s)", [2]),
+            (r"foo(?!\n)", [1, 2, 3]),
+        ],
+        ids=["end-anchor", "start-anchor", "lookbehind-newline", "neg-lookbehind", "lookahead", "neg-lookahead"],
+    )
+    def test_grep_anchors_and_lookaround_per_line(
+        self, tmp_path: Path, pattern: str, expected: list[int],
+    ) -> None:
+        r"""\A / \Z / 前瞻后顾按单行生效，与逐行匹配一致"""
+        from agent_system.tools.grep_content import grep_content_multi_tool, grep_content_tool
+
+        f = tmp_path / "test.ts"
+        f.write_bytes(b"barFOO\r\nfoo x\nfoo\n")
+
+        assert [r["line"] for r in grep_content_tool(str(f), pattern)] == expected
+        assert [r["line"] for r in grep_content_multi_tool(str(f), [pattern])] == expected
+
+    def test_grep_bytes_path_decodes_hit_lines(self, tmp_path: Path) -> None:
+        """ASCII 模式在字节上匹配，命中行正确解码且行号不受 CRLF 影响"""
+        from agent_system.tools.grep_content import grep_content_tool
+
+        f = tmp_path / "test.ts"
+        f.write_bytes("// 玩家类\r\nexport class Player {}\r\n// 结束\r\n".encode("utf-8"))
+
+        results = grep_content_tool(str(f), "EXPORT class")
+        assert results == [{"line": 2, "content": "export class Player {}"}]
+
+        results = grep_content_tool(str(f), "玩家")
+        assert results == [{"line": 1, "content": "// 玩家类"}]
+
+    @pytest.mark.parametrize(
+        ("pattern", "expected"),
+        [
+            (r"中", [2]),
+            (r"\N{CJK UNIFIED IDEOGRAPH-4E2D}", [2]),
+            (r"(?u)ab+c", [1]),
+            (r"\xe4", []),
+            (r"i+", [3]),
+            (r"s+", [4]),
+            (r"[a-z]+?A", [5]),
+        ],
+        ids=["u-escape", "named-escape", "u-flag", "x-escape", "dotted-i", "long-s", "kelvin-range"],
+    )
+    def test_grep_ascii_pattern_matches_text_semantics(
+        self, tmp_path: Path, pattern: str, expected: list[int],
+    ) -> None:
+        """ASCII 模式中 bytes 正则无法表达的转义 / 标志 / 非 ASCII 大小写折叠，结果与 str 正则一致"""
+        from agent_system.tools.grep_content import grep_content_tool
+
+        f = tmp_path / "test.ts"
+        f.write_text("abc\n中文\nİ\nſ\nKa\n", encoding="utf-8")
+
+        assert [r["line"] for r in grep_content_tool(str(f), pattern)] == expected
+
+        big = tmp_path / "big.ts"
+        big.write_text("// 填充行\n" * 8000 + "abc\n中文\nİ\nſ\nKa\n", encoding="utf-8")
+        assert [r["line"] - 8000 for r in grep_content_tool(str(big), pattern)] == expected
+
+    def test_grep_large_file_mmap(self, tmp_path: Path) -> None:
+        """大文件走 mmap 路径，行号与内容正确"""
+        from agent_system.tools.grep_content import grep_content_tool
+
+        f = tmp_path / "big.ts"
+        lines = [f"// 填充行 {i}" for i in range(10000)]
+        lines[7000] = "export class Target {}"
+        f.write_text("\n".join(lines), encoding="utf-8")
+        assert f.stat().st_size > 64 * 1024
+
+        results = grep_content_tool(str(f), "class target")
+        assert results == [{"line": 7001, "content": "export class Target {}"}]
+
+    def test_grep_multi_patterns(self, tmp_path: Path) -> None:
+        """多模式搜索：一次扫描，标注每行命中的模式"""
+        from agent_system.tools.grep_content import grep_content_multi_tool
+
+        f = tmp_path / "test.ts"
+        f.write_text(
+            "import { Vec2 } from 'cc';\n"
+            "export class Player {\n"
+            "  move(dir: Vec2): void {}\n"
+            "}\n",
+            encoding="utf-8",
+        )
+
+        results = grep_content_multi_tool(str(f), ["vec2", r"class \w+"])
+        assert [r["line"] for r in results] == [1, 2, 3]
+        assert results[0]["patterns"] == ["vec2"]
+        assert results[1]["patterns"] == [r"class \w+"]
+
+        # 含捕获组的模式不参与合并，结果一致
+        results = grep_content_multi_tool(str(f), [r"(v)ec2", r"class \w+"])
+        assert [r["line"] for r in results] == [1, 2, 3]
+
+    def test_grep_multi_routed_in_executors(self, tmp_path: Path) -> None:
+        """grep_content_multi 已注册到 Analyst / Coder 执行器，遵守路径约束且可并行"""
+        from agent_system.agents.analyst import AnalystToolExecutor
+        from agent_system.agents.coder import CoderToolExecutor
+        from agent_system.tools.grep_content import GREP_CONTENT_MULTI_TOOL_DEFINITION
+
+        root = tmp_path / "root"
+        root.mkdir()
+        (root / "a.ts").write_text("import { Vec2 } from 'cc';\nexport class Player {}\n", encoding="utf-8")
+        (tmp_path / "outside.ts").write_text("class Secret {}\n", encoding="utf-8")
+
+        assert GREP_CONTENT_MULTI_TOOL_DEFINITION["name"] == "grep_content_multi"
+        for executor in (
+            AnalystToolExecutor(allowed_roots=[str(root)], default_base_dir=str(root)),
+            CoderToolExecutor(allowed_roots=[str(root)], default_base_dir=str(root)),
+        ):
+            assert executor.is_parallel_safe("grep_content_multi")
+            result = json.loads(executor.execute(
+                "grep_content_multi", {"path": "a.ts", "patterns": ["vec2", r"class \w+"]},
+            ))
+            assert [(r["line"], r["patterns"]) for r in result] == [(1, ["vec2"]), (2, [r"class \w+"])]
+
+            denied = executor.execute(
+                "grep_content_multi", {"path": str(tmp_path / "outside.ts"), "patterns": ["class"]},
+            )
+            assert denied.startswith("错误") and "Secret" not in denied
+
     def test_grep_no_match(self, tmp_path: Path) -> None:
         """无匹配时返回空列表"""
         from agent_system.tools.grep_content import grep_content_tool
@@ -63,6 +232,95 @@ class TestGrepContent:
         results = grep_dir_tool(str(tmp_path), r"export class", file_pattern="*.ts")
         assert len(results) == 2
 
+    def test_grep_dir_in_git_repo(self, tmp_path: Path) -> None:
+        """git 仓库内经 git ls-files 取文件列表，file_pattern 与 .gitignore 均生效"""
+        import shutil
+        import subprocess
+
+        from agent_system.tools.grep_content import grep_dir_tool
+
+        if shutil.which("git") is None:
+            pytest.skip("未安装 git")
+        subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+        (tmp_path / ".gitignore").write_text("gen/\n", encoding="utf-8")
+        (tmp_path / "gen").mkdir()
+        (tmp_path / "gen" / "x.ts").write_text("export class Gen {}", encoding="utf-8")
+        (tmp_path / "a.ts").write_text("export class Foo {}", encoding="utf-8")
+        (tmp_path / "c.lua").write_text("-- export class", encoding="utf-8")
+
+        results = grep_dir_tool(str(tmp_path), r"export class", file_pattern="*.ts")
+        assert [Path(str(r["file"])).name for r in results] == ["a.ts"]
+
+    def test_grep_dir_line_numbers_and_cap(self, tmp_path: Path) -> None:
+        """目录搜索返回正确行号，并在 max_matches 处提前停止"""
+        from agent_system.tools.grep_content import grep_dir_tool
+
+        (tmp_path / "a.ts").write_text(
+            "".join(f"hit {i}  \n" for i in range(20)), encoding="utf-8",
+        )
+
+        results = grep_dir_tool(
+            str(tmp_path), r"hit", file_pattern="*.ts",
+            max_matches=3, respect_gitignore=False,
+        )
+        assert [r["line"] for r in results] == [1, 2, 3]
+        assert results[0]["content"] == "hit 0"
+
+    def test_grep_dir_line_breaks_match_single_file(self, tmp_path: Path) -> None:
+        """\\x0c / \\x85 / \\u2028 等换行符下，目录搜索与单文件搜索的行号一致"""
+        from agent_system.tools.grep_content import grep_content_tool, grep_dir_tool
+
+        f = tmp_path / "a.ts"
+        f.write_text("x\x0chit 1\nhit 2\x85y\r\nz\u2028hit 3\rhit 4\n", encoding="utf-8")
+
+        single = grep_content_tool(str(f), r"hit \d")
+        assert [r["line"] for r in single] == [2, 3, 6, 7]
+        results = grep_dir_tool(str(tmp_path), r"hit \d", respect_gitignore=False)
+        assert [(r["line"], r["content"]) for r in results] == [
+            (r["line"], r["content"]) for r in single
+        ]
+        literal = grep_dir_tool(str(tmp_path), "HIT", respect_gitignore=False)
+        assert [r["line"] for r in literal] == [2, 3, 6, 7]
+
+    def test_grep_dir_parallel_keeps_file_order(self, tmp_path: Path) -> None:
+        """并行扫描多个文件时结果仍按文件顺序返回，并遵守 max_matches"""
+        from agent_system.tools.grep_content import grep_dir_tool
+
+        for i in range(150):
+            (tmp_path / f"f{i:03d}.ts").write_text("hit\nhit\n", encoding="utf-8")
+
+        results = grep_dir_tool(
+            str(tmp_path), r"h.t", max_matches=201, respect_gitignore=False,
+        )
+        assert len(results) == 201
+        files = [Path(str(r["file"])).name for r in results]
+        assert files == sorted(files)
+        assert files[-1] == "f100.ts"
+
+    def test_grep_dir_prunes_ignored_dirs(self, tmp_path: Path) -> None:
+        """遍历时跳过 node_modules 等忽略目录，子目录先于文件产出"""
+        from agent_system.tools.grep_content import grep_dir_tool
+
+        (tmp_path / "node_modules" / "pkg").mkdir(parents=True)
+        (tmp_path / "node_modules" / "pkg" / "index.ts").write_text("hit", encoding="utf-8")
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "b.ts").write_text("hit", encoding="utf-8")
+        (tmp_path / "a.ts").write_text("hit", encoding="utf-8")
+
+        results = grep_dir_tool(str(tmp_path), "hit")
+        assert [Path(str(r["file"])).name for r in results] == ["b.ts", "a.ts"]
+
+    def test_grep_dir_skips_symlink_loop(self, tmp_path: Path) -> None:
+        """自指的符号链接（ELOOP）只跳过自身，同目录文件照常搜索"""
+        from agent_system.tools.grep_content import grep_dir_tool
+
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "a.ts").write_text("export const a = 1;\n", encoding="utf-8")
+        (tmp_path / "src" / "loop").symlink_to("loop")
+
+        results = grep_dir_tool(str(tmp_path), "export", respect_gitignore=False)
+        assert [(Path(str(r["file"])).name, r["line"]) for r in results] == [("a.ts", 1)]
+
     def test_grep_max_matches(self, tmp_path: Path) -> None:
         """max_matches 限制"""
         from agent_system.tools.grep_content import grep_content_tool
@@ -120,6 +378,17 @@ class TestListDirectory:
         result = list_directory_tool(str(tmp_path), max_depth=2)
         assert "deep.ts" not in result
 
+    def test_symlink_loop_skipped(self, tmp_path: Path) -> None:
+        """自指的符号链接（ELOOP）只跳过自身，同目录其他条目照常列出"""
+        from agent_system.tools.list_directory import list_directory_tool
+
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "a.ts").write_text("", encoding="utf-8")
+        (tmp_path / "src" / "loop").symlink_to("loop")
+
+        lines = [ln.strip() for ln in list_directory_tool(str(tmp_path)).splitlines()[1:]]
+        assert lines == ["src/", "a.ts"]
+
     def test_nonexistent(self) -> None:
         """目录不存在"""
         from agent_system.tools.list_directory import list_directory_tool
@@ -172,6 +441,21 @@ class TestListDirectory:
         assert "debug.log" not in result
         assert "cache.tmp" not in result
 
+    def test_gitignore_char_class(self, tmp_path: Path) -> None:
+        """.gitignore 支持 [] 字符类与 ? 通配符"""
+        from agent_system.tools.list_directory import list_directory_tool
+
+        (tmp_path / ".gitignore").write_text("[ab].log\ntmp?.txt\n", encoding="utf-8")
+        for name in ("a.log", "b.log", "c.log", "tmp1.txt", "tmp12.txt"):
+            (tmp_path / name).write_text("", encoding="utf-8")
+
+        result = list_directory_tool(str(tmp_path))
+        assert "a.log" not in result
+        assert "b.log" not in result
+        assert "c.log" in result
+        assert "tmp1.txt" not in result
+        assert "tmp12.txt" in result
+
     def test_gitignore_comment_and_empty(self, tmp_path: Path) -> None:
         """.gitignore 中的注释和空行被跳过"""
         from agent_system.tools.list_directory import list_directory_tool
@@ -199,6 +483,73 @@ class TestListDirectory:
         assert "src/" in result
         assert "main.ts" in result
 
+    def test_gitignore_path_pattern_anchored(self, tmp_path: Path) -> None:
+        """含 / 的模式只匹配相对路径，不匹配其他层级的同名目录"""
+        from agent_system.tools.list_directory import list_directory_tool
+
+        (tmp_path / ".gitignore").write_text("assets/cache\n", encoding="utf-8")
+        (tmp_path / "assets" / "cache").mkdir(parents=True)
+        (tmp_path / "assets" / "cache" / "a.bin").write_text("", encoding="utf-8")
+        (tmp_path / "src" / "cache").mkdir(parents=True)
+        (tmp_path / "src" / "cache" / "b.ts").write_text("", encoding="utf-8")
+
+        result = list_directory_tool(str(tmp_path))
+        assert "a.bin" not in result
+        assert "b.ts" in result
+
+    def test_gitignore_cache_invalidated_on_change(self, tmp_path: Path) -> None:
+        """.gitignore 修改后缓存失效，重新解析"""
+        import os
+
+        from agent_system.tools.list_directory import list_directory_tool
+
+        gitignore = tmp_path / ".gitignore"
+        gitignore.write_text("generated\n", encoding="utf-8")
+        (tmp_path / "generated").mkdir()
+        (tmp_path / "artifacts").mkdir()
+
+        result = list_directory_tool(str(tmp_path))
+        assert "generated" not in result
+        assert "artifacts/" in result
+
+        gitignore.write_text("artifacts\n", encoding="utf-8")
+        st = gitignore.stat()
+        os.utime(gitignore, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        result = list_directory_tool(str(tmp_path))
+        assert "generated/" in result
+        assert "artifacts" not in result
+
+    def test_gitignore_name_match_cached(self, tmp_path: Path) -> None:
+        """名称规则按名称缓存：多个目录下的同名文件只匹配一次"""
+        from agent_system.tools.list_directory import _is_gitignored, _parse_gitignore
+
+        gitignore = tmp_path / ".gitignore"
+        gitignore.write_text("*.log\nassets/cache\n", encoding="utf-8")
+        rules = _parse_gitignore(gitignore)
+        assert rules is not None and rules.match_name is not None
+
+        for rel in ("a/index.ts", "b/index.ts", "c/index.ts"):
+            assert not _is_gitignored("index.ts", rel, rules)
+        assert _is_gitignored("debug.log", "a/debug.log", rules)
+        assert _is_gitignored("cache", "assets/cache", rules)
+        assert rules.match_name.cache_info().hits == 2
+
+    def test_gitignore_literal_names(self, tmp_path: Path) -> None:
+        """不带通配符的名称模式走集合查找，不进入名称正则"""
+        from agent_system.tools.list_directory import _is_gitignored, _parse_gitignore
+
+        gitignore = tmp_path / ".gitignore"
+        gitignore.write_text("node_modules/\n/coverage\nfoo.bar\n", encoding="utf-8")
+        rules = _parse_gitignore(gitignore)
+        assert rules is not None
+        assert rules.name_literals == {"node_modules", "coverage", "foo.bar"}
+        assert rules.name_re is None and rules.match_name is None
+
+        assert _is_gitignored("node_modules", "web/node_modules", rules)
+        assert _is_gitignored("foo.bar", "foo.bar", rules)
+        assert not _is_gitignored("fooxbar", "fooxbar", rules)
+
     def test_max_entries_cap(self, tmp_path: Path) -> None:
         """max_entries 达到上限时截断输出"""
         from agent_system.tools.list_directory import list_directory_tool
@@ -265,6 +616,51 @@ class TestReplaceInFile:
         assert "错误" in result
         assert "2" in result
 
+    def test_atomic_write_keeps_mode_and_symlink(self, tmp_path: Path) -> None:
+        """替换后无临时文件残留，保留权限；经符号链接修改时改写目标文件"""
+        from agent_system.tools.replace_in_file import replace_in_file_tool
+
+        f = tmp_path / "run.sh"
+        f.write_text("echo 1\n", encoding="utf-8")
+        f.chmod(0o755)
+        link = tmp_path / "link.sh"
+        try:
+            link.symlink_to(f)
+        except OSError:
+            pytest.skip("不支持符号链接")
+
+        assert "成功" in replace_in_file_tool(str(link), "echo 1", "echo 2")
+        assert link.is_symlink()
+        assert f.read_text(encoding="utf-8") == "echo 2\n"
+        if os.name != "nt":
+            assert f.stat().st_mode & 0o777 == 0o755
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["link.sh", "run.sh"]
+
+    def test_bytes_outside_match_untouched(self, tmp_path: Path) -> None:
+        """替换只改动匹配段，其余字节（含非 UTF-8 字节）原样保留"""
+        from agent_system.tools.replace_in_file import replace_in_file_tool
+
+        f = tmp_path / "legacy.lua"
+        f.write_bytes("-- 注释\nlocal x = 1\n".encode("utf-8") + b"-- \xb0\xa1\n")
+
+        result = replace_in_file_tool(str(f), "local x = 1", "local x = 2")
+        assert "成功" in result
+        assert f.read_bytes() == "-- 注释\nlocal x = 2\n".encode("utf-8") + b"-- \xb0\xa1\n"
+
+    def test_identical_text_not_rewritten(self, tmp_path: Path) -> None:
+        """新旧文本相同时校验匹配但不重写文件"""
+        from agent_system.tools.replace_in_file import replace_in_file_tool
+
+        f = tmp_path / "test.ts"
+        f.write_text("a\nb\n", encoding="utf-8")
+        before = f.stat().st_mtime_ns
+        os.utime(f, ns=(before, before - 1_000_000_000))
+
+        result = replace_in_file_tool(str(f), "a", "a")
+        assert "成功" in result
+        assert f.stat().st_mtime_ns == before - 1_000_000_000
+        assert "未找到" in replace_in_file_tool(str(f), "zz", "zz")
+
     def test_nonexistent_file(self) -> None:
         """文件不存在"""
         from agent_system.tools.replace_in_file import replace_in_file_tool
@@ -292,6 +688,20 @@ class TestProjectStructure:
         assert result["total_source_files"] >= 2
         assert len(result["exports"]) >= 2
 
+    def test_symlink_loop_skipped(self, tmp_path: Path) -> None:
+        """自指的符号链接（ELOOP）只跳过自身，同目录源文件照常统计"""
+        from agent_system.tools.project_structure import get_project_structure_tool
+
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a.ts").write_text("export class A {}", encoding="utf-8")
+        (src / "loop").symlink_to("loop")
+
+        result = json.loads(get_project_structure_tool(str(tmp_path)))
+
+        assert result["total_source_files"] == 1
+        assert [e["file"] for e in result["exports"]] == ["src/a.ts"]
+
     def test_nonexistent_dir(self) -> None:
         """目录不存在"""
         from agent_system.tools.project_structure import get_project_structure_tool
@@ -317,6 +727,48 @@ class TestProjectStructure:
         assert has_src
         assert not has_test
 
+    def test_respects_gitignore(self, tmp_path: Path) -> None:
+        """gitignore 中的名称模式和路径模式都生效，被忽略目录不展开"""
+        from agent_system.tools.project_structure import get_project_structure_tool
+
+        (tmp_path / ".gitignore").write_text("*.gen.ts\nsrc/legacy\ncache/\n", encoding="utf-8")
+        (tmp_path / "src" / "legacy").mkdir(parents=True)
+        (tmp_path / "src" / "a.ts").write_text("export class A {}", encoding="utf-8")
+        (tmp_path / "src" / "b.gen.ts").write_text("export class B {}", encoding="utf-8")
+        (tmp_path / "src" / "legacy" / "old.ts").write_text("export class Old {}", encoding="utf-8")
+        (tmp_path / "cache").mkdir()
+        (tmp_path / "cache" / "c.ts").write_text("export class C {}", encoding="utf-8")
+
+        result = json.loads(get_project_structure_tool(str(tmp_path)))
+
+        assert result["directories"] == {"src": ["a.ts"]}
+        assert [e["file"] for e in result["exports"]] == ["src/a.ts"]
+
+    def test_ignored_dir_pruned_before_descent(self, tmp_path: Path) -> None:
+        """被忽略目录整棵子树跳过，子条目不再逐个匹配 gitignore"""
+        from unittest.mock import patch
+
+        from agent_system.tools import project_structure
+
+        (tmp_path / ".gitignore").write_text("out/\n", encoding="utf-8")
+        deep = tmp_path / "out" / "keep" / "deeper"
+        deep.mkdir(parents=True)
+        (deep / "a.ts").write_text("export class A {}", encoding="utf-8")
+        (tmp_path / "b.ts").write_text("export class B {}", encoding="utf-8")
+
+        seen: list[str] = []
+        real = project_structure._is_gitignored
+
+        def spy(name: str, rel: str, rules: object) -> bool:
+            seen.append(rel)
+            return real(name, rel, rules)  # type: ignore[arg-type]
+
+        with patch.object(project_structure, "_is_gitignored", spy):
+            result = json.loads(project_structure.get_project_structure_tool(str(tmp_path)))
+
+        assert result["directories"] == {".": ["b.ts"]}
+        assert sorted(seen) == ["b.ts", "out"]
+
 
 # ── ts_check ───────────────────────────────────────────────────
 
@@ -334,6 +786,84 @@ class TestTsCheck:
         assert m.group(2) == "10"
         assert m.group(4) == "TS2322"
 
+    def test_parse_whole_output(self) -> None:
+        """整段输出一次解析：跳过非错误行，行首尾空白与 \r\n 不进入字段"""
+        from agent_system.tools.ts_check import _parse_tsc_errors
+
+        raw = (
+            "src/a.ts(1,2): error TS2304: Cannot find name 'x'.\r\n"
+            "  Types of property 'a' are incompatible.\r\n"
+            "  src/b.ts(30,4): error TS7006: Parameter 'e' implicitly has an 'any' type.  \n"
+            "Found 2 errors.\n"
+        )
+        errors, total = _parse_tsc_errors(raw)
+        assert total == 2
+        assert [(e.file, e.line, e.column, e.code) for e in errors] == [
+            ("src/a.ts", 1, 2, "TS2304"),
+            ("src/b.ts", 30, 4, "TS7006"),
+        ]
+        assert errors[0].message == "Cannot find name 'x'."
+        assert errors[1].message == "Parameter 'e' implicitly has an 'any' type."
+
+    def test_parse_skips_banner_lines(self) -> None:
+        """不含 error 的输出直接返回；错误行前后的进度行不影响解析"""
+        from agent_system.tools.ts_check import _parse_tsc_errors
+
+        banner = "[12:00:00] Starting compilation in watch mode...\n"
+        assert _parse_tsc_errors(banner * 3) == ([], 0)
+
+        raw = banner + "src/a.ts(1,2): error TS2304: Cannot find name 'x'.\n" + "Found 1 error.\n"
+        errors, total = _parse_tsc_errors(raw)
+        assert total == 1
+        assert errors[0].message == "Cannot find name 'x'."
+
+    def test_parse_limit_keeps_total(self) -> None:
+        """超过上限的错误只计数：返回前 limit 个，总数不变"""
+        from agent_system.tools.ts_check import _parse_tsc_errors
+
+        raw = "".join(f"src/a.ts({i},1): error TS2304: Cannot find name 'x{i}'.\n" for i in range(1, 121))
+        errors, total = _parse_tsc_errors(raw, 50)
+        assert total == 120
+        assert len(errors) == 50
+        assert errors[-1].line == 50
+
+    def test_forces_plain_output(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """命令行强制 --pretty false，捕获的输出按行解析"""
+        from agent_system.tools import ts_check
+        from agent_system.tools.process import ProcessResult
+
+        seen: list[str] = []
+
+        def fake_run_process(cmd: str, **kwargs: object) -> ProcessResult:
+            seen.append(cmd)
+            return ProcessResult(
+                stdout="src/a.ts(3,7): error TS2304: Cannot find name 'x'.\n",
+                stderr="", returncode=2, elapsed=0.1,
+            )
+
+        monkeypatch.setattr(ts_check, "run_process", fake_run_process)
+        result = ts_check.ts_check_tool("/proj")
+        assert "--pretty false" in seen[0]
+        assert result.success is False
+        assert result.error_count == 1
+        assert result.errors[0].file == "src/a.ts"
+
+    def test_keeps_truncated_raw_output(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """结果只保留截断后的原始输出，错误总数按完整输出统计"""
+        from agent_system.tools import ts_check
+        from agent_system.tools.process import ProcessResult
+
+        line = "src/a.ts(3,7): error TS2304: Cannot find name 'x'.\n"
+        monkeypatch.setattr(
+            ts_check, "run_process",
+            lambda cmd, **kwargs: ProcessResult(stdout=line * 200, stderr="", returncode=2, elapsed=0.1),
+        )
+        result = ts_check.ts_check_tool("/proj")
+        assert result.raw_output == (line * 200)[:ts_check._MAX_RAW_OUTPUT]
+        assert result.error_count == 200
+        assert len(result.errors) == ts_check._MAX_REPORTED_ERRORS
+        assert not hasattr(result.errors[0], "__dict__")
+
     def test_result_structure(self) -> None:
         """TsCheckResult 结构"""
         from agent_system.tools.ts_check import TsCheckResult, TsError
@@ -380,6 +910,19 @@ class TestDiffFile:
         result = diff_file_tool(str(f), str(f))
         assert "无差异" in result
 
+    def test_diff_identical_copies(self, tmp_path: Path) -> None:
+        """内容相同的两个不同文件直接返回无差异"""
+        from agent_system.tools.diff_file import diff_file_tool
+
+        fa = tmp_path / "a.txt"
+        fb = tmp_path / "b.txt"
+        fa.write_text("same\n" * 1000, encoding="utf-8")
+        fb.write_text("same\n" * 1000, encoding="utf-8")
+        assert diff_file_tool(str(fa), str(fb)) == "无差异"
+
+        fb.write_text("same\n" * 999 + "diff\n", encoding="utf-8")
+        assert "+diff" in diff_file_tool(str(fa), str(fb))
+
     def test_diff_nonexistent(self) -> None:
         """文件不存在"""
         from agent_system.tools.diff_file import diff_file_tool
@@ -394,3 +937,115 @@ class TestDiffFile:
         result = diff_content_tool("hello\nworld\n", "hello\nearth\n", label="test")
         assert "-world" in result
         assert "+earth" in result
+
+    def test_diff_matches_difflib_format(self) -> None:
+        """Myers 差分输出与 difflib.unified_diff 格式一致"""
+        import difflib
+
+        from agent_system.tools.diff_file import diff_content_tool
+
+        a = [f"line {i}\n" for i in range(200)]
+        b = list(a)
+        b[20] = "changed\n"
+        del b[100]
+        b.insert(150, "inserted\n")
+        b[-1] = "last"  # 无尾部换行
+
+        expected = "".join(difflib.unified_diff(
+            a, b, fromfile="f (original)", tofile="f (modified)", n=3,
+        ))
+        assert diff_content_tool("".join(a), "".join(b), label="f") == expected
+
+    def test_diff_myers_falls_back_on_rewrite(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """整段改写或大范围重排时 Myers 按工作量上限放弃，改由 difflib 计算；小改动仍走 Myers"""
+        import difflib
+
+        from agent_system.tools import diff_file
+
+        a = [f"old {i}\n" for i in range(800)]
+        rewritten = [f"new {i}\n" for i in range(800)]
+        shuffled = a[1::2] + a[::2]
+        small = list(a)
+        small[400] = "edited\n"
+
+        assert diff_file._myers_matching_blocks(a, rewritten) is None
+        assert diff_file._myers_matching_blocks(a, shuffled) is None
+        assert diff_file._myers_matching_blocks(a, small) is not None
+
+        calls: list[int] = []
+        real = difflib.SequenceMatcher
+
+        def spy(*args: object, **kwargs: object) -> difflib.SequenceMatcher:
+            calls.append(1)
+            return real(*args, **kwargs)
+
+        monkeypatch.setattr(diff_file.difflib, "SequenceMatcher", spy)
+        result = diff_file.diff_content_tool("".join(a), "".join(rewritten), label="f")
+        assert calls == [1]
+        assert result == "".join(difflib.unified_diff(
+            a, rewritten, fromfile="f (original)", tofile="f (modified)", n=3,
+        ))
+
+    def test_diff_random_edits_apply_cleanly(self) -> None:
+        """随机编辑生成的 diff 不要求与 difflib 逐字节相同，但按 hunk 回放必须还原出修改后文本"""
+        import random
+        import re
+
+        from agent_system.tools.diff_file import diff_content_tool
+
+        hunk_re = re.compile(r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+        rng = random.Random(0)
+        for _ in range(200):
+            a = [f"{rng.choice('abc')}\n" for _ in range(rng.randint(0, 30))]
+            b = list(a)
+            for _ in range(rng.randint(1, 6)):
+                pos = rng.randint(0, len(b))
+                op = rng.choice(("insert", "delete", "replace"))
+                if op == "insert" or pos == len(b):
+                    b.insert(pos, f"{rng.choice('abcd')}\n")
+                elif op == "delete":
+                    del b[pos]
+                else:
+                    b[pos] = f"{rng.choice('abcd')}\n"
+            if a == b:
+                continue
+
+            lines = diff_content_tool("".join(a), "".join(b), label="f").splitlines(keepends=True)
+            assert lines[:2] == ["--- f (original)\n", "+++ f (modified)\n"]
+            out: list[str] = []
+            src = 0
+            i = 2
+            while i < len(lines):
+                m = hunk_re.match(lines[i])
+                assert m is not None
+                start = int(m.group(1)) - (m.group(2) != "0")
+                out.extend(a[src:start])
+                src = start
+                i += 1
+                while i < len(lines) and lines[i][0] in " -+":
+                    tag, text = lines[i][0], lines[i][1:]
+                    if tag != "+":
+                        assert a[src] == text
+                        src += 1
+                    if tag != "-":
+                        out.append(text)
+                    i += 1
+            out.extend(a[src:])
+            assert out == b
+
+    def test_diff_content_line_numbers_after_trim(self) -> None:
+        """只切分变化区域时，hunk 行号仍对应完整文本"""
+        import difflib
+
+        from agent_system.tools.diff_file import diff_content_tool
+
+        a = [f"row {i}\r\n" for i in range(5000)]
+        b = list(a)
+        b[4000] = "edited\r\n"
+
+        expected = "".join(difflib.unified_diff(
+            a, b, fromfile="f (original)", tofile="f (modified)", n=2,
+        ))
+        result = diff_content_tool("".join(a), "".join(b), label="f", context_lines=2)
+        assert result == expected
+        assert "@@ -3999,5 +3999,5 @@" in result